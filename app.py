@@ -1,10 +1,13 @@
 import datetime
+import html
+import re
 import sqlite3
 from http import HTTPStatus
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs
 from wsgiref.simple_server import make_server
 
 DB_PATH = "payroll.db"
+SECTION_PAGE_SIZE = 50
 
 
 def get_db():
@@ -96,6 +99,15 @@ def init_db():
         )
         """
     )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_compensation_employee_effective ON compensation (employee_id, effective_date, id)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pto_usage_employee_date ON pto_usage (employee_id, usage_date)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_record ON audit_logs (record_id, created_at)"
+    )
     conn.commit()
     seed_pay_frequencies(conn)
     conn.close()
@@ -127,29 +139,117 @@ def log_action(conn, entity, record_id, action, detail):
     conn.commit()
 
 
-def render_layout(title, body):
-    return f"""<!DOCTYPE html>
+class Markup(str):
+    """Text that is already valid HTML and must not be escaped again."""
+
+
+_SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+STREAM_CHUNK_SIZE = 8192
+
+
+def _chunks(value):
+    if isinstance(value, bytes):
+        yield value
+    elif isinstance(value, Markup):
+        yield value.encode()
+    elif isinstance(value, str) or not hasattr(value, "__iter__"):
+        if value is not None:
+            yield html.escape(str(value), quote=True).encode()
+    else:
+        for item in value:
+            yield from _chunks(item)
+
+
+class Template:
+    """HTML fragment compiled once into literal byte chunks and ``{{name}}`` slots.
+
+    Slot values are escaped unless they are ``Markup`` or rendered bytes; other
+    iterables are streamed chunk by chunk.
+    """
+
+    def __init__(self, source):
+        self._parts = []
+        position = 0
+        for match in _SLOT_RE.finditer(source):
+            self._parts.append((source[position:match.start()].encode(), match.group(1)))
+            position = match.end()
+        self._tail = source[position:].encode()
+
+    def stream(self, **context):
+        for literal, name in self._parts:
+            if literal:
+                yield literal
+            yield from _chunks(context[name])
+        if self._tail:
+            yield self._tail
+
+    def render(self, **context):
+        return b"".join(self.stream(**context))
+
+
+def buffered(chunks, size=STREAM_CHUNK_SIZE):
+    buffer = []
+    pending = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        pending += len(chunk)
+        if pending >= size:
+            yield b"".join(buffer)
+            buffer = []
+            pending = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def stream_rows(rows, render_row, empty):
+    """Render rows lazily, yielding ``empty`` when there were none."""
+    seen = False
+    for row in rows:
+        seen = True
+        yield render_row(row)
+    if not seen:
+        yield from _chunks(empty)
+
+
+def iter_query(conn, sql, params=()):
+    """Run ``sql`` only once the caller starts consuming rows."""
+    yield from conn.execute(sql, params)
+
+
+def closing_stream(conn, chunks):
+    try:
+        yield from chunks
+    finally:
+        conn.close()
+
+
+def selected(flag):
+    return "selected" if flag else ""
+
+
+LAYOUT = Template(
+    """<!DOCTYPE html>
 <html lang='en'>
 <head>
     <meta charset='UTF-8'>
-    <title>{title}</title>
+    <title>{{title}}</title>
     <style>
-        body {{ font-family: Arial, sans-serif; margin: 24px; background: #f8f9fb; }}
-        header {{ margin-bottom: 16px; }}
-        nav a {{ margin-right: 12px; }}
-        .card {{ background: #fff; padding: 16px; margin-bottom: 16px; border-radius: 8px; box-shadow: 0 1px 3px rgba(0,0,0,0.08); }}
-        table {{ width: 100%; border-collapse: collapse; }}
-        th, td {{ padding: 8px; border-bottom: 1px solid #e0e0e0; text-align: left; }}
-        .actions a {{ margin-right: 8px; }}
-        .badge {{ display: inline-block; padding: 4px 8px; border-radius: 4px; color: #fff; font-size: 12px; }}
-        .badge.active {{ background: #28a745; }}
-        .badge.terminated {{ background: #dc3545; }}
-        form.inline {{ display: inline; }}
-        label {{ display: block; margin: 8px 0 4px; }}
-        input, select, textarea {{ width: 100%; padding: 8px; box-sizing: border-box; }}
-        .two-col {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 12px; }}
-        .muted {{ color: #666; font-size: 13px; }}
-        .pill {{ padding: 4px 8px; background: #eef2ff; border-radius: 16px; font-size: 12px; }}
+        body { font-family: Arial, sans-serif; margin: 24px; background: #f8f9fb; }
+        header { margin-bottom: 16px; }
+        nav a { margin-right: 12px; }
+        .card { background: #fff; padding: 16px; margin-bottom: 16px; border-radius: 8px; box-shadow: 0 1px 3px rgba(0,0,0,0.08); }
+        table { width: 100%; border-collapse: collapse; }
+        th, td { padding: 8px; border-bottom: 1px solid #e0e0e0; text-align: left; }
+        .actions a { margin-right: 8px; }
+        .badge { display: inline-block; padding: 4px 8px; border-radius: 4px; color: #fff; font-size: 12px; }
+        .badge.active { background: #28a745; }
+        .badge.terminated { background: #dc3545; }
+        form.inline { display: inline; }
+        label { display: block; margin: 8px 0 4px; }
+        input, select, textarea { width: 100%; padding: 8px; box-sizing: border-box; }
+        .two-col { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 12px; }
+        .muted { color: #666; font-size: 13px; }
+        .pill { padding: 4px 8px; background: #eef2ff; border-radius: 16px; font-size: 12px; }
     </style>
 </head>
 <body>
@@ -160,9 +260,14 @@ def render_layout(title, body):
         <a href='/payrun-preview'>Pay run preview</a>
     </nav>
 </header>
-{body}
+{{body}}
 </body>
 </html>"""
+)
+
+
+def render_layout(title, body):
+    return buffered(LAYOUT.stream(title=title, body=body))
 
 
 def redirect(location):
@@ -183,7 +288,14 @@ def get_path(environ):
 
 
 def get_query(environ):
-    return parse_qs(urlparse(environ.get("QUERY_STRING", "")).query)
+    return parse_qs(environ.get("QUERY_STRING", ""))
+
+
+def get_page(environ):
+    try:
+        return max(int(get_query(environ).get("page", ["1"])[0]), 1)
+    except ValueError:
+        return 1
 
 
 def parse_date(value):
@@ -206,43 +318,24 @@ def home(_environ):
     return redirect("/employees")
 
 
-def list_employees(environ):
-    query = get_query(environ)
-    search = query.get("q", [""])[0].strip().lower()
-    status = query.get("status", ["all"])[0]
-
-    conn = get_db()
-    cur = conn.cursor()
-    sql = """
-        SELECT e.*, pf.name AS pay_frequency, pf.interval_days
-        FROM employees e
-        LEFT JOIN pay_frequencies pf ON pf.id = e.pay_frequency_id
-        WHERE 1=1
+EMPLOYEE_LIST = Template(
     """
-    params = []
-    if search:
-        sql += " AND (LOWER(e.first_name) LIKE ? OR LOWER(e.last_name) LIKE ? OR LOWER(IFNULL(e.email,'')) LIKE ?)"
-        term = f"%{search}%"
-        params.extend([term, term, term])
-    if status != "all":
-        sql += " AND e.status = ?"
-        params.append(status)
-    sql += " ORDER BY e.last_name, e.first_name"
-    employees = cur.execute(sql, params).fetchall()
-
-    filter_form = f"""
+    <div class='card'>
+        <h2>Employees</h2>
+        <p class='muted'>Search and filter employees by status.</p>
+    </div>
     <form method='get' class='card'>
         <div class='two-col'>
             <div>
                 <label>Search</label>
-                <input type='text' name='q' value='{search}'>
+                <input type='text' name='q' value='{{search}}'>
             </div>
             <div>
                 <label>Status</label>
                 <select name='status'>
-                    <option value='all' {'selected' if status=='all' else ''}>All</option>
-                    <option value='active' {'selected' if status=='active' else ''}>Active</option>
-                    <option value='terminated' {'selected' if status=='terminated' else ''}>Terminated</option>
+                    <option value='all' {{all_selected}}>All</option>
+                    <option value='active' {{active_selected}}>Active</option>
+                    <option value='terminated' {{terminated_selected}}>Terminated</option>
                 </select>
             </div>
         </div>
@@ -251,72 +344,101 @@ def list_employees(environ):
             <a href='/employees/new' style='margin-left: 8px;'>Add employee</a>
         </div>
     </form>
-    """
-
-    rows = "".join(
-        f"<tr><td>{row['first_name']} {row['last_name']}</td>"
-        f"<td><span class='badge {row['status']}'>{row['status'].title()}</span></td>"
-        f"<td>{row['pay_frequency'] or '-'}</td>"
-        f"<td class='actions'><a href='/employees/{row['id']}'>View</a>"
-        f"<a href='/employees/{row['id']}/edit'>Edit</a></td></tr>"
-        for row in employees
-    )
-
-    body = f"""
-    <div class='card'>
-        <h2>Employees</h2>
-        <p class='muted'>Search and filter employees by status.</p>
-    </div>
-    {filter_form}
     <div class='card'>
         <table>
             <thead><tr><th>Name</th><th>Status</th><th>Pay schedule</th><th>Actions</th></tr></thead>
-            <tbody>{rows or '<tr><td colspan="4">No employees yet.</td></tr>'}</tbody>
+            <tbody>{{rows}}</tbody>
         </table>
     </div>
     """
-    return HTTPStatus.OK, {}, render_layout("Employees", body)
+)
+EMPLOYEE_LIST_ROW = Template(
+    "<tr><td>{{name}}</td>"
+    "<td><span class='badge {{status}}'>{{status_label}}</span></td>"
+    "<td>{{pay_frequency}}</td>"
+    "<td class='actions'><a href='/employees/{{id}}'>View</a>"
+    "<a href='/employees/{{id}}/edit'>Edit</a></td></tr>"
+)
 
 
-def employee_form(employee=None, pay_frequencies=None):
-    ef = employee or {}
-    pay_options = "".join(
-        f"<option value='{pf['id']}' {'selected' if ef.get('pay_frequency_id')==pf['id'] else ''}>{pf['name']} ({pf['interval_days']} days)</option>"
-        for pf in pay_frequencies
+def list_employees(environ):
+    query = get_query(environ)
+    search = query.get("q", [""])[0].strip().lower()
+    status = query.get("status", ["all"])[0]
+
+    conn = get_db()
+    sql = """
+        SELECT e.*, pf.name AS pay_frequency, pf.interval_days
+        FROM employees e
+        LEFT JOIN pay_frequencies pf ON pf.id = e.pay_frequency_id
+        WHERE 1=1
+    """
+    params = []
+    if search:
+        sql += " AND (LOWER(e.first_name) LIKE ? OR LOWER(e.last_name) LIKE ? OR LOWER(IFNULL(e.email,'')) LIKE ?)"
+        term = f"%{search}%"
+        params.extend([term, term, term])
+    if status != "all":
+        sql += " AND e.status = ?"
+        params.append(status)
+    sql += " ORDER BY e.last_name, e.first_name"
+    employees = iter_query(conn, sql, params)
+
+    rows = stream_rows(
+        employees,
+        lambda row: EMPLOYEE_LIST_ROW.render(
+            id=row["id"],
+            name=f"{row['first_name']} {row['last_name']}",
+            status=row["status"],
+            status_label=row["status"].title(),
+            pay_frequency=row["pay_frequency"] or "-",
+        ),
+        Markup('<tr><td colspan="4">No employees yet.</td></tr>'),
     )
-    return f"""
+    body = EMPLOYEE_LIST.stream(
+        search=search,
+        all_selected=selected(status == "all"),
+        active_selected=selected(status == "active"),
+        terminated_selected=selected(status == "terminated"),
+        rows=rows,
+    )
+    return HTTPStatus.OK, {}, render_layout("Employees", closing_stream(conn, body))
+
+
+EMPLOYEE_FORM = Template(
+    """
     <div class='card'>
         <div class='two-col'>
             <div>
                 <label>First name</label>
-                <input name='first_name' value='{ef.get('first_name','')}' required>
+                <input name='first_name' value='{{first_name}}' required>
             </div>
             <div>
                 <label>Last name</label>
-                <input name='last_name' value='{ef.get('last_name','')}' required>
+                <input name='last_name' value='{{last_name}}' required>
             </div>
             <div>
                 <label>Email</label>
-                <input name='email' value='{ef.get('email','')}'>
+                <input name='email' value='{{email}}'>
             </div>
             <div>
                 <label>Status</label>
                 <select name='status'>
-                    <option value='active' {'selected' if ef.get('status','active')=='active' else ''}>Active</option>
-                    <option value='terminated' {'selected' if ef.get('status')=='terminated' else ''}>Terminated</option>
+                    <option value='active' {{active_selected}}>Active</option>
+                    <option value='terminated' {{terminated_selected}}>Terminated</option>
                 </select>
             </div>
             <div>
                 <label>Primary work state</label>
-                <input name='primary_work_state' value='{ef.get('primary_work_state','')}'>
+                <input name='primary_work_state' value='{{primary_work_state}}'>
             </div>
             <div>
                 <label>Withholding state</label>
-                <input name='withholding_state' value='{ef.get('withholding_state','')}'>
+                <input name='withholding_state' value='{{withholding_state}}'>
             </div>
             <div>
                 <label>Default pay schedule</label>
-                <select name='pay_frequency_id'>{pay_options}</select>
+                <select name='pay_frequency_id'>{{pay_options}}</select>
             </div>
         </div>
         <div class='two-col' style='margin-top:12px;'>
@@ -337,7 +459,7 @@ def employee_form(employee=None, pay_frequencies=None):
             </div>
             <div>
                 <label>Effective date</label>
-                <input type='date' name='effective_date' value='{datetime.date.today()}'>
+                <input type='date' name='effective_date' value='{{today}}'>
             </div>
             <div>
                 <label>Vacation accrual per period (hours)</label>
@@ -350,6 +472,40 @@ def employee_form(employee=None, pay_frequencies=None):
         </div>
     </div>
     """
+)
+PAY_FREQUENCY_OPTION = Template("<option value='{{id}}' {{selected}}>{{name}} ({{interval_days}} days)</option>")
+EMPLOYEE_FORM_PAGE = Template(
+    """
+    <form method='post'>
+        {{form}}
+        <button type='submit'>{{submit_label}}</button>
+    </form>
+    """
+)
+
+
+def employee_form(employee=None, pay_frequencies=None):
+    ef = employee or {}
+    pay_options = [
+        PAY_FREQUENCY_OPTION.render(
+            id=pf["id"],
+            selected=selected(ef.get("pay_frequency_id") == pf["id"]),
+            name=pf["name"],
+            interval_days=pf["interval_days"],
+        )
+        for pf in pay_frequencies
+    ]
+    return EMPLOYEE_FORM.stream(
+        first_name=ef.get("first_name", ""),
+        last_name=ef.get("last_name", ""),
+        email=ef.get("email", ""),
+        active_selected=selected(ef.get("status", "active") == "active"),
+        terminated_selected=selected(ef.get("status") == "terminated"),
+        primary_work_state=ef.get("primary_work_state", ""),
+        withholding_state=ef.get("withholding_state", ""),
+        pay_options=pay_options,
+        today=datetime.date.today(),
+    )
 
 
 def new_employee(environ):
@@ -400,12 +556,7 @@ def new_employee(environ):
         conn.commit()
         return redirect(f"/employees/{employee_id}")
 
-    body = f"""
-    <form method='post'>
-        {employee_form(pay_frequencies=pay_freqs)}
-        <button type='submit'>Save employee</button>
-    </form>
-    """
+    body = EMPLOYEE_FORM_PAGE.stream(form=employee_form(pay_frequencies=pay_freqs), submit_label="Save employee")
     conn.close()
     return HTTPStatus.OK, {}, render_layout("New employee", body)
 
@@ -433,66 +584,54 @@ def load_employee(conn, employee_id):
     return employee
 
 
-def employee_detail(environ, employee_id):
-    conn = get_db()
-    employee = load_employee(conn, employee_id)
-    if not employee:
-        return HTTPStatus.NOT_FOUND, {}, "Employee not found"
+def compensation_as_of(conn, as_of, status=None):
+    """Return ``{employee_id: compensation row}`` for the rate in force on ``as_of``.
 
-    cur = conn.cursor()
-    comp_history = cur.execute(
-        "SELECT * FROM compensation WHERE employee_id = ? ORDER BY effective_date DESC, id DESC",
-        (employee_id,),
-    ).fetchall()
-    balances = cur.execute(
-        "SELECT * FROM pto_balances WHERE employee_id = ? ORDER BY pto_type",
-        (employee_id,),
-    ).fetchall()
-    usages = cur.execute(
-        "SELECT * FROM pto_usage WHERE employee_id = ? ORDER BY usage_date DESC, id DESC",
-        (employee_id,),
-    ).fetchall()
-    audits = cur.execute(
-        "SELECT * FROM audit_logs WHERE record_id = ? AND entity IN ('employees','compensation','pto_balances','pto_usage') ORDER BY created_at DESC",
-        (employee_id,),
-    ).fetchall()
+    One query answers for the whole population: each employee costs a single
+    seek on ``idx_compensation_employee_effective``.
+    """
+    sql = """
+        SELECT c.*
+        FROM employees e
+        JOIN compensation c ON c.id = (
+            SELECT latest.id FROM compensation latest
+            WHERE latest.employee_id = e.id AND latest.effective_date <= ?
+            ORDER BY latest.effective_date DESC, latest.id DESC
+            LIMIT 1
+        )
+    """
+    params = [str(as_of)]
+    if status:
+        sql += " WHERE e.status = ?"
+        params.append(status)
+    return {row["employee_id"]: row for row in conn.execute(sql, params)}
 
-    comp_rows = "".join(
-        f"<tr><td>{row['effective_date']}</td><td>{row['compensation_type'].title()}</td>"
-        f"<td>{format_currency(row['hourly_rate'])}</td><td>{format_currency(row['salary_amount'])}</td></tr>"
-        for row in comp_history
-    )
-    balance_cards = "".join(
-        f"<div class='card'><strong>{b['pto_type'].title()}</strong><p>Balance: {format_hours(b['balance'])}</p>"
-        f"<p>Accrues {format_hours(b['accrual_rate'])} per pay period</p>"
-        f"<p class='muted'>Last accrual {b['last_accrual_date'] or 'n/a'}</p></div>"
-        for b in balances
-    )
-    usage_rows = "".join(
-        f"<tr><td>{u['usage_date']}</td><td>{u['pto_type'].title()}</td><td>{format_hours(u['hours'])}</td><td>{u['reason'] or '-'}</td></tr>"
-        for u in usages
-    )
-    audit_rows = "".join(
-        f"<tr><td>{a['created_at']}</td><td>{a['entity']}</td><td>{a['action']}</td><td>{a['detail'] or ''}</td></tr>"
-        for a in audits
-    )
-    pay_schedule = employee["pay_frequency"] or "Not set"
 
-    body = f"""
+def format_rate(compensation):
+    if compensation is None:
+        return "No rate in force"
+    if compensation["compensation_type"] == "salary":
+        return f"{format_currency(compensation['salary_amount'])} salary"
+    return f"{format_currency(compensation['hourly_rate'])}/hr"
+
+
+EMPLOYEE_DETAIL = Template(
+    """
     <div class='card'>
-        <h2>{employee['first_name']} {employee['last_name']} <span class='badge {employee['status']}'>{employee['status'].title()}</span></h2>
-        <p class='muted'>Primary work: {employee['primary_work_state'] or 'n/a'} | Withholding: {employee['withholding_state'] or 'n/a'}</p>
-        <p class='muted'>Default pay schedule: {pay_schedule}</p>
+        <h2>{{name}} <span class='badge {{status}}'>{{status_label}}</span></h2>
+        <p class='muted'>Primary work: {{primary_work_state}} | Withholding: {{withholding_state}}</p>
+        <p class='muted'>Default pay schedule: {{pay_schedule}}</p>
         <div class='actions'>
-            <a href='/employees/{employee_id}/edit'>Edit profile</a>
+            <a href='/employees/{{employee_id}}/edit'>Edit profile</a>
             <a href='/employees'>Back to list</a>
         </div>
     </div>
     <div class='two-col'>
         <div class='card'>
             <h3>Compensation</h3>
-            <table><thead><tr><th>Effective</th><th>Type</th><th>Hourly</th><th>Salary</th></tr></thead><tbody>{comp_rows or '<tr><td colspan="4">No compensation yet.</td></tr>'}</tbody></table>
-            <form method='post' action='/employees/{employee_id}/compensation' style='margin-top:12px;'>
+            <table><thead><tr><th>Effective</th><th>Type</th><th>Hourly</th><th>Salary</th></tr></thead><tbody>{{comp_rows}}</tbody></table>
+            <p class='muted'>Showing up to {{comp_limit}} most recent changes.</p>
+            <form method='post' action='/employees/{{employee_id}}/compensation' style='margin-top:12px;'>
                 <div class='two-col'>
                     <div>
                         <label>Type</label>
@@ -508,7 +647,7 @@ def employee_detail(environ, employee_id):
                     </div>
                     <div>
                         <label>Effective date</label>
-                        <input type='date' name='effective_date' value='{datetime.date.today()}'>
+                        <input type='date' name='effective_date' value='{{today}}'>
                     </div>
                 </div>
                 <button type='submit'>Add compensation</button>
@@ -516,8 +655,8 @@ def employee_detail(environ, employee_id):
         </div>
         <div class='card'>
             <h3>PTO balances</h3>
-            <div class='two-col'>{balance_cards}</div>
-            <form method='post' action='/employees/{employee_id}/pto-usage' style='margin-top:12px;'>
+            <div class='two-col'>{{balance_cards}}</div>
+            <form method='post' action='/employees/{{employee_id}}/pto-usage' style='margin-top:12px;'>
                 <div class='two-col'>
                     <div>
                         <label>PTO type</label>
@@ -529,7 +668,7 @@ def employee_detail(environ, employee_id):
                     </div>
                     <div>
                         <label>Usage date</label>
-                        <input type='date' name='usage_date' value='{datetime.date.today()}'>
+                        <input type='date' name='usage_date' value='{{today}}'>
                     </div>
                     <div>
                         <label>Reason</label>
@@ -540,17 +679,161 @@ def employee_detail(environ, employee_id):
             </form>
         </div>
     </div>
-    <div class='card'>
-        <h3>PTO usage history</h3>
-        <table><thead><tr><th>Date</th><th>Type</th><th>Hours</th><th>Reason</th></tr></thead><tbody>{usage_rows or '<tr><td colspan="4">No PTO usage recorded.</td></tr>'}</tbody></table>
-    </div>
-    <div class='card'>
-        <h3>Audit trail</h3>
-        <table><thead><tr><th>Timestamp</th><th>Entity</th><th>Action</th><th>Detail</th></tr></thead><tbody>{audit_rows or '<tr><td colspan="4">No audit events yet.</td></tr>'}</tbody></table>
-    </div>
+    <details class='card' data-fragment='/employees/{{employee_id}}/pto-usage'>
+        <summary><strong>PTO usage history</strong></summary>
+        <div class='fragment'><a href='/employees/{{employee_id}}/pto-usage'>Load PTO usage</a></div>
+    </details>
+    <details class='card' data-fragment='/employees/{{employee_id}}/audit'>
+        <summary><strong>Audit trail</strong></summary>
+        <div class='fragment'><a href='/employees/{{employee_id}}/audit'>Load audit trail</a></div>
+    </details>
+    <script>
+    document.querySelectorAll('details[data-fragment]').forEach((section) => {
+        const target = section.querySelector('.fragment');
+        const load = (url) => fetch(url).then((res) => res.text()).then((html) => { target.innerHTML = html; });
+        section.addEventListener('toggle', () => {
+            if (section.open && !section.dataset.loaded) {
+                section.dataset.loaded = '1';
+                load(section.dataset.fragment);
+            }
+        });
+        target.addEventListener('click', (event) => {
+            const link = event.target.closest('a.page');
+            if (link) {
+                event.preventDefault();
+                load(link.getAttribute('href'));
+            }
+        });
+    });
+    </script>
     """
+)
+COMPENSATION_ROW = Template(
+    "<tr><td>{{effective_date}}</td><td>{{compensation_type}}</td><td>{{hourly_rate}}</td><td>{{salary_amount}}</td></tr>"
+)
+BALANCE_CARD = Template(
+    "<div class='card'><strong>{{pto_type}}</strong><p>Balance: {{balance}}</p>"
+    "<p>Accrues {{accrual_rate}} per pay period</p>"
+    "<p class='muted'>Last accrual {{last_accrual_date}}</p></div>"
+)
+USAGE_ROW = Template("<tr><td>{{usage_date}}</td><td>{{pto_type}}</td><td>{{hours}}</td><td>{{reason}}</td></tr>")
+AUDIT_ROW = Template("<tr><td>{{created_at}}</td><td>{{entity}}</td><td>{{action}}</td><td>{{detail}}</td></tr>")
+
+
+def employee_detail(environ, employee_id):
+    conn = get_db()
+    employee = load_employee(conn, employee_id)
+    if not employee:
+        conn.close()
+        return HTTPStatus.NOT_FOUND, {}, "Employee not found"
+
+    comp_rows = stream_rows(
+        iter_query(
+            conn,
+            "SELECT * FROM compensation WHERE employee_id = ? ORDER BY effective_date DESC, id DESC LIMIT ?",
+            (employee_id, SECTION_PAGE_SIZE),
+        ),
+        lambda row: COMPENSATION_ROW.render(
+            effective_date=row["effective_date"],
+            compensation_type=row["compensation_type"].title(),
+            hourly_rate=format_currency(row["hourly_rate"]),
+            salary_amount=format_currency(row["salary_amount"]),
+        ),
+        Markup('<tr><td colspan="4">No compensation yet.</td></tr>'),
+    )
+    balance_cards = stream_rows(
+        iter_query(conn, "SELECT * FROM pto_balances WHERE employee_id = ? ORDER BY pto_type", (employee_id,)),
+        lambda b: BALANCE_CARD.render(
+            pto_type=b["pto_type"].title(),
+            balance=format_hours(b["balance"]),
+            accrual_rate=format_hours(b["accrual_rate"]),
+            last_accrual_date=b["last_accrual_date"] or "n/a",
+        ),
+        "",
+    )
+    body = EMPLOYEE_DETAIL.stream(
+        name=f"{employee['first_name']} {employee['last_name']}",
+        status=employee["status"],
+        status_label=employee["status"].title(),
+        primary_work_state=employee["primary_work_state"] or "n/a",
+        withholding_state=employee["withholding_state"] or "n/a",
+        pay_schedule=employee["pay_frequency"] or "Not set",
+        employee_id=employee_id,
+        today=datetime.date.today(),
+        comp_rows=comp_rows,
+        comp_limit=SECTION_PAGE_SIZE,
+        balance_cards=balance_cards,
+    )
+    return HTTPStatus.OK, {}, render_layout("Employee", closing_stream(conn, body))
+
+
+HISTORY_FRAGMENT = Template(
+    """<table><thead><tr>{{headers}}</tr></thead><tbody>{{rows}}</tbody></table>
+<p class='muted'>Page {{page}} {{newer}} {{older}}</p>"""
+)
+PAGE_LINK = Template("<a class='page' href='{{href}}?page={{page}}'>{{label}}</a>")
+
+
+def history_fragment(conn, sql, params, page, headers, render_row, empty, href):
+    """Render one page of a history section, fetching a single extra row to detect more."""
+    offset = (page - 1) * SECTION_PAGE_SIZE
+    rows = conn.execute(f"{sql} LIMIT ? OFFSET ?", (*params, SECTION_PAGE_SIZE + 1, offset)).fetchall()
+    has_more = len(rows) > SECTION_PAGE_SIZE
+    return HISTORY_FRAGMENT.render(
+        headers=Markup("".join(f"<th>{html.escape(header)}</th>" for header in headers)),
+        rows=stream_rows(rows[:SECTION_PAGE_SIZE], render_row, empty),
+        page=page,
+        newer=PAGE_LINK.render(href=href, page=page - 1, label="Newer") if page > 1 else "",
+        older=PAGE_LINK.render(href=href, page=page + 1, label="Older") if has_more else "",
+    )
+
+
+def employee_pto_usage(environ, employee_id):
+    conn = get_db()
+    if not load_employee(conn, employee_id):
+        conn.close()
+        return HTTPStatus.NOT_FOUND, {}, "Employee not found"
+    body = history_fragment(
+        conn,
+        "SELECT * FROM pto_usage WHERE employee_id = ? ORDER BY usage_date DESC, id DESC",
+        (employee_id,),
+        get_page(environ),
+        ["Date", "Type", "Hours", "Reason"],
+        lambda u: USAGE_ROW.render(
+            usage_date=u["usage_date"],
+            pto_type=u["pto_type"].title(),
+            hours=format_hours(u["hours"]),
+            reason=u["reason"] or "-",
+        ),
+        Markup('<tr><td colspan="4">No PTO usage recorded.</td></tr>'),
+        f"/employees/{employee_id}/pto-usage",
+    )
     conn.close()
-    return HTTPStatus.OK, {}, render_layout("Employee", body)
+    return HTTPStatus.OK, {}, [body]
+
+
+def employee_audit(environ, employee_id):
+    conn = get_db()
+    if not load_employee(conn, employee_id):
+        conn.close()
+        return HTTPStatus.NOT_FOUND, {}, "Employee not found"
+    body = history_fragment(
+        conn,
+        "SELECT * FROM audit_logs WHERE record_id = ? AND entity IN ('employees','compensation','pto_balances','pto_usage') ORDER BY created_at DESC, id DESC",
+        (employee_id,),
+        get_page(environ),
+        ["Timestamp", "Entity", "Action", "Detail"],
+        lambda a: AUDIT_ROW.render(
+            created_at=a["created_at"],
+            entity=a["entity"],
+            action=a["action"],
+            detail=a["detail"] or "",
+        ),
+        Markup('<tr><td colspan="4">No audit events yet.</td></tr>'),
+        f"/employees/{employee_id}/audit",
+    )
+    conn.close()
+    return HTTPStatus.OK, {}, [body]
 
 
 def update_employee(environ, employee_id):
@@ -584,7 +867,7 @@ def update_employee(environ, employee_id):
         return redirect(f"/employees/{employee_id}")
 
     form_html = employee_form(employee=dict(employee), pay_frequencies=pay_freqs)
-    body = f"<form method='post'>{form_html}<button type='submit'>Update</button></form>"
+    body = EMPLOYEE_FORM_PAGE.stream(form=form_html, submit_label="Update")
     conn.close()
     return HTTPStatus.OK, {}, render_layout("Edit employee", body)
 
@@ -680,54 +963,71 @@ def apply_accrual(conn, employee_id, pay_date):
     conn.commit()
 
 
+PAYRUN_PREVIEW = Template(
+    """
+    <div class='card'>
+        <h2>Pay run preview</h2>
+        <form method='get'>
+            <label>Pay date</label>
+            <input type='date' name='pay_date' value='{{pay_date}}'>
+            <button type='submit'>Refresh</button>
+        </form>
+        <p class='muted'>Accruals are calculated per pay period and can be applied directly from this view.</p>
+    </div>
+    <div class='card'>
+        <table><thead><tr><th>Employee</th><th>Pay schedule</th><th>Rate</th><th>Accrual preview</th><th>Actions</th></tr></thead><tbody>{{rows}}</tbody></table>
+    </div>
+    """
+)
+PAYRUN_PREVIEW_ROW = Template(
+    "<tr><td>{{name}}</td><td>{{pay_frequency}}</td><td>{{rate}}</td><td>{{accruals}}</td>"
+    "<td><form method='post' action='/payrun-preview/apply'>"
+    "<input type='hidden' name='employee_id' value='{{employee_id}}'>"
+    "<input type='hidden' name='pay_date' value='{{pay_date}}'>"
+    "<button type='submit'>Apply accrual</button></form></td></tr>"
+)
+ACCRUAL_PILL = Template("<div class='pill'>{{pto_type}}: +{{accrue_amount}} hrs → {{projected_balance}}</div>")
+
+
 def payrun_preview(environ):
     query = get_query(environ)
     pay_date_str = query.get("pay_date", [str(datetime.date.today())])[0]
     pay_date = parse_date(pay_date_str) or datetime.date.today()
 
     conn = get_db()
-    employees = conn.execute(
+    rates = compensation_as_of(conn, pay_date, status="active")
+    employees = iter_query(
+        conn,
         """
         SELECT e.*, pf.name AS pay_frequency, pf.interval_days
         FROM employees e
         LEFT JOIN pay_frequencies pf ON pf.id = e.pay_frequency_id
         WHERE e.status = 'active'
         ORDER BY e.last_name, e.first_name
-        """
-    ).fetchall()
+        """,
+    )
 
-    rows = []
-    for emp in employees:
-        accruals = accrue_pto_for_employee(conn, emp, pay_date)
-        accrual_list = "".join(
-            f"<div class='pill'>{a['pto_type'].title()}: +{a['accrue_amount']:.2f} hrs → {a['projected_balance']:.2f}</div>"
-            for a in accruals
-        )
-        rows.append(
-            f"<tr><td>{emp['first_name']} {emp['last_name']}</td><td>{emp['pay_frequency'] or '-'}"
-            f"</td><td>{accrual_list or 'No accrual due'}</td>"
-            f"<td><form method='post' action='/payrun-preview/apply'>"
-            f"<input type='hidden' name='employee_id' value='{emp['id']}'>"
-            f"<input type='hidden' name='pay_date' value='{pay_date}'>"
-            f"<button type='submit'>Apply accrual</button></form></td></tr>"
+    def render_row(emp):
+        accruals = [
+            ACCRUAL_PILL.render(
+                pto_type=a["pto_type"].title(),
+                accrue_amount=f"{a['accrue_amount']:.2f}",
+                projected_balance=f"{a['projected_balance']:.2f}",
+            )
+            for a in accrue_pto_for_employee(conn, emp, pay_date)
+        ]
+        return PAYRUN_PREVIEW_ROW.render(
+            name=f"{emp['first_name']} {emp['last_name']}",
+            pay_frequency=emp["pay_frequency"] or "-",
+            rate=format_rate(rates.get(emp["id"])),
+            accruals=accruals or "No accrual due",
+            employee_id=emp["id"],
+            pay_date=pay_date,
         )
 
-    body = f"""
-    <div class='card'>
-        <h2>Pay run preview</h2>
-        <form method='get'>
-            <label>Pay date</label>
-            <input type='date' name='pay_date' value='{pay_date}'>
-            <button type='submit'>Refresh</button>
-        </form>
-        <p class='muted'>Accruals are calculated per pay period and can be applied directly from this view.</p>
-    </div>
-    <div class='card'>
-        <table><thead><tr><th>Employee</th><th>Pay schedule</th><th>Accrual preview</th><th>Actions</th></tr></thead><tbody>{''.join(rows) or '<tr><td colspan="4">No active employees.</td></tr>'}</tbody></table>
-    </div>
-    """
-    conn.close()
-    return HTTPStatus.OK, {}, render_layout("Pay run preview", body)
+    rows = stream_rows(employees, render_row, Markup('<tr><td colspan="5">No active employees.</td></tr>'))
+    body = PAYRUN_PREVIEW.stream(pay_date=pay_date, rows=rows)
+    return HTTPStatus.OK, {}, render_layout("Pay run preview", closing_stream(conn, body))
 
 
 def apply_accrual_view(environ):
@@ -740,41 +1040,110 @@ def apply_accrual_view(environ):
     return redirect(f"/payrun-preview?pay_date={pay_date}")
 
 
-ROUTES = {
-    ("GET", "/"): home,
-    ("GET", "/employees"): list_employees,
-    ("GET", "/employees/new"): new_employee,
-    ("POST", "/employees/new"): new_employee,
-    ("GET", "/payrun-preview"): payrun_preview,
-    ("POST", "/payrun-preview/apply"): apply_accrual_view,
-}
+class Router:
+    """Path-segment trie with typed ``<int:name>`` params and per-method dispatch.
 
+    Routes are compiled once into the trie, so resolving a request costs one
+    dict lookup per path segment no matter how many routes are registered.
+    """
 
-def employee_route(environ):
-    path = get_path(environ)
-    parts = [p for p in path.split("/") if p]
-    if len(parts) >= 2 and parts[0] == "employees":
-        try:
-            emp_id = int(parts[1])
-        except ValueError:
-            return None
-        if len(parts) == 2:
-            if environ["REQUEST_METHOD"] == "GET":
-                return employee_detail(environ, emp_id)
-        elif len(parts) == 3 and parts[2] == "edit":
-            return update_employee(environ, emp_id)
-        elif len(parts) == 3 and parts[2] == "compensation" and environ["REQUEST_METHOD"] == "POST":
-            return add_compensation(environ, emp_id)
-        elif len(parts) == 3 and parts[2] == "pto-usage" and environ["REQUEST_METHOD"] == "POST":
-            return record_pto_usage(environ, emp_id)
-    return None
+    CONVERTERS = {"int": int, "str": str}
+
+    def __init__(self):
+        self._root = _RouteNode()
+
+    def add(self, methods, pattern, handler):
+        node = self._root
+        for segment in _split_path(pattern):
+            if segment.startswith("<") and segment.endswith(">"):
+                converter_name, _, name = segment[1:-1].rpartition(":")
+                converter = self.CONVERTERS[converter_name or "str"]
+                key = (name, converter)
+                if node.param is None:
+                    node.param = key
+                    node.param_child = _RouteNode()
+                elif node.param != key:
+                    raise ValueError(f"Conflicting path parameter {segment} in {pattern}")
+                node = node.param_child
+            else:
+                node = node.children.setdefault(segment, _RouteNode())
+        for method in (methods,) if isinstance(methods, str) else methods:
+            if method in node.handlers:
+                raise ValueError(f"Duplicate route {method} {pattern}")
+            node.handlers[method] = handler
+
+    def resolve(self, method, path):
+        """Return ``(handler, params, allowed_methods)`` for ``path``.
+
+        ``handler`` is ``None`` when nothing matches; ``allowed_methods`` is then
+        non-empty if the path exists under a different method.
+        """
+        node, params = self._match(self._root, _split_path(path), 0, {})
+        if node is None or not node.handlers:
+            return None, {}, ()
+        handler = node.handlers.get(method)
+        if handler is None:
+            return None, {}, tuple(sorted(node.handlers))
+        return handler, params, ()
+
+    def _match(self, node, segments, index, params):
+        if index == len(segments):
+            return node, params
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            found, found_params = self._match(child, segments, index + 1, params)
+            if found is not None and found.handlers:
+                return found, found_params
+        if node.param is not None:
+            name, converter = node.param
+            try:
+                value = converter(segment)
+            except ValueError:
+                return None, params
+            return self._match(node.param_child, segments, index + 1, {**params, name: value})
+        return None, params
+
+
+class _RouteNode:
+    __slots__ = ("children", "param", "param_child", "handlers")
+
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.param_child = None
+        self.handlers = {}
+
+
+def _split_path(path):
+    return [segment for segment in path.split("/") if segment]
+
+
+ROUTER = Router()
+ROUTER.add("GET", "/", home)
+ROUTER.add("GET", "/employees", list_employees)
+ROUTER.add(("GET", "POST"), "/employees/new", new_employee)
+ROUTER.add("GET", "/employees/<int:employee_id>", employee_detail)
+ROUTER.add(("GET", "POST"), "/employees/<int:employee_id>/edit", update_employee)
+ROUTER.add("POST", "/employees/<int:employee_id>/compensation", add_compensation)
+ROUTER.add("POST", "/employees/<int:employee_id>/pto-usage", record_pto_usage)
+ROUTER.add("GET", "/employees/<int:employee_id>/pto-usage", employee_pto_usage)
+ROUTER.add("GET", "/employees/<int:employee_id>/audit", employee_audit)
+ROUTER.add("GET", "/payrun-preview", payrun_preview)
+ROUTER.add("POST", "/payrun-preview/apply", apply_accrual_view)
 
 
 def application(environ, start_response):
     method = environ["REQUEST_METHOD"]
     path = get_path(environ)
-    handler = ROUTES.get((method, path))
-    response = handler(environ) if handler else employee_route(environ)
+    handler, params, allowed = ROUTER.resolve(method, path)
+    if allowed:
+        start_response(
+            f"{HTTPStatus.METHOD_NOT_ALLOWED.value} {HTTPStatus.METHOD_NOT_ALLOWED.phrase}",
+            [("Content-Type", "text/plain"), ("Allow", ", ".join(allowed))],
+        )
+        return [b"Method not allowed"]
+    response = handler(environ, **params) if handler else None
     if not response:
         start_response(f"{HTTPStatus.NOT_FOUND.value} Not Found", [("Content-Type", "text/plain")])
         return [b"Not found"]
@@ -782,7 +1151,9 @@ def application(environ, start_response):
     headers_list = [("Content-Type", "text/html; charset=utf-8")]
     headers_list.extend(list(headers.items()))
     start_response(f"{status.value} {status.phrase}", headers_list)
-    return [body.encode()]
+    if isinstance(body, str):
+        return [body.encode()]
+    return body
 
 
 if __name__ == "__main__":
@@ -1,25 +1,733 @@
 from __future__ import annotations
 
+import atexit
+import gzip
+import hashlib
+import itertools
 import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
 
 AUDIT_LOG = Path("audit_log.jsonl")
+INDEX_SUFFIX = ".idx"
+CHAIN_SUFFIX = ".chain"
+VERIFIED_SUFFIX = ".verified"
+FSYNC_POLICIES = ("never", "batch", "always")
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CHECKPOINT_INTERVAL = 1024
+GENESIS_HEAD = "0" * 64
+# Every chained line ends with this key and a 64-digit SHA-256, so the hash is split
+# off by position and the payload it covers is hashed without re-encoding the JSON.
+_HASH_PREFIX = b', "hash": "'
+_HASH_SUFFIX_LENGTH = len(_HASH_PREFIX) + 64 + len(b'"}')
+# Lines per index block when indexing a log written before the index existed.
+_BACKFILL_BLOCK_LINES = 1024
+# A rotated segment's name between "<stem>." and "<suffix>.gz": its sequence number,
+# assigned under the writers' lock, and its first timestamp. Segments rotated before
+# sequence numbers were used have a timestamp and an optional "-<counter>" only.
+_SEGMENT_NAME = re.compile(r"(?:(\d+)\.)?([0-9A-Za-z]*)(?:-(\d+))?")
+
+# Loggers holding unwritten records. A strong reference, so a logger dropped right
+# after ``log`` (``AuditLogger().log(...)``) still writes its records at exit.
+_pending_loggers: "set[AuditLogger]" = set()
+
+
+@atexit.register
+def _flush_pending_loggers() -> None:
+    for logger in list(_pending_loggers):
+        logger.close()
+
+
+@dataclass
+class IndexBlock:
+    """One group commit: ``length`` bytes at ``offset`` holding ``count`` records.
+
+    In a rotated segment each block is its own gzip member, so it can be read
+    without decompressing the rest of the file.
+    """
+
+    offset: int
+    length: int
+    count: int
+    first: str
+    last: str
+    actions: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def for_records(cls, offset: int, length: int, records: List[Dict[str, Any]]) -> "IndexBlock":
+        actions: Dict[str, int] = {}
+        for record in records:
+            action = str(record.get("action"))
+            actions[action] = actions.get(action, 0) + 1
+        timestamps = [record.get("timestamp", "") for record in records]
+        return cls(offset, length, len(records), min(timestamps), max(timestamps), actions)
+
+    def matches(self, since: str | None, until: str | None, action: str | None) -> int | None:
+        """How many records match, ``0`` if none can, or ``None`` if the records must be read to tell."""
+        if (since is not None and self.last < since) or (until is not None and self.first > until):
+            return 0
+        count = self.count if action is None else self.actions.get(action, 0)
+        if count == 0:
+            return 0
+        inside = (since is None or self.first >= since) and (until is None or self.last <= until)
+        return count if inside else None
+
+
+def _index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name + INDEX_SUFFIX)
+
+
+def _read_index(segment: Path, limit: int | None = None) -> List[IndexBlock]:
+    path = _index_path(segment)
+    if not path.exists():
+        return []
+    blocks: List[IndexBlock] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if limit is not None and len(blocks) >= limit:
+                break
+            try:
+                blocks.append(IndexBlock(**json.loads(line)))
+            except (ValueError, TypeError):
+                break  # a partly written last line
+    return blocks
+
+
+def _write_index(index: IO[str], block: IndexBlock) -> None:
+    index.write(json.dumps(block.__dict__) + "\n")
+
+
+def _record_matches(record: Dict[str, Any], since: str | None, until: str | None, action: str | None) -> bool:
+    timestamp = record.get("timestamp", "")
+    return (
+        (since is None or timestamp >= since)
+        and (until is None or timestamp <= until)
+        and (action is None or str(record.get("action")) == action)
+    )
+
+
+def _parse_lines(data: bytes) -> List[Dict[str, Any]]:
+    records = []
+    for line in data.splitlines():
+        if line.strip():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # a partly written last line
+    return records
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """The chain after the first ``records`` chained records of a segment, ending at byte ``offset``.
+
+    ``head`` is the last record's hash and ``root`` the Merkle root of the record hashes
+    since the previous checkpoint. A segment's first checkpoint (``root`` of ``None``)
+    holds the head it continues from: the previous segment's last hash, or
+    ``GENESIS_HEAD``.
+    """
+
+    offset: int
+    records: int
+    head: str
+    root: str | None = None
+
+
+def _chain_path(segment: Path) -> Path:
+    return segment.with_name(segment.name + CHAIN_SUFFIX)
+
+
+def _read_checkpoints(segment: Path) -> List[Checkpoint]:
+    path = _chain_path(segment)
+    if not path.exists():
+        return []
+    checkpoints: List[Checkpoint] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                checkpoints.append(Checkpoint(**json.loads(line)))
+            except (ValueError, TypeError):
+                break  # a partly written last line
+    return checkpoints
+
+
+def _write_checkpoints(segment: Path, checkpoints: List[Checkpoint]) -> None:
+    with _chain_path(segment).open("a", encoding="utf-8") as handle:
+        handle.write("".join(json.dumps(checkpoint.__dict__) + "\n" for checkpoint in checkpoints))
+
+
+def _chain_hash(head: str, payload: bytes) -> str:
+    return hashlib.sha256(head.encode("ascii") + payload).hexdigest()
+
+
+def _chained_line(head: str, record: Dict[str, Any]) -> Tuple[bytes, str]:
+    """``record`` as a log line ending in its hash, and that hash."""
+    payload = json.dumps(record).encode("utf-8")
+    digest = _chain_hash(head, payload)
+    return payload[:-1] + _HASH_PREFIX + digest.encode("ascii") + b'"}\n', digest
+
+
+def _split_chained(line: bytes) -> Tuple[bytes, str] | None:
+    """The hashed payload and hash of a chained line, or ``None`` for any other line."""
+    line = line.rstrip(b"\r\n")
+    if len(line) <= _HASH_SUFFIX_LENGTH or not line.endswith(b'"}'):
+        return None
+    if line[-_HASH_SUFFIX_LENGTH : -66] != _HASH_PREFIX:
+        return None
+    return line[:-_HASH_SUFFIX_LENGTH] + b"}", line[-66:-2].decode("ascii")
+
+
+def merkle_root(hashes: List[str]) -> str | None:
+    """The SHA-256 Merkle root of hex ``hashes``; an unpaired node is carried up a level."""
+    level = [bytes.fromhex(value) for value in hashes]
+    if not level:
+        return None
+    while len(level) > 1:
+        paired = [hashlib.sha256(level[index] + level[index + 1]).digest() for index in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+@dataclass
+class _ChainState:
+    """Where the active segment's chain stands after the bytes a writer has seen."""
+
+    size: int
+    records: int
+    head: str
+    leaves: List[str]
 
 
 class AuditLogger:
-    def __init__(self, path: Path = AUDIT_LOG):
+    """Append-only JSONL audit log with group commit, rotation and a sidecar index.
+
+    ``log`` buffers records and writes them as one block once ``batch_size`` are
+    pending or, from a timer thread, once the oldest is ``flush_interval`` seconds
+    old; ``flush``, ``close``, ``read`` and interpreter exit write the rest.
+    ``fsync`` is ``"never"`` (leave it to the OS), ``"batch"`` (after every block) or
+    ``"always"`` (write and sync every record).
+
+    Each block's offset, size, time range and action counts are appended to
+    ``<log>.idx``. Once the active file passes ``max_bytes``, or on the first write of
+    a new UTC day with ``rotate_daily``, it is renamed to ``<log stem>.<sequence>.<first
+    timestamp>.jsonl.gz`` with every block compressed as its own gzip member, so
+    ``read`` can skip whole blocks by time and action in rotated and live files alike.
+    Writers sharing a log serialise flushes and rotation through an advisory lock.
+
+    Records are hash-chained: each line ends with ``"hash"``, the SHA-256 of the
+    previous record's hash and the rest of the line, continuing across segments.
+    Every ``checkpoint_interval`` records the chain head and the Merkle root of the
+    hashes since the last checkpoint are appended to ``<segment>.chain``, which
+    ``verify_log`` uses to check segments in parallel and resume from where it last
+    stopped.
+    """
+
+    def __init__(
+        self,
+        path: Path = AUDIT_LOG,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        fsync: str = "batch",
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+        rotate_daily: bool = False,
+        checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(FSYNC_POLICIES)}")
         self.path = path
+        self.batch_size = 1 if fsync == "always" else max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self._pending: List[Dict[str, Any]] = []
+        self._oldest = 0.0
+        self._handle: IO[bytes] | None = None
+        self._chain: _ChainState | None = None
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
 
     def log(self, entry: Dict[str, Any]) -> None:
+        """Queue ``entry`` with a UTC timestamp; a ``"hash"`` key is reserved for the chain."""
+        record = {key: value for key, value in entry.items() if key != "hash"}
+        record["timestamp"] = datetime.utcnow().isoformat()
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(record)
+            if len(self._pending) >= self.batch_size or time.monotonic() - self._oldest >= self.flush_interval:
+                self._flush()
+            elif self._timer is None:
+                _pending_loggers.add(self)
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def __enter__(self) -> "AuditLogger":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    # Writing -----------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with self.path.with_name(self.path.name + ".lock").open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _active_handle(self) -> IO[bytes]:
+        """The open active file, reopened if another writer rotated it away."""
+        if self._handle is not None:
+            try:
+                current = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != os.fstat(self._handle.fileno()).st_ino:
+                self._handle.close()
+                self._handle = None
+        if self._handle is None:
+            self._handle = self.path.open("ab")
+            self._chain = None
+            self._index_unindexed_tail()
+        return self._handle
+
+    def _sync_chain(self, handle: IO[bytes]) -> _ChainState:
+        """The chain at the end of the active file, re-read if another writer has appended since."""
+        size = os.fstat(handle.fileno()).st_size
+        if self._chain is not None and self._chain.size == size:
+            return self._chain
+        checkpoints = _read_checkpoints(self.path)
+        if not checkpoints:
+            # A new segment continues from the last rotated one; lines already in a
+            # file written before chaining stay outside the chain.
+            rotated = self.segments()[:-1] if self.path.exists() else self.segments()
+            previous = _read_checkpoints(rotated[-1]) if rotated else []
+            checkpoints = [Checkpoint(size, 0, previous[-1].head if previous else GENESIS_HEAD)]
+            _write_checkpoints(self.path, checkpoints)
+        last = checkpoints[-1]
+        head, leaves = last.head, []
+        with self.path.open("rb") as source:
+            source.seek(last.offset)
+            for line in source.read(size - last.offset).splitlines():
+                chained = _split_chained(line)
+                if chained is not None:
+                    head = chained[1]
+                    leaves.append(head)
+        self._chain = _ChainState(size, last.records + len(leaves), head, leaves)
+        return self._chain
+
+    def _checkpoint(self, chain: _ChainState, offset: int) -> Checkpoint:
+        checkpoint = Checkpoint(offset, chain.records, chain.head, merkle_root(chain.leaves))
+        chain.leaves = []
+        return checkpoint
+
+    def _index_unindexed_tail(self) -> None:
+        """Index lines written without an index entry (older logs, or a crash between the two writes)."""
+        blocks = _read_index(self.path)
+        start = blocks[-1].offset + blocks[-1].length if blocks else 0
+        size = self.path.stat().st_size
+        if start >= size:
+            return
+        with self.path.open("rb") as handle:
+            handle.seek(start)
+            tail = handle.read(size - start)
+        lines = tail.splitlines(keepends=True)
+        if lines and not lines[-1].endswith(b"\n"):
+            # Drop a partly written last record; new blocks start after it.
+            lines[-1] = lines[-1] + b"\n"
+            os.write(self._handle.fileno(), b"\n")
+        with _index_path(self.path).open("a", encoding="utf-8") as index:
+            for first in range(0, len(lines), _BACKFILL_BLOCK_LINES):
+                chunk = b"".join(lines[first : first + _BACKFILL_BLOCK_LINES])
+                records = _parse_lines(chunk)
+                if records:
+                    _write_index(index, IndexBlock.for_records(start, len(chunk), records))
+                start += len(chunk)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        _pending_loggers.discard(self)
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        record = {**entry, "timestamp": datetime.utcnow().isoformat()}
-        with self.path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(record) + "\n")
-
-    def read(self) -> List[Dict[str, Any]]:
-        if not self.path.exists():
-            return []
-        with self.path.open("r", encoding="utf-8") as handle:
-            return [json.loads(line) for line in handle if line.strip()]
+        with self._file_lock():
+            handle = self._active_handle()
+            if self._should_rotate(handle, records[0]["timestamp"]):
+                self._rotate()
+                handle = self._active_handle()
+            chain = self._sync_chain(handle)
+            offset = chain.size
+            lines: List[bytes] = []
+            checkpoints: List[Checkpoint] = []
+            for record in records:
+                line, chain.head = _chained_line(chain.head, record)
+                lines.append(line)
+                chain.size += len(line)
+                chain.records += 1
+                chain.leaves.append(chain.head)
+                if len(chain.leaves) >= self.checkpoint_interval:
+                    checkpoints.append(self._checkpoint(chain, chain.size))
+            data = b"".join(lines)
+            handle.seek(0, os.SEEK_END)
+            handle.write(data)
+            handle.flush()
+            if self.fsync != "never":
+                os.fsync(handle.fileno())
+            with _index_path(self.path).open("a", encoding="utf-8") as index:
+                _write_index(index, IndexBlock.for_records(offset, len(data), records))
+            if checkpoints:
+                _write_checkpoints(self.path, checkpoints)
+
+    def _should_rotate(self, handle: IO[bytes], timestamp: str) -> bool:
+        size = os.fstat(handle.fileno()).st_size
+        if not size:
+            return False
+        if self.max_bytes is not None and size >= self.max_bytes:
+            return True
+        if self.rotate_daily:
+            first = _read_index(self.path, limit=1)
+            return bool(first) and first[0].first[:10] != timestamp[:10]
+        return False
+
+    def _rotate(self) -> None:
+        """Compress the active file block by block into a new segment and start afresh.
+
+        The segment's chain gets a closing checkpoint, so its last line holds the head
+        the next segment continues from.
+        """
+        chain = self._sync_chain(self._handle)
+        if chain.leaves:
+            _write_checkpoints(self.path, [self._checkpoint(chain, chain.size)])
+        blocks = _read_index(self.path)
+        first = blocks[0].first if blocks else datetime.utcnow().isoformat()
+        stamp = "".join(character for character in first if character.isalnum())
+        # Segments are ordered by sequence, not timestamp: another writer's buffered
+        # records can start a segment with a timestamp older than the one before it.
+        sequence = max((self._segment_order(segment)[1] for segment in self._rotated()), default=0)
+        target = self.path.with_name(f"{self.path.stem}.{sequence + 1:08d}.{stamp}{self.path.suffix}.gz")
+        compressed: List[IndexBlock] = []
+        with self.path.open("rb") as source, target.open("wb") as output:
+            for block in blocks:
+                source.seek(block.offset)
+                member = gzip.compress(source.read(block.length))
+                compressed.append(IndexBlock(output.tell(), len(member), block.count, block.first, block.last, block.actions))
+                output.write(member)
+            output.flush()
+            os.fsync(output.fileno())
+        with _index_path(target).open("w", encoding="utf-8") as index:
+            for block in compressed:
+                _write_index(index, block)
+        os.replace(_chain_path(self.path), _chain_path(target))
+        self._handle.close()
+        self._handle = None
+        self._chain = None
+        self.path.unlink()
+        _index_path(self.path).unlink(missing_ok=True)
+
+    # Reading -----------------------------------------------------------------
+
+    def _segment_order(self, segment: Path) -> Tuple[int, int, str, int]:
+        middle = segment.name[len(self.path.stem) + 1 : -len(self.path.suffix + ".gz")]
+        match = _SEGMENT_NAME.fullmatch(middle)
+        if match is None:
+            return (0, 0, middle, 0)
+        sequence, stamp, counter = match.groups()
+        if sequence is not None:
+            return (1, int(sequence), stamp, 0)
+        return (0, 0, stamp, int(counter or 0))
+
+    def _rotated(self) -> List[Path]:
+        return list(self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}.gz"))
+
+    def segments(self) -> List[Path]:
+        """Rotated segments in the order they were rotated, then the active file."""
+        rotated = sorted(self._rotated(), key=self._segment_order)
+        return rotated + ([self.path] if self.path.exists() else [])
+
+    def _read_block(self, segment: Path, block: IndexBlock) -> List[Dict[str, Any]]:
+        with segment.open("rb") as handle:
+            handle.seek(block.offset)
+            data = handle.read(block.length)
+        if segment.suffix == ".gz":
+            data = gzip.decompress(data)
+        return _parse_lines(data)
+
+    def _blocks(self, segment: Path) -> tuple[List[IndexBlock], List[Dict[str, Any]]]:
+        """The segment's index blocks, plus any records after them that no writer has indexed."""
+        blocks = _read_index(segment)
+        if segment.suffix == ".gz":
+            return blocks, []
+        start = blocks[-1].offset + blocks[-1].length if blocks else 0
+        with segment.open("rb") as handle:
+            handle.seek(start)
+            return blocks, _parse_lines(handle.read())
+
+    def iter_records(
+        self,
+        since: str | None = None,
+        until: str | None = None,
+        action: str | None = None,
+        offset: int = 0,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield records in log order with ``since <= timestamp <= until`` and the given ``action``.
+
+        Timestamps compare as ISO strings, so ``since="2024-10-01"`` means from that
+        day. Blocks the index rules out are never read, and the first ``offset``
+        matches are skipped block by block where the index can count them.
+        """
+        self.flush()
+        skip = offset
+
+        def selected(records: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+            nonlocal skip
+            for record in records:
+                if not _record_matches(record, since, until, action):
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                yield record
+
+        for segment in self.segments():
+            blocks, unindexed = self._blocks(segment)
+            for block in blocks:
+                matching = block.matches(since, until, action)
+                if matching == 0:
+                    continue
+                if matching is not None and matching <= skip:
+                    skip -= matching
+                    continue
+                yield from selected(self._read_block(segment, block))
+            yield from selected(unindexed)
+
+    def read(
+        self,
+        since: str | None = None,
+        until: str | None = None,
+        action: str | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        """A page of ``iter_records``: at most ``limit`` matches after the first ``offset``."""
+        return list(itertools.islice(self.iter_records(since, until, action, offset), limit))
+
+
+# Verification ---------------------------------------------------------------
+
+
+@dataclass
+class SegmentVerification:
+    """What checking one segment's chain found.
+
+    ``start`` is the segment's first checkpoint and ``verified`` the last one confirmed
+    (``None`` for a segment written before chaining); ``head`` is the hash of its last
+    record and ``records`` how many records were re-hashed.
+    """
+
+    segment: str
+    size: int
+    start: Checkpoint | None = None
+    verified: Checkpoint | None = None
+    head: str | None = None
+    records: int = 0
+    error: str | None = None
+
+
+@dataclass
+class AuditVerification:
+    """The outcome of ``verify_log``: ``head`` is the newest hash, worth recording elsewhere."""
+
+    segments: List[SegmentVerification]
+    skipped: int
+    head: str | None
+    errors: List[str]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def records(self) -> int:
+        return sum(result.records for result in self.segments)
+
+
+def _verify_segment(segment: Path, resume: Checkpoint | None = None) -> SegmentVerification:
+    """Re-hash ``segment`` from its first checkpoint, or from ``resume`` if that is still one of them."""
+    result = SegmentVerification(segment.name, segment.stat().st_size)
+    checkpoints = _read_checkpoints(segment)
+    if not checkpoints:
+        return result
+    result.start = checkpoints[0]
+    position = checkpoints.index(resume) if resume in checkpoints else 0
+    start, pending = checkpoints[position], checkpoints[position + 1 :]
+    result.verified, result.head = start, start.head
+    records, offset, leaves = start.records, start.offset, []
+
+    def fail(message: str) -> SegmentVerification:
+        result.error = f"{segment.name}: {message}"
+        return result
+
+    opener = gzip.open if segment.suffix == ".gz" else open
+    with opener(segment, "rb") as source:
+        source.seek(start.offset)
+        for line in source:
+            offset += len(line)
+            chained = _split_chained(line)
+            if chained is None:
+                try:
+                    json.loads(line)
+                except ValueError:
+                    continue  # a blank or partly written line, not a record
+                return fail(f"unchained record at byte {offset - len(line)}")
+            payload, digest = chained
+            if _chain_hash(result.head, payload) != digest:
+                return fail(f"record {records + 1} does not match its hash")
+            result.head = digest
+            result.records += 1
+            records += 1
+            leaves.append(digest)
+            if pending and records == pending[0].records:
+                checkpoint = pending.pop(0)
+                if (checkpoint.offset, checkpoint.head, checkpoint.root) != (offset, digest, merkle_root(leaves)):
+                    return fail(f"checkpoint at record {records} does not match the records before it")
+                result.verified = checkpoint
+                leaves = []
+    if pending:
+        return fail(f"ends at record {records} before the checkpoint at record {pending[0].records}")
+    return result
+
+
+def _verification_path(path: Path) -> Path:
+    return path.with_name(path.name + VERIFIED_SUFFIX)
+
+
+def _load_verified(path: Path) -> Dict[str, SegmentVerification]:
+    try:
+        with _verification_path(path).open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        return {
+            name: SegmentVerification(
+                name,
+                entry["size"],
+                Checkpoint(**entry["start"]),
+                Checkpoint(**entry["verified"]),
+                entry["verified"]["head"],
+            )
+            for name, entry in payload.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def _save_verified(path: Path, results: List[SegmentVerification]) -> None:
+    payload = {
+        result.segment: {"size": result.size, "start": result.start.__dict__, "verified": result.verified.__dict__}
+        for result in results
+        if result.error is None and result.verified is not None
+    }
+    target = _verification_path(path)
+    handle = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=target.parent, prefix=target.name, suffix=".tmp", delete=False
+    )
+    try:
+        with handle:
+            json.dump(payload, handle)
+        os.replace(handle.name, target)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+
+
+def verify_log(path: Path = AUDIT_LOG, processes: int | None = None, full: bool = False) -> AuditVerification:
+    """Check every segment's hash chain and checkpoints, and that each segment continues the one before.
+
+    Segments are independent once their first checkpoint is known, so up to
+    ``processes`` are re-hashed at once. Unless ``full``, progress is kept in
+    ``<log>.verified``: a rotated segment already checked in full is skipped if its
+    size and final checkpoint are unchanged, and the active file is re-hashed from its
+    last verified checkpoint. Segments written before chaining are allowed only
+    ahead of the first chained one.
+    """
+    segments = AuditLogger(path).segments()
+    known = {} if full else _load_verified(path)
+    results: Dict[str, SegmentVerification] = {}
+    work: List[Tuple[Path, Checkpoint | None]] = []
+    for segment in segments:
+        previous = known.get(segment.name)
+        checkpoints = _read_checkpoints(segment)
+        if (
+            previous is not None
+            and segment.suffix == ".gz"
+            and previous.size == segment.stat().st_size
+            and checkpoints[-1:] == [previous.verified]
+            and checkpoints[:1] == [previous.start]
+        ):
+            results[segment.name] = previous
+        else:
+            # Only the active file is resumed; a rotated segment that changed is re-hashed in full.
+            resume = previous.verified if previous is not None and segment.suffix != ".gz" else None
+            work.append((segment, resume))
+    skipped = len(results)
+
+    if processes is not None and processes > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=min(processes, len(work))) as pool:
+            checked = list(pool.map(_verify_segment, *zip(*work)))
+    else:
+        checked = [_verify_segment(segment, resume) for segment, resume in work]
+    results.update((result.segment, result) for result in checked)
+
+    ordered = [results[segment.name] for segment in segments]
+    errors = [result.error for result in ordered if result.error is not None]
+    head: str | None = None
+    for result in ordered:
+        if result.start is None:
+            if head is not None:
+                errors.append(f"{result.segment}: has no hash chain but follows chained segments")
+            continue
+        if head is not None and result.start.head != head:
+            errors.append(f"{result.segment}: does not continue from the previous segment")
+        head = result.head
+    if segments:
+        _save_verified(path, ordered)
+    return AuditVerification(ordered, skipped, head, errors)
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import signal
+import sys
 from datetime import datetime
 from pathlib import Path
 
-from .data import load_store_data
-from .audit import AuditLogger
+from .data import StoreData, load_store_data
+from .audit import AuditLogger, verify_log
+from .cron import parse_cron
 from .pay_stub import export_check_stub_pdf
 from .exporter import export_report
-from .reports import ReportRequest, build_report
-from .scheduler import Schedule, Scheduler
+from .incremental import supports_incremental
+from .reports import REPORT_COLUMNS, ReportRequest, build_report, iter_report
+from .scheduler import Schedule, Scheduler, SchedulerDaemon
+from .ytd import YtdLedger, ledger_path
 
 
 REPORT_CHOICES = [
@@ -28,6 +34,9 @@ REPORT_CHOICES = [
     "check-stub",
 ]
 
+# Reports that read the year-to-date ledger; the others never load it.
+LEDGER_REPORTS = {"check-stub", "w2-w3"}
+
 
 def parse_date(value: str | None):
     if not value:
@@ -35,16 +44,36 @@ def parse_date(value: str | None):
     return datetime.fromisoformat(value).date()
 
 
+def load_ytd(args: argparse.Namespace, store_data: StoreData) -> YtdLedger:
+    if args.no_cache:
+        return YtdLedger.from_payments(store_data.table.rows())
+    ledger = YtdLedger.load(ledger_path(Path(args.store_path)))
+    # An unchanged store needs no check-by-check comparison; any edit to it does.
+    if ledger.store_hash != store_data.rollups.store_hash:
+        ledger.sync_table(store_data.table, store_data.rollups.store_hash)
+        ledger.save()
+    return ledger
+
+
+def load_data(args: argparse.Namespace) -> StoreData:
+    store_data = load_store_data(Path(args.store_path), use_snapshot=not args.no_cache)
+    for reason in store_data.rejected:
+        print(f"Skipped malformed record {reason}", file=sys.stderr)
+    return store_data
+
+
 def run_report(args: argparse.Namespace) -> None:
-    store_path = Path(args.store_path)
-    store_data = load_store_data(store_path)
+    store_data = load_data(args)
+    ytd = load_ytd(args, store_data) if args.report in LEDGER_REPORTS else None
     if args.report == "check-stub":
         if not args.output:
             raise ValueError("Check stubs must be exported to a PDF file.")
         output_path = Path(args.output)
         if output_path.suffix.lower() != ".pdf":
             raise ValueError("Check stubs are only supported as PDF exports.")
-        export_check_stub_pdf(store_data.payments, store_data.employees, output_path)
+        export_check_stub_pdf(
+            store_data.payments, store_data.employees, output_path, ytd, processes=args.processes
+        )
         print(f"Check stubs exported to {output_path}")
     else:
         request = ReportRequest(
@@ -58,38 +87,43 @@ def run_report(args: argparse.Namespace) -> None:
             year=args.year,
             quarter=args.quarter,
         )
-        rows = build_report(request, store_data.payments)
         if args.output:
             output_path = Path(args.output)
-            export_report(rows, output_path, title=args.report)
+            rows = iter_report(request, store_data.table, store_data.rollups, ytd)
+            export_report(rows, output_path, title=args.report, fieldnames=REPORT_COLUMNS.get(args.report))
             print(f"Report exported to {output_path}")
         else:
+            rows = build_report(request, store_data.table, store_data.rollups, ytd)
             print(json.dumps(rows, default=str, indent=2))
 
-    AuditLogger().log(
-        {
-            "action": "manual-run",
-            "report_type": args.report,
-            "filters": {
-                "start_date": args.start_date,
-                "end_date": args.end_date,
-                "pay_schedules": args.pay_schedule,
-                "departments": args.department,
-                "employee_ids": args.employee_id,
-                "group_by": args.group_by,
-                "year": args.year,
-                "quarter": args.quarter,
-            },
-            "output": args.output or "stdout",
-        }
-    )
+    with AuditLogger() as audit:
+        audit.log(
+            {
+                "action": "manual-run",
+                "report_type": args.report,
+                "filters": {
+                    "start_date": args.start_date,
+                    "end_date": args.end_date,
+                    "pay_schedules": args.pay_schedule,
+                    "departments": args.department,
+                    "employee_ids": args.employee_id,
+                    "group_by": args.group_by,
+                    "year": args.year,
+                    "quarter": args.quarter,
+                },
+                "output": args.output or "stdout",
+            }
+        )
 
 
 def add_schedule(args: argparse.Namespace) -> None:
+    if args.cron:
+        parse_cron(args.cron)
     schedule = Schedule(
         schedule_id=args.id,
         report_type=args.report,
-        frequency=args.frequency,
+        frequency=args.frequency or "cron",
+        cron=args.cron,
         output_path=args.output,
         start_date=args.start_date,
         end_date=args.end_date,
@@ -99,15 +133,28 @@ def add_schedule(args: argparse.Namespace) -> None:
         group_by=args.group_by,
         year=args.year,
         quarter=args.quarter,
+        incremental=args.incremental,
     )
+    if schedule.incremental and not supports_incremental(schedule.request()):
+        raise ValueError(
+            "Incremental schedules support payroll-register, tax-deposits, labor-distribution "
+            "and payroll-details grouped by pay_date."
+        )
     Scheduler().add_schedule(schedule)
     print(f"Added schedule {schedule.schedule_id} for {schedule.report_type}")
 
 
+def load_schedule_inputs(args: argparse.Namespace, scheduler: Scheduler):
+    store_data = load_data(args)
+    needs_ledger = any(schedule.report_type in LEDGER_REPORTS for schedule in scheduler.list_schedules())
+    ytd = load_ytd(args, store_data) if needs_ledger else None
+    return store_data.table, store_data.rollups, ytd
+
+
 def run_schedules(args: argparse.Namespace) -> None:
-    store_path = Path(args.store_path)
-    store_data = load_store_data(store_path)
-    outputs = Scheduler().run_due_schedules(store_data.payments)
+    scheduler = Scheduler()
+    table, rollups, ytd = load_schedule_inputs(args, scheduler)
+    outputs = scheduler.run_due_schedules(table, rollups, ytd, processes=args.processes)
     if outputs:
         for path in outputs:
             print(f"Generated scheduled report: {path}")
@@ -115,6 +162,25 @@ def run_schedules(args: argparse.Namespace) -> None:
         print("No schedules due today")
 
 
+def serve_schedules(args: argparse.Namespace) -> None:
+    scheduler = Scheduler()
+    daemon = SchedulerDaemon(
+        scheduler,
+        lambda: load_schedule_inputs(args, scheduler),
+        processes=args.processes,
+        poll_interval=args.poll_interval,
+    )
+    # Stop between runs on SIGTERM as on Ctrl+C, so buffered audit records are written.
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+    print(f"Watching {daemon.scheduler.schedule_path}; press Ctrl+C to stop")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        daemon.stop()
+    finally:
+        scheduler.audit.close()
+
+
 def list_schedules(_: argparse.Namespace) -> None:
     schedules = Scheduler().list_schedules()
     print(json.dumps([schedule.__dict__ for schedule in schedules], indent=2))
@@ -125,11 +191,25 @@ def remove_schedule(args: argparse.Namespace) -> None:
     print(f"Removed schedule {args.id}")
 
 
-def show_audit(_: argparse.Namespace) -> None:
-    records = AuditLogger().read()
+def show_audit(args: argparse.Namespace) -> None:
+    records = AuditLogger().read(
+        since=args.since, until=args.until, action=args.action, offset=args.offset, limit=args.limit
+    )
     print(json.dumps(records, indent=2))
 
 
+def verify_audit(args: argparse.Namespace) -> None:
+    result = verify_log(processes=args.processes, full=args.full)
+    for error in result.errors:
+        print(f"Audit log tampered or damaged: {error}", file=sys.stderr)
+    print(
+        f"Checked {result.records} records in {len(result.segments) - result.skipped} segments "
+        f"({result.skipped} unchanged since last verified); head {result.head or 'none'}"
+    )
+    if not result.ok:
+        sys.exit(1)
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Payroll reporting utility")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -137,6 +217,7 @@ def build_parser() -> argparse.ArgumentParser:
     run_cmd = subparsers.add_parser("run-report", help="Run a single report")
     run_cmd.add_argument("--report", choices=REPORT_CHOICES, required=True)
     run_cmd.add_argument("--store-path", default="data/store.json", help="Path to payroll data store")
+    run_cmd.add_argument("--no-cache", action="store_true", help="Ignore and do not write the store snapshot")
     run_cmd.add_argument("--start-date")
     run_cmd.add_argument("--end-date")
     run_cmd.add_argument("--pay-schedule", action="append")
@@ -145,13 +226,16 @@ def build_parser() -> argparse.ArgumentParser:
     run_cmd.add_argument("--group-by", choices=["pay_date", "employee", "none"])
     run_cmd.add_argument("--year", type=int)
     run_cmd.add_argument("--quarter", type=int, choices=[1, 2, 3, 4])
-    run_cmd.add_argument("--output", help="Output file (csv or pdf)")
+    run_cmd.add_argument("--output", help="Output file (csv, csv.gz, pcol or pdf)")
+    run_cmd.add_argument("--processes", type=int, help="Worker processes for check-stub rendering")
     run_cmd.set_defaults(func=run_report)
 
     schedule_cmd = subparsers.add_parser("schedule-add", help="Add a scheduled report")
     schedule_cmd.add_argument("--id", required=True, help="Unique schedule id")
     schedule_cmd.add_argument("--report", choices=REPORT_CHOICES, required=True)
-    schedule_cmd.add_argument("--frequency", choices=["daily", "weekly"], required=True)
+    when = schedule_cmd.add_mutually_exclusive_group(required=True)
+    when.add_argument("--frequency", choices=["daily", "weekly"])
+    when.add_argument("--cron", help='Cron or calendar expression, e.g. "30 6 * * 1-5" or "quarter end + 5 days"')
     schedule_cmd.add_argument("--start-date")
     schedule_cmd.add_argument("--end-date")
     schedule_cmd.add_argument("--pay-schedule", action="append")
@@ -160,13 +244,31 @@ def build_parser() -> argparse.ArgumentParser:
     schedule_cmd.add_argument("--group-by", choices=["pay_date", "employee", "none"])
     schedule_cmd.add_argument("--year", type=int)
     schedule_cmd.add_argument("--quarter", type=int, choices=[1, 2, 3, 4])
-    schedule_cmd.add_argument("--output", required=True, help="Output file (csv or pdf)")
+    schedule_cmd.add_argument("--output", required=True, help="Output file (csv, csv.gz, pcol or pdf)")
+    schedule_cmd.add_argument(
+        "--incremental", action="store_true", help="Fold in only payments since the previous run"
+    )
     schedule_cmd.set_defaults(func=add_schedule)
 
     schedule_run_cmd = subparsers.add_parser("schedule-run", help="Run any due schedules")
     schedule_run_cmd.add_argument("--store-path", default="data/store.json", help="Path to payroll data store")
+    schedule_run_cmd.add_argument("--no-cache", action="store_true", help="Ignore and do not write the store snapshot")
+    schedule_run_cmd.add_argument(
+        "--processes", type=int, default=os.cpu_count(), help="Worker processes for due schedules (default: CPU count)"
+    )
     schedule_run_cmd.set_defaults(func=run_schedules)
 
+    schedule_daemon_cmd = subparsers.add_parser("schedule-daemon", help="Run schedules as they fall due")
+    schedule_daemon_cmd.add_argument("--store-path", default="data/store.json", help="Path to payroll data store")
+    schedule_daemon_cmd.add_argument("--no-cache", action="store_true", help="Ignore and do not write the store snapshot")
+    schedule_daemon_cmd.add_argument(
+        "--processes", type=int, default=os.cpu_count(), help="Most reports built at once (default: CPU count)"
+    )
+    schedule_daemon_cmd.add_argument(
+        "--poll-interval", type=float, default=30.0, help="Seconds between checks of the schedule file"
+    )
+    schedule_daemon_cmd.set_defaults(func=serve_schedules)
+
     schedule_list_cmd = subparsers.add_parser("schedule-list", help="List schedules")
     schedule_list_cmd.set_defaults(func=list_schedules)
 
@@ -175,8 +277,20 @@ def build_parser() -> argparse.ArgumentParser:
     schedule_remove_cmd.set_defaults(func=remove_schedule)
 
     audit_cmd = subparsers.add_parser("audit", help="Show audit log")
+    audit_cmd.add_argument("--since", help="Earliest timestamp (ISO, UTC), e.g. 2024-10-01")
+    audit_cmd.add_argument("--until", help="Latest timestamp (ISO, UTC)")
+    audit_cmd.add_argument("--action", help="Only entries with this action, e.g. scheduled-run")
+    audit_cmd.add_argument("--offset", type=int, default=0, help="Matching entries to skip")
+    audit_cmd.add_argument("--limit", type=int, default=100, help="Most entries to show (default: 100)")
     audit_cmd.set_defaults(func=show_audit)
 
+    audit_verify_cmd = subparsers.add_parser("audit-verify", help="Check the audit log's hash chain")
+    audit_verify_cmd.add_argument("--full", action="store_true", help="Re-hash every segment, not just new records")
+    audit_verify_cmd.add_argument(
+        "--processes", type=int, default=os.cpu_count(), help="Segments checked at once (default: CPU count)"
+    )
+    audit_verify_cmd.set_defaults(func=verify_audit)
+
     return parser
 
 
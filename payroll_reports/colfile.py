@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+ReportRow = Dict[str, Any]
+
+MAGIC = b"PAYCOL1\n"
+COLFILE_VERSION = 1
+ROW_GROUP_ROWS = 65536
+_FOOTER_SIZE = struct.Struct("<Q")
+
+# Logical column types and the array typecode of their plain encoding.
+PLAIN_TYPECODES = {"float64": "d", "int64": "q", "date": "i", "cents32": "i", "cents64": "q"}
+_INT32_MAX = 2**31 - 1
+
+
+def _column_type(values: Sequence[Any]) -> str:
+    """The narrowest logical type holding every value of one row group's column."""
+    classes = {value.__class__ for value in values}
+    if classes == {float}:
+        return "float64"
+    if classes == {int}:
+        return "int64"
+    if classes == {date}:
+        return "date"
+    if classes <= {str, type(None)}:
+        return "string"
+    # Mixed ints and floats included, so each value comes back as the type it was written.
+    return "json"
+
+
+def _codes_typecode(size: int) -> str:
+    if size <= 0xFF:
+        return "B"
+    if size <= 0xFFFF:
+        return "H"
+    return "I"
+
+
+def _encode_dictionary(values: Sequence[Any]) -> tuple[bytes, bytes, str]:
+    codes: Dict[Any, int] = {}
+    indices = [codes.setdefault(value, len(codes)) for value in values]
+    typecode = _codes_typecode(len(codes))
+    dictionary = json.dumps(list(codes), separators=(",", ":")).encode("utf-8")
+    return dictionary, array(typecode, indices).tobytes(), typecode
+
+
+def _json_text(value: Any) -> str:
+    # Keys stay in insertion order: rows read back must match the rows written.
+    return json.dumps(value, default=_json_default, separators=(",", ":"))
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _cents(values: Sequence[float]) -> tuple[str, List[int]] | None:
+    """Money columns as whole cents, when every value round-trips exactly.
+
+    A column holding NaN or an infinity stays a plain float64 column.
+    """
+    if not all(map(math.isfinite, values)):
+        return None
+    cents = [round(value * 100) for value in values]
+    if any(cent / 100 != value for cent, value in zip(cents, values)):
+        return None
+    return ("cents32" if max(map(abs, cents), default=0) <= _INT32_MAX else "cents64"), cents
+
+
+def _encode_column(values: List[Any]) -> tuple[Dict[str, Any], bytes]:
+    kind = _column_type(values)
+    plain: Sequence[Any] = values
+    if kind == "float64":
+        cents = _cents(values)
+        if cents is not None:
+            kind, plain = cents
+    elif kind == "date":
+        plain = [value.toordinal() for value in values]
+    if kind in PLAIN_TYPECODES:
+        try:
+            data = array(PLAIN_TYPECODES[kind], plain).tobytes()
+        except OverflowError:
+            kind = "json"
+        else:
+            return {"type": kind, "length": len(data)}, data
+    if kind == "json":
+        values = [_json_text(value) for value in values]
+    dictionary, codes, typecode = _encode_dictionary(values)
+    meta = {"type": kind, "length": len(dictionary) + len(codes), "dictionary": len(dictionary), "codes": typecode}
+    return meta, dictionary + codes
+
+
+def write_colfile(
+    rows: Iterable[ReportRow],
+    output_path: Path,
+    fieldnames: List[str] | None = None,
+    row_group_rows: int = ROW_GROUP_ROWS,
+) -> Path:
+    """Write ``rows`` as a columnar file, ``row_group_rows`` rows per row group.
+
+    Each row group stores one typed array per column: floats (as whole cents when
+    exact), ints and dates as plain arrays, strings and nested values dictionary-encoded. The JSON footer holds the
+    schema, every column chunk's offset and the min/max of each date column per group.
+    As with ``export_csv``, a schema lets rows stream; without one they are read first.
+    """
+    if fieldnames is None:
+        rows = list(rows)
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+    field_set = set(fieldnames)
+    iterator = iter(rows)
+    groups: List[Dict[str, Any]] = []
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("wb") as handle:
+        handle.write(MAGIC)
+        position = len(MAGIC)
+        while True:
+            batch = list(itertools.islice(iterator, row_group_rows))
+            if not batch:
+                break
+            for row in batch:
+                if not row.keys() <= field_set:
+                    extra = ", ".join(sorted(row.keys() - field_set))
+                    raise ValueError(f"Row has columns outside the export schema: {extra}")
+            columns: Dict[str, Any] = {}
+            stats: Dict[str, List[int]] = {}
+            for name in fieldnames:
+                values = [row.get(name) for row in batch]
+                meta, data = _encode_column(values)
+                meta["offset"] = position
+                handle.write(data)
+                position += len(data)
+                columns[name] = meta
+                if meta["type"] == "date":
+                    stats[name] = [min(values).toordinal(), max(values).toordinal()]
+            groups.append({"rows": len(batch), "columns": columns, "date_range": stats})
+        footer = json.dumps(
+            {
+                "version": COLFILE_VERSION,
+                "byteorder": sys.byteorder,
+                "fieldnames": fieldnames,
+                "row_groups": groups,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        handle.write(footer)
+        handle.write(_FOOTER_SIZE.pack(len(footer)))
+        handle.write(MAGIC)
+    return output_path
+
+
+class ColfileReader:
+    """Memory-mapped reader for files written by ``write_colfile``.
+
+    ``read`` and ``rows`` decode only the requested columns, and with ``start_date`` /
+    ``end_date`` skip every row group whose ``date_column`` range falls outside them.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._handle = path.open("rb")
+        try:
+            self._map = mmap.mmap(self._handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._handle.close()
+            raise ValueError(f"{path} is not a columnar export.") from None
+        tail = len(MAGIC) + _FOOTER_SIZE.size
+        if self._map[: len(MAGIC)] != MAGIC or self._map[-len(MAGIC) :] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar export.")
+        (footer_size,) = _FOOTER_SIZE.unpack_from(self._map, len(self._map) - tail)
+        footer = json.loads(self._map[len(self._map) - tail - footer_size : len(self._map) - tail])
+        if footer.get("version") != COLFILE_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported columnar export version: {footer.get('version')}")
+        self._swap = footer["byteorder"] != sys.byteorder
+        self.fieldnames: List[str] = footer["fieldnames"]
+        self.row_groups: List[Dict[str, Any]] = footer["row_groups"]
+
+    def __enter__(self) -> "ColfileReader":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._map.close()
+        self._handle.close()
+
+    def __len__(self) -> int:
+        return sum(group["rows"] for group in self.row_groups)
+
+    def _array(self, typecode: str, offset: int, length: int) -> array:
+        values = array(typecode)
+        values.frombytes(self._map[offset : offset + length])
+        if self._swap:
+            values.byteswap()
+        return values
+
+    def _decode(self, meta: Dict[str, Any]) -> List[Any]:
+        kind, offset, length = meta["type"], meta["offset"], meta["length"]
+        if kind in PLAIN_TYPECODES:
+            values = self._array(PLAIN_TYPECODES[kind], offset, length)
+            if kind == "date":
+                return [date.fromordinal(ordinal) for ordinal in values]
+            if kind in ("cents32", "cents64"):
+                return [cent / 100 for cent in values]
+            return values.tolist()
+        split = offset + meta["dictionary"]
+        dictionary = json.loads(self._map[offset:split])
+        if kind == "json":
+            return [json.loads(dictionary[code]) for code in self._array(meta["codes"], split, offset + length - split)]
+        return [dictionary[code] for code in self._array(meta["codes"], split, offset + length - split)]
+
+    def _groups(
+        self, date_column: str, start_date: date | None, end_date: date | None
+    ) -> Iterator[Dict[str, Any]]:
+        low = start_date.toordinal() if start_date else None
+        high = end_date.toordinal() if end_date else None
+        for group in self.row_groups:
+            if low is not None or high is not None:
+                bounds = group["date_range"].get(date_column)
+                if bounds is None:
+                    raise ValueError(f"Column {date_column!r} does not hold dates in every row group.")
+                if (low is not None and bounds[1] < low) or (high is not None and bounds[0] > high):
+                    continue
+            yield group
+
+    def _group_columns(
+        self,
+        group: Dict[str, Any],
+        columns: Sequence[str],
+        date_column: str,
+        start_date: date | None,
+        end_date: date | None,
+    ) -> Dict[str, List[Any]]:
+        decoded = {name: self._decode(group["columns"][name]) for name in columns}
+        if start_date is None and end_date is None:
+            return decoded
+        dates = decoded[date_column] if date_column in decoded else self._decode(group["columns"][date_column])
+        keep = [
+            index
+            for index, value in enumerate(dates)
+            if (start_date is None or value >= start_date) and (end_date is None or value <= end_date)
+        ]
+        if len(keep) == len(dates):
+            return decoded
+        return {name: [values[index] for index in keep] for name, values in decoded.items()}
+
+    def _columns(self, columns: Sequence[str] | None) -> List[str]:
+        if columns is None:
+            return list(self.fieldnames)
+        unknown = [name for name in columns if name not in self.fieldnames]
+        if unknown:
+            raise KeyError(f"Unknown columns: {', '.join(unknown)}")
+        return list(columns)
+
+    def read(
+        self,
+        columns: Sequence[str] | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        date_column: str = "pay_date",
+    ) -> Dict[str, List[Any]]:
+        """Column name -> values for ``columns`` (all by default), pay dates within the range."""
+        names = self._columns(columns)
+        result: Dict[str, List[Any]] = {name: [] for name in names}
+        for group in self._groups(date_column, start_date, end_date):
+            for name, values in self._group_columns(group, names, date_column, start_date, end_date).items():
+                result[name].extend(values)
+        return result
+
+    def rows(
+        self,
+        columns: Sequence[str] | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        date_column: str = "pay_date",
+    ) -> Iterator[ReportRow]:
+        """Yield rows as dicts, one row group decoded at a time."""
+        names = self._columns(columns)
+        for group in self._groups(date_column, start_date, end_date):
+            decoded = self._group_columns(group, names, date_column, start_date, end_date)
+            for values in zip(*(decoded[name] for name in names)):
+                yield dict(zip(names, values))
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence
+
+
+PaymentRecord = Dict[str, Any]
+
+EMPLOYEE_TAX_KEYS = ("fit", "ss", "medicare")
+EMPLOYER_TAX_KEYS = ("fit", "ss", "medicare", "futa", "suta")
+TAXABLE_WAGE_KEYS = ("fit", "ss", "medicare", "futa", "suta")
+TAX_MAP_FIELDS = {
+    "employee_taxes": EMPLOYEE_TAX_KEYS,
+    "employer_taxes": EMPLOYER_TAX_KEYS,
+    "taxable_wages": TAXABLE_WAGE_KEYS,
+}
+
+
+def _floats(values: Iterable[float] = ()) -> array:
+    return array("d", values)
+
+
+def _ints(values: Iterable[int] = ()) -> array:
+    return array("q", values)
+
+
+@dataclass(frozen=True)
+class LineItems:
+    """Exploded per-payment line items (earnings, deductions, contributions)."""
+
+    payment_index: array
+    type: List[str]
+    hours: array
+    amount: array
+
+    @classmethod
+    def empty(cls) -> "LineItems":
+        return cls(payment_index=_ints(), type=[], hours=_floats(), amount=_floats())
+
+    def __len__(self) -> int:
+        return len(self.payment_index)
+
+    def append(self, payment_index: int, item: Dict[str, Any]) -> None:
+        self.payment_index.append(payment_index)
+        self.type.append(item["type"])
+        self.hours.append(float(item.get("hours", 0.0)))
+        self.amount.append(float(item.get("amount", 0.0)))
+
+    def take(self, remap: Dict[int, int]) -> "LineItems":
+        taken = LineItems.empty()
+        for position, payment_index in enumerate(self.payment_index):
+            new_index = remap.get(payment_index)
+            if new_index is None:
+                continue
+            taken.payment_index.append(new_index)
+            taken.type.append(self.type[position])
+            taken.hours.append(self.hours[position])
+            taken.amount.append(self.amount[position])
+        return taken
+
+    def by_payment(self, count: int) -> List[List[int]]:
+        positions: List[List[int]] = [[] for _ in range(count)]
+        for position, payment_index in enumerate(self.payment_index):
+            positions[payment_index].append(position)
+        return positions
+
+
+@dataclass(frozen=True)
+class PaymentTable:
+    """Payments stored column-wise: one typed array (or list of strings) per field.
+
+    ``pay_date`` holds proleptic Gregorian ordinals; tax maps have a fixed key set
+    so each key gets its own dense column. Earnings, deductions and contributions
+    are exploded into ``LineItems`` tables keyed by payment position.
+    """
+
+    check_id: List[str]
+    employee_id: List[str]
+    employee_name: List[str]
+    pay_date: array
+    gross_pay: array
+    net_pay: array
+    taxes: array
+    deductions: array
+    hours: array
+    department: List[str]
+    project: List[str]
+    pay_schedule: List[str]
+    state: List[str]
+    employee_taxes: Dict[str, array]
+    employer_taxes: Dict[str, array]
+    taxable_wages: Dict[str, array]
+    earnings: LineItems
+    deductions_detail: LineItems
+    contributions_detail: LineItems
+
+    @classmethod
+    def empty(cls) -> "PaymentTable":
+        return cls(
+            check_id=[],
+            employee_id=[],
+            employee_name=[],
+            pay_date=_ints(),
+            gross_pay=_floats(),
+            net_pay=_floats(),
+            taxes=_floats(),
+            deductions=_floats(),
+            hours=_floats(),
+            department=[],
+            project=[],
+            pay_schedule=[],
+            state=[],
+            employee_taxes={key: _floats() for key in EMPLOYEE_TAX_KEYS},
+            employer_taxes={key: _floats() for key in EMPLOYER_TAX_KEYS},
+            taxable_wages={key: _floats() for key in TAXABLE_WAGE_KEYS},
+            earnings=LineItems.empty(),
+            deductions_detail=LineItems.empty(),
+            contributions_detail=LineItems.empty(),
+        )
+
+    @classmethod
+    def from_payments(cls, payments: Iterable[PaymentRecord]) -> "PaymentTable":
+        table = cls.empty()
+        for payment in payments:
+            table.append(payment)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.employee_id)
+
+    def append(self, payment: PaymentRecord) -> None:
+        index = len(self.employee_id)
+        self.check_id.append(payment.get("check_id", ""))
+        self.employee_id.append(payment["employee_id"])
+        self.employee_name.append(payment.get("employee_name", payment["employee_id"]))
+        self.pay_date.append(payment["pay_date"].toordinal())
+        self.gross_pay.append(float(payment["gross_pay"]))
+        self.net_pay.append(float(payment["net_pay"]))
+        self.taxes.append(float(payment["taxes"]))
+        self.deductions.append(float(payment["deductions"]))
+        self.hours.append(float(payment.get("hours") or 0.0))
+        self.department.append(payment.get("department", ""))
+        self.project.append(payment.get("project", ""))
+        self.pay_schedule.append(payment.get("pay_schedule", ""))
+        self.state.append(payment.get("state", ""))
+        for field_name, keys in TAX_MAP_FIELDS.items():
+            values = payment.get(field_name, {})
+            columns = getattr(self, field_name)
+            for key in keys:
+                columns[key].append(float(values.get(key, 0.0)))
+        for item in payment.get("earnings", []):
+            self.earnings.append(index, item)
+        for item in payment.get("deductions_detail", []):
+            self.deductions_detail.append(index, item)
+        for item in payment.get("contributions_detail", []):
+            self.contributions_detail.append(index, item)
+
+    def pay_dates(self) -> List[date]:
+        return [date.fromordinal(ordinal) for ordinal in self.pay_date]
+
+    def select(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        pay_schedules: Optional[List[str]] = None,
+        departments: Optional[List[str]] = None,
+        employee_ids: Optional[List[str]] = None,
+    ) -> array:
+        """Return the positions matching the same criteria as ``filter_payments``."""
+        start = start_date.toordinal() if start_date else None
+        end = end_date.toordinal() if end_date else None
+        schedules = set(pay_schedules) if pay_schedules else None
+        department_set = set(departments) if departments else None
+        employee_set = set(employee_ids) if employee_ids else None
+        selected = _ints()
+        for index, ordinal in enumerate(self.pay_date):
+            if start is not None and ordinal < start:
+                continue
+            if end is not None and ordinal > end:
+                continue
+            if schedules is not None and self.pay_schedule[index] not in schedules:
+                continue
+            if department_set is not None and self.department[index] not in department_set:
+                continue
+            if employee_set is not None and self.employee_id[index] not in employee_set:
+                continue
+            selected.append(index)
+        return selected
+
+    def take(self, indices: Sequence[int]) -> "PaymentTable":
+        if len(indices) == len(self) and all(index == position for position, index in enumerate(indices)):
+            return self
+        remap = {old: new for new, old in enumerate(indices)}
+        return PaymentTable(
+            check_id=[self.check_id[i] for i in indices],
+            employee_id=[self.employee_id[i] for i in indices],
+            employee_name=[self.employee_name[i] for i in indices],
+            pay_date=_ints(self.pay_date[i] for i in indices),
+            gross_pay=_floats(self.gross_pay[i] for i in indices),
+            net_pay=_floats(self.net_pay[i] for i in indices),
+            taxes=_floats(self.taxes[i] for i in indices),
+            deductions=_floats(self.deductions[i] for i in indices),
+            hours=_floats(self.hours[i] for i in indices),
+            department=[self.department[i] for i in indices],
+            project=[self.project[i] for i in indices],
+            pay_schedule=[self.pay_schedule[i] for i in indices],
+            state=[self.state[i] for i in indices],
+            employee_taxes={key: _floats(col[i] for i in indices) for key, col in self.employee_taxes.items()},
+            employer_taxes={key: _floats(col[i] for i in indices) for key, col in self.employer_taxes.items()},
+            taxable_wages={key: _floats(col[i] for i in indices) for key, col in self.taxable_wages.items()},
+            earnings=self.earnings.take(remap),
+            deductions_detail=self.deductions_detail.take(remap),
+            contributions_detail=self.contributions_detail.take(remap),
+        )
+
+    def rows(self) -> Iterator[PaymentRecord]:
+        """Yield payment dicts in the shape produced by ``build_payments``."""
+        count = len(self)
+        earnings = self.earnings.by_payment(count)
+        deductions = self.deductions_detail.by_payment(count)
+        contributions = self.contributions_detail.by_payment(count)
+        for index in range(count):
+            yield {
+                "check_id": self.check_id[index],
+                "employee_id": self.employee_id[index],
+                "employee_name": self.employee_name[index],
+                "pay_date": date.fromordinal(self.pay_date[index]),
+                "gross_pay": self.gross_pay[index],
+                "net_pay": self.net_pay[index],
+                "taxes": self.taxes[index],
+                "deductions": self.deductions[index],
+                "hours": self.hours[index],
+                "department": self.department[index],
+                "project": self.project[index],
+                "pay_schedule": self.pay_schedule[index],
+                "state": self.state[index],
+                "earnings": [
+                    {"type": self.earnings.type[p], "hours": self.earnings.hours[p], "amount": self.earnings.amount[p]}
+                    for p in earnings[index]
+                ],
+                "deductions_detail": [
+                    {"type": self.deductions_detail.type[p], "amount": self.deductions_detail.amount[p]}
+                    for p in deductions[index]
+                ],
+                "contributions_detail": [
+                    {"type": self.contributions_detail.type[p], "amount": self.contributions_detail.amount[p]}
+                    for p in contributions[index]
+                ],
+                "employee_taxes": {key: col[index] for key, col in self.employee_taxes.items()},
+                "employer_taxes": {key: col[index] for key, col in self.employer_taxes.items()},
+                "taxable_wages": {key: col[index] for key, col in self.taxable_wages.items()},
+                "allocations": [],
+            }
+
+
+def group_sums(
+    keys: Sequence[Hashable], columns: Dict[str, Sequence[float]], indices: Optional[Iterable[int]] = None
+) -> Dict[Hashable, Dict[str, float]]:
+    """Sum several value columns per key in one pass, preserving first-seen key order."""
+    names = list(columns)
+    value_columns = [columns[name] for name in names]
+    totals: Dict[Hashable, List[float]] = {}
+    for index in range(len(keys)) if indices is None else indices:
+        key = keys[index]
+        bucket = totals.get(key)
+        if bucket is None:
+            bucket = totals[key] = [0.0] * len(names)
+        for position, column in enumerate(value_columns):
+            bucket[position] += column[index]
+    return {key: dict(zip(names, bucket)) for key, bucket in totals.items()}
+
+
+def group_sum(
+    keys: Sequence[Hashable], values: Sequence[float], indices: Optional[Iterable[int]] = None
+) -> Dict[Hashable, float]:
+    totals: Dict[Hashable, float] = {}
+    for index in range(len(keys)) if indices is None else indices:
+        key = keys[index]
+        totals[key] = totals.get(key, 0.0) + values[index]
+    return totals
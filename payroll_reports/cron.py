@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import re
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Iterator
+
+# Standard five-field expressions: minute, hour, day of month, month, day of week (0 or 7 = Sunday).
+_FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+# How far ``next_after`` looks for a matching minute before deciding there is none (e.g. "0 0 31 2 *").
+_SEARCH_DAYS = 366 * 8
+_NEVER_MATCHES_PROBE = datetime(2000, 1, 1)
+
+_CALENDAR = re.compile(
+    r"(?:every\s+)?"
+    r"(?:(?P<period>month|quarter|year)\s+end"
+    r"|payday\s+(?P<cadence>weekly|biweekly|semimonthly|monthly)(?:\s+from\s+(?P<anchor>\d{4}-\d{2}-\d{2}))?)"
+    r"(?:\s*(?P<sign>[+-])\s*(?P<days>\d+)\s+days?)?"
+    r"(?:\s+at\s+(?P<hour>\d{1,2}):(?P<minute>\d{2}))?"
+)
+_PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+_CADENCE_DAYS = {"weekly": 7, "biweekly": 14}
+
+
+@dataclass(frozen=True)
+class FieldCron:
+    """A five-field cron expression; as in cron, a restricted day of month and day of week match either."""
+
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]
+    any_day: bool
+    any_weekday: bool
+
+    def _day_matches(self, day: date) -> bool:
+        if day.month not in self.months:
+            return False
+        by_day = day.day in self.days
+        by_weekday = day.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return by_day and by_weekday
+        return by_day or by_weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """The first matching minute strictly after ``moment``."""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(_SEARCH_DAYS):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = datetime.combine(day, time(hour, minute))
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError("Cron expression never matches.")
+
+
+@dataclass(frozen=True)
+class CalendarCron:
+    """A payroll calendar date (period end or payday), shifted by ``offset_days``, at a time of day."""
+
+    period_months: int | None
+    cadence: str | None
+    anchor: date | None
+    offset_days: int
+    at: time
+
+    def _month_dates(self, first: date) -> Iterator[date]:
+        """Period ends or monthly paydays from the month (or period) containing ``first``, in order."""
+        step = self.period_months or 1
+        index = (first.year * 12 + first.month - 1) // step * step + step - 1
+        while True:
+            year, month = divmod(index, 12)
+            last = monthrange(year, month + 1)[1]
+            if self.cadence == "semimonthly":
+                yield date(year, month + 1, 15)
+            yield date(year, month + 1, last)
+            index += step
+
+    def _cadence_dates(self, first: date) -> Iterator[date]:
+        step = _CADENCE_DAYS[self.cadence]
+        assert self.anchor is not None
+        current = self.anchor + timedelta(days=max(0, (first - self.anchor).days // step - 1) * step)
+        while True:
+            yield current
+            current += timedelta(days=step)
+
+    def next_after(self, moment: datetime) -> datetime:
+        first = moment.date() - timedelta(days=self.offset_days)
+        dates = self._cadence_dates(first) if self.cadence in _CADENCE_DAYS else self._month_dates(first)
+        for day in dates:
+            candidate = datetime.combine(day + timedelta(days=self.offset_days), self.at)
+            if candidate > moment:
+                return candidate
+        raise AssertionError("unreachable")
+
+
+def _parse_field(text: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if spec == "*":
+            first, last = low, high
+        elif "-" in spec:
+            first_text, last_text = spec.split("-", 1)
+            first, last = int(first_text), int(last_text)
+        else:
+            first = int(spec)
+            last = high if step_text else first
+        if step < 1 or not low <= first <= last <= high:
+            raise ValueError(f"{part!r} is outside {low}-{high}")
+        values.update(range(first, last + 1, step))
+    return frozenset(values)
+
+
+def _parse_fields(text: str) -> FieldCron:
+    parts = text.split()
+    if len(parts) != 5:
+        raise ValueError("expected five fields: minute hour day month weekday")
+    minutes, hours, days, months, weekdays = (
+        _parse_field(part, low, high) for part, (low, high) in zip(parts, _FIELD_RANGES)
+    )
+    weekdays = frozenset(weekday % 7 for weekday in weekdays)
+    return FieldCron(minutes, hours, days, months, weekdays, any_day=parts[2] == "*", any_weekday=parts[4] == "*")
+
+
+def _parse_calendar(match: re.Match) -> CalendarCron:
+    cadence = match["cadence"]
+    if cadence in _CADENCE_DAYS and not match["anchor"]:
+        raise ValueError(f"{cadence} paydays need a first payday: 'payday {cadence} from YYYY-MM-DD'")
+    days = int(match["days"] or 0)
+    hour, minute = int(match["hour"] or 0), int(match["minute"] or 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"{match['hour']}:{match['minute']} is not a time of day")
+    return CalendarCron(
+        period_months=_PERIOD_MONTHS.get(match["period"] or ""),
+        cadence=cadence,
+        anchor=date.fromisoformat(match["anchor"]) if match["anchor"] else None,
+        offset_days=-days if match["sign"] == "-" else days,
+        at=time(hour, minute),
+    )
+
+
+@lru_cache(maxsize=None)
+def parse_cron(expression: str) -> FieldCron | CalendarCron:
+    """Parse a schedule expression; both results provide ``next_after(moment)``.
+
+    Accepted forms, all in the scheduler's UTC clock:
+
+    * five-field cron (``"30 6 * * 1-5"``) or ``@hourly``, ``@daily``, ``@weekly``,
+      ``@monthly``, ``@yearly``;
+    * ``"month end"``, ``"quarter end"`` or ``"year end"``;
+    * ``"payday monthly"`` (last day of the month), ``"payday semimonthly"`` (15th and
+      last day), ``"payday weekly from 2024-01-05"`` or ``"payday biweekly from ..."``;
+
+    where the calendar forms take an optional ``"+ 5 days"`` / ``"- 2 days"`` and
+    ``"at 06:30"`` (midnight by default).
+    """
+    text = " ".join(expression.lower().split())
+    try:
+        match = _CALENDAR.fullmatch(text)
+        if match is not None:
+            return _parse_calendar(match)
+        parsed = _parse_fields(_ALIASES.get(text, text))
+        parsed.next_after(_NEVER_MATCHES_PROBE)  # rejects dates that never occur, such as "0 0 31 2 *"
+        return parsed
+    except ValueError as exc:
+        raise ValueError(f"Invalid schedule expression {expression!r}: {exc}") from None
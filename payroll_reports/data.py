@@ -1,30 +1,50 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
+from .columnar import PaymentTable
+from .jsonstream import iter_array, load_value, top_level_offsets
+from .rollups import PeriodRollups, load_rollups, rollup_dir_for, store_hash, store_key
+from .snapshot import Snapshot, read_snapshot, write_snapshot
 
 Store = Dict[str, Any]
 EmployeeRecord = Dict[str, Any]
 PaymentRecord = Dict[str, Any]
 PayTypeRecord = Dict[str, Any]
 
+# The top-level store sections reports read; anything else (time entries, runs, setup) is skipped.
+STORE_SECTIONS = ("employees", "pay_types", "payroll_history")
+
 
 @dataclass(frozen=True)
 class StoreData:
     employees: List[EmployeeRecord]
     pay_types: List[PayTypeRecord]
-    payments: List[PaymentRecord]
+    table: PaymentTable
+    rollups: PeriodRollups
+    rejected: List[str] = field(default_factory=list)
+    _payments: List[PaymentRecord] | None = field(default=None, repr=False, compare=False)
 
+    @property
+    def payments(self) -> List[PaymentRecord]:
+        """Payment dicts; rebuilt from ``table`` on first use when loaded from a snapshot."""
+        if self._payments is None:
+            object.__setattr__(self, "_payments", list(self.table.rows()))
+        return self._payments
 
-def load_store(store_path: Path) -> Store:
+
+def _read_store_bytes(store_path: Path) -> bytes:
     if not store_path.exists():
         raise FileNotFoundError(f"Store data not found at {store_path}")
-    with store_path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    return store_path.read_bytes()
+
+
+def load_store(store_path: Path) -> Store:
+    return json.loads(_read_store_bytes(store_path))
 
 
 def _parse_iso_date(value: str | None) -> date | None:
@@ -55,78 +75,168 @@ def _sum_hours(pay_lines: Dict[str, Any]) -> float:
     return round(total, 2)
 
 
-def build_payments(store: Store) -> List[PaymentRecord]:
-    history = [entry for entry in store.get("payroll_history", []) if entry.get("entry_type") == "check"]
-    employees = {employee.get("id"): employee for employee in store.get("employees", [])}
-    pay_type_names = _index_pay_types(store.get("pay_types", []))
-    payments: List[PaymentRecord] = []
-
-    for entry in history:
-        check_date = _parse_iso_date(entry.get("check_date"))
-        if not check_date:
-            continue
-        employee_id = entry.get("employee_id")
-        employee = employees.get(employee_id, {})
-        pay_lines = entry.get("pay_lines", {}) or {}
-        earnings: List[Dict[str, Any]] = []
-        for pay_type_id, details in pay_lines.items():
-            earnings.append(
-                {
-                    "type": pay_type_names.get(pay_type_id, pay_type_id),
-                    "hours": float(details.get("hours") or 0.0),
-                    "amount": float(details.get("amount") or 0.0),
-                }
-            )
-
-        gross = float(entry.get("gross") or 0.0)
-        employee_taxes = {
-            "fit": float(entry.get("fit") or 0.0),
-            "ss": float(entry.get("employee_ss") or 0.0),
-            "medicare": float(entry.get("employee_medicare") or 0.0),
-        }
-        employer_taxes = {
-            "fit": 0.0,
-            "ss": float(entry.get("employer_ss") or 0.0),
-            "medicare": float(entry.get("employer_medicare") or 0.0),
-            "futa": float(entry.get("futa") or 0.0),
-            "suta": float(entry.get("suta") or 0.0),
-        }
-
-        payments.append(
+def _build_payment(
+    entry: Dict[str, Any], employees: Dict[str, EmployeeRecord], pay_type_names: Dict[str, str]
+) -> PaymentRecord | None:
+    check_date = _parse_iso_date(entry.get("check_date"))
+    if not check_date:
+        return None
+    employee_id = entry.get("employee_id")
+    employee = employees.get(employee_id, {})
+    pay_lines = entry.get("pay_lines", {}) or {}
+    earnings: List[Dict[str, Any]] = []
+    for pay_type_id, details in pay_lines.items():
+        earnings.append(
             {
-                "employee_id": employee_id,
-                "employee_name": employee.get("name") or employee_id,
-                "pay_date": check_date,
-                "gross_pay": gross,
-                "net_pay": float(entry.get("net") or 0.0),
-                "taxes": float(entry.get("taxes") or 0.0),
-                "deductions": 0.0,
-                "hours": _sum_hours(pay_lines),
-                "department": employee.get("department", ""),
-                "project": employee.get("project", ""),
-                "pay_schedule": employee.get("pay_schedule", ""),
-                "earnings": earnings,
-                "deductions_detail": [],
-                "contributions_detail": [],
-                "employee_taxes": employee_taxes,
-                "employer_taxes": employer_taxes,
-                "taxable_wages": {
-                    "fit": gross,
-                    "ss": gross,
-                    "medicare": gross,
-                    "futa": gross,
-                    "suta": gross,
-                },
-                "allocations": [],
+                "type": pay_type_names.get(pay_type_id, pay_type_id),
+                "hours": float(details.get("hours") or 0.0),
+                "amount": float(details.get("amount") or 0.0),
             }
         )
-    return payments
 
+    gross = float(entry.get("gross") or 0.0)
+    employee_taxes = {
+        "fit": float(entry.get("fit") or 0.0),
+        "ss": float(entry.get("employee_ss") or 0.0),
+        "medicare": float(entry.get("employee_medicare") or 0.0),
+    }
+    employer_taxes = {
+        "fit": 0.0,
+        "ss": float(entry.get("employer_ss") or 0.0),
+        "medicare": float(entry.get("employer_medicare") or 0.0),
+        "futa": float(entry.get("futa") or 0.0),
+        "suta": float(entry.get("suta") or 0.0),
+    }
+
+    return {
+        "check_id": entry.get("id", ""),
+        "employee_id": employee_id,
+        "employee_name": employee.get("name") or employee_id,
+        "pay_date": check_date,
+        "gross_pay": gross,
+        "net_pay": float(entry.get("net") or 0.0),
+        "taxes": float(entry.get("taxes") or 0.0),
+        "deductions": 0.0,
+        "hours": _sum_hours(pay_lines),
+        "department": employee.get("department", ""),
+        "project": employee.get("project", ""),
+        "pay_schedule": employee.get("pay_schedule", ""),
+        "state": employee.get("state", ""),
+        "earnings": earnings,
+        "deductions_detail": [],
+        "contributions_detail": [],
+        "employee_taxes": employee_taxes,
+        "employer_taxes": employer_taxes,
+        "taxable_wages": {
+            "fit": gross,
+            "ss": gross,
+            "medicare": gross,
+            "futa": gross,
+            "suta": gross,
+        },
+        "allocations": [],
+    }
+
+
+def iter_payments(
+    history: Iterable[Tuple[int, Any]],
+    employees: Iterable[EmployeeRecord],
+    pay_types: Iterable[PayTypeRecord],
+    rejected: List[str] | None = None,
+) -> Iterator[PaymentRecord]:
+    """Yield one payment per check entry in ``history`` (``(index, entry)`` pairs).
+
+    An entry that is not an object or whose fields do not convert is skipped and,
+    when ``rejected`` is given, reported there as ``"payroll_history[<index>]: <reason>"``.
+    """
+    employee_index = {employee.get("id"): employee for employee in employees}
+    pay_type_names = _index_pay_types(pay_types)
+    for index, entry in history:
+        try:
+            if entry.get("entry_type") != "check":
+                continue
+            payment = _build_payment(entry, employee_index, pay_type_names)
+        except (AttributeError, TypeError, ValueError) as exc:
+            if rejected is None:
+                raise
+            rejected.append(f"payroll_history[{index}]: {exc}")
+            continue
+        if payment is not None:
+            yield payment
+
+
+def build_payments(store: Store) -> List[PaymentRecord]:
+    return list(
+        iter_payments(
+            enumerate(store.get("payroll_history", [])), store.get("employees", []), store.get("pay_types", [])
+        )
+    )
+
+
+def _load_section(text: str, offsets: Dict[str, int], name: str) -> List[Any]:
+    if name not in offsets:
+        return []
+    value = load_value(text, offsets[name])
+    return list(value) if isinstance(value, list) else []
+
+
+def _parse_store(raw: bytes, rollup_dir: Path | None, key: str) -> tuple[Snapshot, List[PaymentRecord]]:
+    text = raw.decode("utf-8-sig")
+    rejected: List[str] = []
+    offsets = top_level_offsets(text, STORE_SECTIONS, rejected)
+    employees = _load_section(text, offsets, "employees")
+    pay_types = _load_section(text, offsets, "pay_types")
+    history: Iterable[Tuple[int, Any]] = ()
+    if text.startswith("[", offsets.get("payroll_history", -1)):
+        history = iter_array(text, offsets["payroll_history"], rejected, name="payroll_history")
+    elif "payroll_history" in offsets:
+        rejected.append("payroll_history: not an array")
+    payments = list(iter_payments(history, employees, pay_types, rejected))
+    digest = store_hash(raw)
+    table = PaymentTable.from_payments(payments)
+    snapshot = Snapshot(
+        store_hash=digest,
+        employees=employees,
+        pay_types=pay_types,
+        rejected=rejected,
+        table=table,
+        rollups=load_rollups(digest, table, rollup_dir, key),
+    )
+    return snapshot, payments
+
+
+def load_store_data(store_path: Path, rollup_dir: Path | None = None, use_snapshot: bool = True) -> StoreData:
+    """Load what the reports need from ``store_path``.
 
-def load_store_data(store_path: Path) -> StoreData:
-    store = load_store(store_path)
+    Only ``employees``, ``pay_types`` and ``payroll_history`` are decoded; other
+    top-level sections are skipped unparsed. History entries are decoded one at a
+    time, and malformed ones are listed in ``StoreData.rejected`` instead of failing.
+
+    With ``use_snapshot`` the result is cached in ``<store>.snapshot`` and reused
+    while the store's size and mtime, or failing those its hash, are unchanged.
+    Rollups are cached in ``rollup_dir`` (by default ``.report_cache`` beside the
+    store); without ``use_snapshot`` neither cache is read or written.
+    """
+    if not store_path.exists():
+        raise FileNotFoundError(f"Store data not found at {store_path}")
+    stat = store_path.stat()
+    snapshot = read_snapshot(store_path, stat.st_size, stat.st_mtime_ns) if use_snapshot else None
+    payments: List[PaymentRecord] | None = None
+    if snapshot is None:
+        raw = _read_store_bytes(store_path)
+        cached = read_snapshot(store_path, stat.st_size, stat.st_mtime_ns, store_hash(raw)) if use_snapshot else None
+        if cached is None:
+            cache_dir = (rollup_dir or rollup_dir_for(store_path)) if use_snapshot else None
+            snapshot, payments = _parse_store(raw, cache_dir, store_key(store_path))
+        else:
+            snapshot = cached
+        if use_snapshot:
+            write_snapshot(store_path, stat.st_size, stat.st_mtime_ns, snapshot)
     return StoreData(
-        employees=list(store.get("employees", [])),
-        pay_types=list(store.get("pay_types", [])),
-        payments=build_payments(store),
+        employees=snapshot.employees,
+        pay_types=snapshot.pay_types,
+        table=snapshot.table,
+        rollups=snapshot.rollups,
+        rejected=snapshot.rejected,
+        _payments=payments,
     )
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 import csv
-from datetime import datetime
+import gzip
+import itertools
+from array import array
+from datetime import date, datetime
 from pathlib import Path
-from typing import Iterable, Dict, Any, List
+from typing import Iterable, Iterator, Dict, Any, List
+
+from .colfile import write_colfile
 
 ReportRow = Dict[str, Any]
 
@@ -14,78 +19,143 @@ def _stringify(value: Any) -> str:
     return str(value)
 
 
-def export_csv(rows: Iterable[ReportRow], output_path: Path) -> Path:
-    rows = list(rows)
+CSV_CHUNK_ROWS = 1024
+# Types the csv module already writes exactly as ``_stringify`` would.
+_PLAIN_CELL_TYPES = (str, int, float, date, dict, list)
+
+
+def _csv_cells(rows: Iterable[ReportRow], fieldnames: List[str]) -> Iterator[List[Any]]:
+    field_set = set(fieldnames)
+    blanks = [""] * len(fieldnames)
+    for row in rows:
+        if not row.keys() <= field_set:
+            extra = ", ".join(sorted(row.keys() - field_set))
+            raise ValueError(f"Row has columns outside the export schema: {extra}")
+        yield [
+            value if value.__class__ in _PLAIN_CELL_TYPES else _stringify(value)
+            for value in map(row.get, fieldnames, blanks)
+        ]
+
+
+def export_csv(rows: Iterable[ReportRow], output_path: Path, fieldnames: List[str] | None = None) -> Path:
+    """Write ``rows`` as CSV, gzip-compressed when ``output_path`` ends in ``.gz``.
+
+    With ``fieldnames`` the rows are streamed in chunks of ``CSV_CHUNK_ROWS`` and a row
+    with a column outside the schema is an error. Without them every row is read first
+    and the header is the union of all row keys in first-seen order.
+    """
+    if fieldnames is None:
+        rows = list(rows)
+        fieldnames = list(dict.fromkeys(key for row in rows for key in row))
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", newline="", encoding="utf-8") as handle:
-        if not rows:
+    if output_path.suffix.lower() == ".gz":
+        handle = gzip.open(output_path, "wt", newline="", encoding="utf-8", compresslevel=6)
+    else:
+        handle = output_path.open("w", newline="", encoding="utf-8")
+    with handle:
+        if not fieldnames:
             return output_path
-        writer = csv.DictWriter(handle, fieldnames=list(rows[0].keys()))
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({key: _stringify(value) for key, value in row.items()})
+        writer = csv.writer(handle)
+        writer.writerow(fieldnames)
+        cells = _csv_cells(rows, fieldnames)
+        while True:
+            chunk = list(itertools.islice(cells, CSV_CHUNK_ROWS))
+            if not chunk:
+                break
+            writer.writerows(chunk)
     return output_path
 
 
-def _build_pdf_stream(rows: List[ReportRow], title: str) -> str:
-    lines: List[str] = []
-    y = 760
-    lines.append("BT /F1 16 Tf 50 {} Td ({} ) Tj ET".format(y, title))
-    y -= 24
-    if rows:
-        headers = list(rows[0].keys())
-        header_text = " | ".join(headers)
-        lines.append(f"BT /F1 12 Tf 50 {y} Td ({header_text}) Tj ET")
-        y -= 18
-        for row in rows:
-            row_text = " | ".join(_stringify(row.get(h, "")) for h in headers)
-            lines.append(f"BT /F1 10 Tf 50 {y} Td ({row_text}) Tj ET")
-            y -= 14
-            if y < 50:
-                break
-    else:
-        lines.append(f"BT /F1 12 Tf 50 {y} Td (No rows returned) Tj ET")
+PAGE_TOP = 760
+PAGE_BOTTOM = 50
+ROW_HEIGHT = 14
+
 
-    return "\n".join(lines)
+def _pdf_text(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_streams(rows: Iterable[ReportRow], title: str) -> Iterator[bytes]:
+    """Yield one content stream per page; the column header is repeated on every page."""
+    iterator = iter(rows)
+    first = next(iterator, None)
+    lines: List[str] = [f"BT /F1 16 Tf 50 {PAGE_TOP} Td ({_pdf_text(title)}) Tj ET"]
+    y = PAGE_TOP - 24
+    if first is None:
+        lines.append(f"BT /F1 12 Tf 50 {y} Td (No rows returned) Tj ET")
+        yield "\n".join(lines).encode("latin-1", "replace")
+        return
+
+    headers = list(first.keys())
+    header_text = _pdf_text(" | ".join(headers))
+    lines.append(f"BT /F1 12 Tf 50 {y} Td ({header_text}) Tj ET")
+    y -= 18
+    for row in itertools.chain([first], iterator):
+        if y < PAGE_BOTTOM:
+            yield "\n".join(lines).encode("latin-1", "replace")
+            lines = [f"BT /F1 12 Tf 50 {PAGE_TOP} Td ({header_text}) Tj ET"]
+            y = PAGE_TOP - 18
+        row_text = _pdf_text(" | ".join(_stringify(row.get(h, "")) for h in headers))
+        lines.append(f"BT /F1 10 Tf 50 {y} Td ({row_text}) Tj ET")
+        y -= ROW_HEIGHT
+    yield "\n".join(lines).encode("latin-1", "replace")
 
 
 def export_pdf(rows: Iterable[ReportRow], output_path: Path, title: str) -> Path:
-    rows_list = list(rows)
-    stream = _build_pdf_stream(rows_list, title)
-    stream_length = len(stream.encode("utf-8"))
-
-    objects = [
-        "1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj",
-        "2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj",
-        "3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >> endobj",
-        f"4 0 obj << /Length {stream_length} >> stream\n{stream}\nendstream endobj",
-        "5 0 obj << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> endobj",
-    ]
-
-    header = "%PDF-1.4\n"
-    offsets = []
-    position = len(header)
-    for obj in objects:
-        offsets.append(position)
-        position += len(obj.encode("utf-8")) + 1
-
-    xref_lines = ["xref", "0 6", "0000000000 65535 f "]
-    for offset in offsets:
-        xref_lines.append(f"{offset:010} 00000 n ")
-    xref_block = "\n".join(xref_lines)
-
-    startxref = position
-    trailer = f"trailer << /Size 6 /Root 1 0 R >>\nstartxref\n{startxref}\n%%EOF"
-
-    pdf_body = header + "\n".join(objects) + "\n" + xref_block + "\n" + trailer
+    """Write ``rows`` as a paginated PDF, streaming each page to disk as it is laid out.
+
+    Objects 1-3 are the catalog, page tree and font; page ``n`` (from 0) is object
+    ``4 + 2n`` with its contents in ``5 + 2n``. The page tree is written last, once
+    the page count is known, so only the xref offsets are held in memory.
+    """
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_bytes(pdf_body.encode("utf-8"))
+    offsets = array("q", [0, 0, 0, 0])
+    with output_path.open("wb") as handle:
+        position = 0
+
+        def write_object(number: int, body: bytes) -> None:
+            nonlocal position
+            while len(offsets) <= number:
+                offsets.append(0)
+            offsets[number] = position
+            data = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+            handle.write(data)
+            position += len(data)
+
+        header = b"%PDF-1.4\n"
+        handle.write(header)
+        position = len(header)
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+        pages = 0
+        for stream in _page_streams(rows, title):
+            page = 4 + 2 * pages
+            write_object(
+                page,
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                b"/Resources << /Font << /F1 3 0 R >> >> >>" % (page + 1),
+            )
+            write_object(page + 1, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+            pages += 1
+
+        kids = b" ".join(b"%d 0 R" % (4 + 2 * index) for index in range(pages))
+        write_object(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages))
+
+        handle.write(b"xref\n0 %d\n0000000000 65535 f \n" % len(offsets))
+        handle.writelines(b"%010d 00000 n \n" % offset for offset in offsets[1:])
+        handle.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(offsets), position))
     return output_path
 
 
-def export_report(rows: Iterable[ReportRow], output_path: Path, title: str) -> Path:
-    if output_path.suffix.lower() == ".csv":
-        return export_csv(rows, output_path)
+def export_report(
+    rows: Iterable[ReportRow], output_path: Path, title: str, fieldnames: List[str] | None = None
+) -> Path:
+    suffixes = [suffix.lower() for suffix in output_path.suffixes[-2:]]
+    if suffixes[-1:] == [".csv"] or suffixes == [".csv", ".gz"]:
+        return export_csv(rows, output_path, fieldnames)
     if output_path.suffix.lower() == ".pdf":
         return export_pdf(rows, output_path, title=title)
-    raise ValueError("Unsupported export format. Use .csv or .pdf")
+    if output_path.suffix.lower() == ".pcol":
+        return write_colfile(rows, output_path, fieldnames)
+    raise ValueError("Unsupported export format. Use .csv, .csv.gz, .pcol or .pdf")
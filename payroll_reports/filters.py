@@ -1,21 +1,21 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Iterable, List, Dict, Any, Optional
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 
 
 PaymentRecord = Dict[str, Any]
 
 
-def filter_payments(
+def iter_filtered_payments(
     payments: Iterable[PaymentRecord],
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     pay_schedules: Optional[List[str]] = None,
     departments: Optional[List[str]] = None,
     employee_ids: Optional[List[str]] = None,
-) -> List[PaymentRecord]:
-    """Filter payment records by date range, pay schedules, and departments."""
+) -> Iterator[PaymentRecord]:
+    """Lazily filter payment records by date range, pay schedules, and departments."""
 
     def matches(payment: PaymentRecord) -> bool:
         if start_date and payment["pay_date"] < start_date:
@@ -30,4 +30,18 @@ def filter_payments(
             return False
         return True
 
-    return [payment for payment in payments if matches(payment)]
+    return (payment for payment in payments if matches(payment))
+
+
+def filter_payments(
+    payments: Iterable[PaymentRecord],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    pay_schedules: Optional[List[str]] = None,
+    departments: Optional[List[str]] = None,
+    employee_ids: Optional[List[str]] = None,
+) -> List[PaymentRecord]:
+    """Filter payment records by date range, pay schedules, and departments."""
+    return list(
+        iter_filtered_payments(payments, start_date, end_date, pay_schedules, departments, employee_ids)
+    )
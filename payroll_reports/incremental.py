@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import hashlib
+from bisect import bisect_left
+import json
+import os
+import tempfile
+from array import array
+from dataclasses import dataclass, fields, replace
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, List, Sequence
+
+from .colfile import ColfileReader, write_colfile
+from .columnar import LineItems, PaymentTable
+from .reports import REPORT_COLUMNS, ReportRequest, ReportRow, build_report, labor_buckets, labor_distribution_rows
+from .rollups import ROLLUP_DIR, PeriodRollups
+from .ytd import YtdLedger
+
+INCREMENTAL_DIR = ROLLUP_DIR / "incremental"
+INCREMENTAL_VERSION = 2
+# Reports whose rows (or, for labor-distribution, unrounded sums) for payments up to
+# a pay date are unaffected by payments after it.
+INCREMENTAL_REPORTS = {"payroll-register", "tax-deposits", "payroll-details", "labor-distribution"}
+
+
+def supports_incremental(request: ReportRequest) -> bool:
+    if request.report_type == "payroll-details":
+        return (request.group_by or "none").lower() == "pay_date"
+    return request.report_type in INCREMENTAL_REPORTS
+
+
+@dataclass
+class IncrementalState:
+    """What an incremental report keeps between runs.
+
+    The first ``count`` selected payments, all paid on or before the ``watermark``
+    ordinal and with every column hashing to ``fingerprint``, are folded into
+    ``partials``: the finished rows, or for labor-distribution the unrounded buckets.
+    """
+
+    report_key: str
+    watermark: int
+    count: int
+    fingerprint: str
+    partials: Any
+
+
+def state_path(state_dir: Path, report_key: str) -> Path:
+    return state_dir / f"{hashlib.sha256(report_key.encode('utf-8')).hexdigest()[:16]}.json"
+
+
+def _replace_atomically(path: Path, write: Callable[[Path], Any]) -> None:
+    handle = tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix=".tmp", delete=False)
+    handle.close()
+    try:
+        write(Path(handle.name))
+        os.replace(handle.name, path)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+
+
+def load_state(path: Path, report_key: str, report_type: str) -> IncrementalState | None:
+    """The state saved at ``path`` for ``report_key``, or ``None`` if missing or unreadable."""
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("version") != INCREMENTAL_VERSION or payload.get("report_key") != report_key:
+            return None
+        if report_type == "labor-distribution":
+            partials = payload["partials"]
+        else:
+            with ColfileReader(path.with_name(payload["partials"])) as reader:
+                partials = list(reader.rows())
+        return IncrementalState(
+            report_key=report_key,
+            watermark=payload["watermark"],
+            count=payload["count"],
+            fingerprint=payload["fingerprint"],
+            partials=partials,
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_state(path: Path, state: IncrementalState, report_type: str) -> None:
+    """Write ``state`` to ``path``; finished rows go to a columnar file beside it.
+
+    The rows file is named after the payment count and replaced before the JSON that
+    points at it, so a reader never pairs a watermark with rows from another run.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partials = state.partials
+    previous: Path | None = None
+    if report_type != "labor-distribution":
+        rows_path = path.with_name(f"{path.stem}-{state.count}.pcol")
+        fieldnames = REPORT_COLUMNS.get(report_type)
+        _replace_atomically(rows_path, lambda target: write_colfile(state.partials, target, fieldnames))
+        partials = rows_path.name
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                previous = path.with_name(json.load(handle)["partials"])
+        except (OSError, ValueError, KeyError, TypeError):
+            previous = None
+    payload = {
+        "version": INCREMENTAL_VERSION,
+        "report_key": state.report_key,
+        "watermark": state.watermark,
+        "count": state.count,
+        "fingerprint": state.fingerprint,
+        "partials": partials,
+    }
+    _replace_atomically(path, lambda target: target.write_text(json.dumps(payload), encoding="utf-8"))
+    if previous is not None and previous.name != partials:
+        previous.unlink(missing_ok=True)
+
+
+def _pick(values: Any, rows: slice | List[int]) -> Any:
+    if isinstance(rows, slice):
+        return values[rows]
+    picked = list(map(values.__getitem__, rows))
+    return array(values.typecode, picked) if isinstance(values, array) else picked
+
+
+def _hash_column(digest: Any, values: Any, rows: slice | List[int]) -> None:
+    """Feed the ``rows`` of a column (or of each column under it) to ``digest``."""
+    if isinstance(values, array):
+        digest.update(_pick(values, rows).tobytes())
+    elif isinstance(values, dict):
+        for key in sorted(values):
+            digest.update(key.encode("utf-8") + b"\x00")
+            _hash_column(digest, values[key], rows)
+    elif isinstance(values, LineItems):
+        if isinstance(rows, slice):
+            # Line items are stored in payment order, so a payment prefix owns an item prefix.
+            items: slice | List[int] = slice(0, bisect_left(values.payment_index, rows.stop))
+            owners = values.payment_index[items]
+        else:
+            # Numbered by position among the selected payments, as ``PaymentTable.take`` does.
+            remap = {payment: position for position, payment in enumerate(rows)}
+            items = [item for item, payment in enumerate(values.payment_index) if payment in remap]
+            owners = array(values.payment_index.typecode, [remap[values.payment_index[item]] for item in items])
+        digest.update(owners.tobytes())
+        for item in fields(values):
+            if item.name != "payment_index":
+                _hash_column(digest, getattr(values, item.name), items)
+    else:
+        head = _pick(values, rows)
+        try:
+            text = "\x1f".join(head)
+        except TypeError:  # a column with None (no project) or non-string values
+            text = "\x1f".join(map(repr, head))
+        digest.update(text.encode("utf-8") + b"\x1e")
+
+
+def _fingerprint(table: PaymentTable, positions: Sequence[int]) -> str:
+    """SHA-256 of every column of ``table`` at ``positions``, line items included.
+
+    Any correction to a covered check (a tax, net pay, department or earning) changes
+    it, not just a change in how many checks there are or their gross pay. Positions
+    that are the table's first rows, as for an unfiltered report, are hashed as slices.
+    """
+    count = len(positions)
+    rows: slice | List[int] = slice(0, count) if not count or positions[-1] == count - 1 else list(positions)
+    digest = hashlib.sha256()
+    for item in fields(table):
+        _hash_column(digest, getattr(table, item.name), rows)
+    return digest.hexdigest()
+
+
+def _covers_prefix(state: IncrementalState, table: PaymentTable, positions: Sequence[int]) -> bool:
+    """Whether the payments ``state`` covered are still exactly the first ``count`` selected."""
+    if state.count > len(positions):
+        return False
+    dates = table.pay_date
+    covered, later = positions[: state.count], positions[state.count :]
+    return (
+        all(dates[index] <= state.watermark for index in covered)
+        and all(dates[index] > state.watermark for index in later)
+        and _fingerprint(table, covered) == state.fingerprint
+    )
+
+
+def build_incremental(
+    request: ReportRequest,
+    report_key: str,
+    table: PaymentTable,
+    rollups: PeriodRollups | None = None,
+    ytd: YtdLedger | None = None,
+    state_dir: Path = INCREMENTAL_DIR,
+) -> List[ReportRow]:
+    """Build ``request`` from the state saved by the previous run plus the payments since.
+
+    Only payments after the stored watermark go through ``build_report``, with the same
+    filters, so the result equals a full rebuild. The state is used only if the payments
+    it covered are unchanged and every newer payment is paid after the watermark and
+    listed after them; otherwise the report is rebuilt in full. The state is rewritten
+    either way.
+    """
+    positions = table.select(
+        start_date=request.start_date,
+        end_date=request.end_date,
+        pay_schedules=request.pay_schedules,
+        departments=request.departments,
+        employee_ids=request.employee_ids,
+    )
+    path = state_path(state_dir, report_key)
+    state = load_state(path, report_key, request.report_type)
+    if state is not None and not _covers_prefix(state, table, positions):
+        state = None
+
+    since = request
+    if state is not None:
+        after_watermark = date.fromordinal(state.watermark + 1)
+        since = replace(request, start_date=max(request.start_date or after_watermark, after_watermark))
+    covered = state.count if state is not None else 0
+    new_positions = positions[covered:]
+
+    if request.report_type == "labor-distribution":
+        partials = labor_buckets(table.take(new_positions).rows(), state.partials if state is not None else None)
+        rows = labor_distribution_rows(partials)
+    else:
+        partials = (state.partials if state is not None else []) + build_report(since, table, rollups, ytd)
+        rows = partials
+
+    save_state(
+        path,
+        IncrementalState(
+            report_key=report_key,
+            watermark=max((table.pay_date[index] for index in new_positions), default=state.watermark if state else 0),
+            count=len(positions),
+            fingerprint=_fingerprint(table, positions),
+            partials=partials,
+        ),
+        request.report_type,
+    )
+    return rows
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Collection, Dict, Generator, Iterator, List, Tuple
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"\s*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Everything up to the next bracket outside a string, matched in one regex call.
+_BRACKET_FREE = re.compile(r'[^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*')
+_SCALAR = re.compile(r"[^,\]}\s]*")
+_OPENERS = {"]": "[", "}": "{"}
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _expect(text: str, pos: int, token: str) -> int:
+    if not text.startswith(token, pos):
+        raise json.JSONDecodeError(f"Expecting {token!r}", text, pos)
+    return pos + len(token)
+
+
+def skip_value(text: str, pos: int) -> int:
+    """End offset of the JSON value starting at ``pos``, found without decoding it.
+
+    Only brackets and string boundaries are inspected, so a value is skipped even if
+    its scalars are malformed; unbalanced or mismatched brackets raise ``JSONDecodeError``.
+    """
+    first = text[pos : pos + 1]
+    if first == '"':
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise json.JSONDecodeError("Unterminated string", text, pos)
+        return match.end()
+    if first not in ("[", "{"):
+        return _SCALAR.match(text, pos).end()
+    stack: List[str] = []
+    while True:
+        bracket = text[pos : pos + 1]
+        if bracket in ("[", "{"):
+            stack.append(bracket)
+        elif bracket in ("]", "}") and stack.pop() == _OPENERS[bracket]:
+            if not stack:
+                return pos + 1
+        else:
+            raise json.JSONDecodeError("Unbalanced brackets", text, pos)
+        pos = _BRACKET_FREE.match(text, pos + 1).end()
+
+
+def top_level_offsets(
+    text: str, wanted: Collection[str] | None = None, errors: List[str] | None = None
+) -> Dict[str, int]:
+    """Key -> start offset of its value for the top-level JSON object in ``text``.
+
+    With ``wanted``, scanning stops as soon as all of those keys have been seen, so the
+    last wanted value and everything after it are never read. An array whose end
+    cannot be found raises, or with ``errors`` is reported there and ends the scan.
+    """
+    offsets: Dict[str, int] = {}
+    missing = set(wanted) if wanted is not None else None
+    pos = _expect(text, _skip_whitespace(text, 0), "{")
+    pos = _skip_whitespace(text, pos)
+    if text.startswith("}", pos):
+        return offsets
+    while True:
+        if not text.startswith('"', pos):
+            raise json.JSONDecodeError("Expecting property name", text, pos)
+        key, pos = _DECODER.raw_decode(text, pos)
+        pos = _skip_whitespace(text, _expect(text, _skip_whitespace(text, pos), ":"))
+        offsets[key] = pos
+        if missing is not None:
+            missing.discard(key)
+            if not missing:
+                return offsets
+        try:
+            end = skip_value(text, pos)
+        except json.JSONDecodeError:
+            # A malformed element inside an array (say payroll_history ahead of
+            # employees) must not hide the keys after it.
+            end = _skip_array(text, pos) if text.startswith("[", pos) else None
+            if end is None:
+                if errors is None or not text.startswith("[", pos):
+                    raise
+                errors.append(f"{key}: unreadable to its end; the keys after it were not read")
+                return offsets
+        pos = _skip_whitespace(text, end)
+        if text.startswith("}", pos):
+            return offsets
+        pos = _skip_whitespace(text, _expect(text, pos, ","))
+
+
+def load_value(text: str, pos: int) -> Any:
+    return _DECODER.raw_decode(text, pos)[0]
+
+
+def _delimited(text: str, end: int) -> bool:
+    after = _skip_whitespace(text, end)
+    return text[after : after + 1] in (",", "]")
+
+
+def _resume_after(text: str, pos: int) -> int | None:
+    """End of the broken element starting at ``pos``, where its array picks up again.
+
+    Brackets and strings are scanned from ``pos``; the element ends where the bracket
+    it opens with is closed, a closer also closing any bracket opened after it that
+    was left unclosed. ``None`` if that cannot be told: an unterminated string, a
+    closer matching nothing in the element (the array's own ``]``, say), or an end
+    not followed by ``,`` or ``]``.
+    """
+    first = text[pos : pos + 1]
+    if first not in ("[", "{"):
+        try:
+            end = skip_value(text, pos)
+        except json.JSONDecodeError:
+            return None
+        return end if _delimited(text, end) else None
+    stack: List[str] = []
+    while True:
+        bracket = text[pos : pos + 1]
+        if bracket in ("[", "{"):
+            stack.append(bracket)
+        elif bracket in ("]", "}"):
+            if _OPENERS[bracket] not in stack:
+                return None
+            while stack.pop() != _OPENERS[bracket]:
+                pass
+            if not stack:
+                return pos + 1 if _delimited(text, pos + 1) else None
+        else:
+            # The end of the text, or a quote _BRACKET_FREE stopped at: an unterminated string.
+            return None
+        pos = _BRACKET_FREE.match(text, pos + 1).end()
+
+
+def _elements(text: str, pos: int, errors: List[str], name: str) -> Generator[Tuple[int, Any], None, int | None]:
+    """``iter_array``'s elements; returns the offset just past the array, or ``None`` if it is unreadable."""
+    pos = _skip_whitespace(text, _expect(text, pos, "["))
+    if text.startswith("]", pos):
+        return pos + 1
+    index = 0
+    while True:
+        try:
+            value, end = _DECODER.raw_decode(text, pos)
+            if not _delimited(text, end):
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, _skip_whitespace(text, end))
+        except json.JSONDecodeError as exc:
+            errors.append(f"{name}[{index}]: {exc.msg}")
+            resumed = _resume_after(text, pos)
+            if resumed is None:
+                errors.append(f"{name}[{index + 1}:]: unreadable after a malformed element")
+                return None
+            end = resumed
+        else:
+            yield index, value
+        pos = _skip_whitespace(text, end)
+        if text.startswith("]", pos):
+            return pos + 1
+        pos = _skip_whitespace(text, _expect(text, pos, ","))
+        index += 1
+
+
+def iter_array(text: str, pos: int, errors: List[str], name: str = "array") -> Iterator[Tuple[int, Any]]:
+    """Decode the JSON array at ``pos`` one element at a time, yielding ``(index, element)``.
+
+    An element that does not parse is skipped and reported in ``errors`` as
+    ``"<name>[<index>]: <reason>"``; the rest of the array is still read. If an
+    element's end cannot be told from its brackets and strings, the rest of the
+    array is reported as unreadable instead.
+    """
+    yield from _elements(text, pos, errors, name)
+
+
+def _skip_array(text: str, pos: int) -> int | None:
+    """End offset of an array ``skip_value`` could not balance, found by reading it element by element."""
+    elements = _elements(text, pos, [], "")
+    while True:
+        try:
+            next(elements)
+        except StopIteration as stop:
+            return stop.value
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import io
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, Dict, Any, List
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Sequence
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
@@ -19,6 +23,9 @@ from reportlab.platypus import (
     TableStyle,
 )
 
+from .pdf_concat import PdfConcatenator
+from .ytd import YtdLedger
+
 
 ReportRow = Dict[str, Any]
 
@@ -27,6 +34,7 @@ EMPLOYER_ADDRESS_1 = "123 Business Rd"
 EMPLOYER_ADDRESS_2 = "Orlando, FL 32801"
 EMPLOYER_PHONE = "(407) 555-0199"
 EMPLOYER_FEIN = "12-3456789"
+STUB_CHUNK_SIZE = 200
 
 
 @dataclass(frozen=True)
@@ -77,75 +85,118 @@ def _calculate_period(pay_date: date | None, pay_schedule: str) -> tuple[date |
 
 
 def _build_stub_contexts(
-    payments: Iterable[ReportRow], employees: Iterable[ReportRow]
+    payments: Iterable[ReportRow], employees: Iterable[ReportRow], ytd: YtdLedger | None = None
 ) -> List[StubContext]:
     employee_index = {employee["employee_id"]: employee for employee in employees}
-    payments_by_employee: Dict[str, List[ReportRow]] = {}
-    for payment in payments:
-        payments_by_employee.setdefault(payment["employee_id"], []).append(payment)
+    payments = list(payments)
+    if ytd is None:
+        ytd = YtdLedger.from_payments(payments)
 
     contexts: List[StubContext] = []
-    for employee_id, records in payments_by_employee.items():
-        records.sort(key=lambda payment: payment.get("pay_date") or date.min)
-        cumulative_gross = 0.0
-        cumulative_taxes = 0.0
-        cumulative_deductions = 0.0
-        for payment in records:
-            cumulative_gross += float(payment.get("gross_pay") or 0.0)
-            cumulative_taxes += float(payment.get("taxes") or 0.0)
-            cumulative_deductions += float(payment.get("deductions") or 0.0)
-            net_pay = float(payment.get("net_pay") or 0.0)
-            cumulative_net = cumulative_gross - cumulative_taxes - cumulative_deductions
-            employee = employee_index.get(employee_id, {})
-            pay_schedule = employee.get("pay_schedule") or payment.get("pay_schedule") or "—"
-            pay_date = payment.get("pay_date")
-            period_start, period_end = _calculate_period(pay_date, pay_schedule)
-
-            contexts.append(
-                StubContext(
-                    employee_id=employee_id,
-                    employee_name=employee.get("name", "Unknown"),
-                    employee_address_1=employee.get("address_1", "456 Main St"),
-                    employee_address_2=employee.get("address_2", "Orlando, FL 32803"),
-                    department=employee.get("department", payment.get("department", "—")),
-                    pay_schedule=pay_schedule,
-                    pay_date=pay_date,
-                    pay_period_start=period_start,
-                    pay_period_end=period_end,
-                    hours=payment.get("hours"),
-                    gross_pay=float(payment.get("gross_pay") or 0.0),
-                    taxes=float(payment.get("taxes") or 0.0),
-                    deductions=float(payment.get("deductions") or 0.0),
-                    net_pay=net_pay,
-                    ytd_gross=cumulative_gross,
-                    ytd_taxes=cumulative_taxes,
-                    ytd_deductions=cumulative_deductions,
-                    ytd_net=cumulative_net,
-                )
+    for payment in payments:
+        employee_id = payment["employee_id"]
+        totals = ytd.through(payment)
+        net_pay = float(payment.get("net_pay") or 0.0)
+        employee = employee_index.get(employee_id, {})
+        pay_schedule = employee.get("pay_schedule") or payment.get("pay_schedule") or "—"
+        pay_date = payment.get("pay_date")
+        period_start, period_end = _calculate_period(pay_date, pay_schedule)
+
+        contexts.append(
+            StubContext(
+                employee_id=employee_id,
+                employee_name=employee.get("name", "Unknown"),
+                employee_address_1=employee.get("address_1", "456 Main St"),
+                employee_address_2=employee.get("address_2", "Orlando, FL 32803"),
+                department=employee.get("department", payment.get("department", "—")),
+                pay_schedule=pay_schedule,
+                pay_date=pay_date,
+                pay_period_start=period_start,
+                pay_period_end=period_end,
+                hours=payment.get("hours"),
+                gross_pay=float(payment.get("gross_pay") or 0.0),
+                taxes=float(payment.get("taxes") or 0.0),
+                deductions=float(payment.get("deductions") or 0.0),
+                net_pay=net_pay,
+                ytd_gross=totals.gross,
+                ytd_taxes=totals.taxes,
+                ytd_deductions=totals.deductions,
+                ytd_net=totals.gross - totals.taxes - totals.deductions,
             )
+        )
 
     contexts.sort(key=lambda context: (context.employee_id, context.pay_date or date.min))
     return contexts
 
 
+class StubTemplate:
+    """Styles, column widths and static flowables shared by every stub a process renders."""
+
+    def __init__(self) -> None:
+        styles = getSampleStyleSheet()
+        self.header_style = ParagraphStyle("stub_header", parent=styles["Heading3"], fontSize=11)
+        self.body_style = ParagraphStyle("stub_body", parent=styles["Normal"], fontSize=9.5)
+        self.title = Paragraph("PAY STUB", styles["Title"])
+        self.employer = Paragraph(
+            (
+                f"<b>{EMPLOYER_NAME}</b><br/>{EMPLOYER_ADDRESS_1}<br/>"
+                f"{EMPLOYER_ADDRESS_2}<br/>{EMPLOYER_PHONE}<br/>"
+                f"FEIN: {EMPLOYER_FEIN}"
+            ),
+            self.body_style,
+        )
+        self.earnings_heading = Paragraph("Earnings & Summary", self.header_style)
+        self.deductions_heading = Paragraph("Itemized Deductions (Current vs Year-to-Date)", self.header_style)
+        self.total_deductions_label = Paragraph("<b>Total deductions</b>", self.body_style)
+
+        self.party_widths = [3.35 * inch, 3.35 * inch]
+        self.period_widths = [1.0 * inch, 2.5 * inch, 1.0 * inch, 2.2 * inch]
+        self.amount_widths = [3.3 * inch, 1.5 * inch, 1.5 * inch]
+
+        self.earnings_style = TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+                ("LINEABOVE", (0, -2), (-1, -2), 0.75, colors.black),
+                ("LINEABOVE", (0, -1), (-1, -1), 0.75, colors.black),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+            ]
+        )
+        self.deductions_style = TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+                ("GRID", (0, 0), (-1, -2), 0.25, colors.lightgrey),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 6),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("TOPPADDING", (0, 0), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+                ("LINEABOVE", (0, -1), (-1, -1), 0.75, colors.black),
+            ]
+        )
+
+
+@lru_cache(maxsize=None)
+def stub_template() -> StubTemplate:
+    return StubTemplate()
+
+
 def _build_stub_story(context: StubContext) -> List[Any]:
-    styles = getSampleStyleSheet()
-    header_style = ParagraphStyle("stub_header", parent=styles["Heading3"], fontSize=11)
-    body_style = ParagraphStyle("stub_body", parent=styles["Normal"], fontSize=9.5)
+    template = stub_template()
+    body_style = template.body_style
 
-    story: List[Any] = [Paragraph("PAY STUB", styles["Title"])]
+    story: List[Any] = [template.title]
     story.append(
         Table(
             [
                 [
-                    Paragraph(
-                        (
-                            f"<b>{EMPLOYER_NAME}</b><br/>{EMPLOYER_ADDRESS_1}<br/>"
-                            f"{EMPLOYER_ADDRESS_2}<br/>{EMPLOYER_PHONE}<br/>"
-                            f"FEIN: {EMPLOYER_FEIN}"
-                        ),
-                        body_style,
-                    ),
+                    template.employer,
                     Paragraph(
                         (
                             f"<b>{context.employee_name}</b><br/>"
@@ -156,7 +207,7 @@ def _build_stub_story(context: StubContext) -> List[Any]:
                     ),
                 ]
             ],
-            colWidths=[3.35 * inch, 3.35 * inch],
+            colWidths=template.party_widths,
         )
     )
 
@@ -173,12 +224,12 @@ def _build_stub_story(context: StubContext) -> List[Any]:
                     f"{_fmt_date(context.pay_period_start)} - {_fmt_date(context.pay_period_end)}",
                 ]
             ],
-            colWidths=[1.0 * inch, 2.5 * inch, 1.0 * inch, 2.2 * inch],
+            colWidths=template.period_widths,
         )
     )
 
     story.append(Spacer(1, 10))
-    story.append(Paragraph("Earnings & Summary", header_style))
+    story.append(template.earnings_heading)
 
     earnings_rows = [
         ["Description", "Current", "YTD"],
@@ -188,40 +239,22 @@ def _build_stub_story(context: StubContext) -> List[Any]:
         ["Net pay", _money(context.net_pay), _money(context.ytd_net)],
     ]
 
-    earnings_table = Table(
-        earnings_rows,
-        colWidths=[3.3 * inch, 1.5 * inch, 1.5 * inch],
-    )
-    earnings_table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-                ("LINEABOVE", (0, -2), (-1, -2), 0.75, colors.black),
-                ("LINEABOVE", (0, -1), (-1, -1), 0.75, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
+    earnings_table = Table(earnings_rows, colWidths=template.amount_widths)
+    earnings_table.setStyle(template.earnings_style)
     story.append(earnings_table)
 
     story.append(Spacer(1, 12))
     story.append(HRFlowable(width="100%"))
     story.append(Spacer(1, 10))
 
-    story.append(Paragraph("Itemized Deductions (Current vs Year-to-Date)", header_style))
+    story.append(template.deductions_heading)
 
     deduction_rows = [
         ["Deduction", "Current", "YTD"],
         ["Taxes", _money(context.taxes), _money(context.ytd_taxes)],
         ["Other deductions", _money(context.deductions), _money(context.ytd_deductions)],
         [
-            Paragraph("<b>Total deductions</b>", body_style),
+            template.total_deductions_label,
             Paragraph(f"<b>{_money(context.taxes + context.deductions)}</b>", body_style),
             Paragraph(
                 f"<b>{_money(context.ytd_taxes + context.ytd_deductions)}</b>", body_style
@@ -229,34 +262,28 @@ def _build_stub_story(context: StubContext) -> List[Any]:
         ],
     ]
 
-    deductions_table = Table(
-        deduction_rows,
-        colWidths=[3.3 * inch, 1.5 * inch, 1.5 * inch],
-    )
-    deductions_table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                ("GRID", (0, 0), (-1, -2), 0.25, colors.lightgrey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                ("LINEABOVE", (0, -1), (-1, -1), 0.75, colors.black),
-            ]
-        )
-    )
+    deductions_table = Table(deduction_rows, colWidths=template.amount_widths)
+    deductions_table.setStyle(template.deductions_style)
     story.append(deductions_table)
 
     return story
 
 
 def export_check_stub_pdf(
-    payments: Iterable[ReportRow], employees: Iterable[ReportRow], output_path: Path
+    payments: Iterable[ReportRow],
+    employees: Iterable[ReportRow],
+    output_path: Path,
+    ytd: YtdLedger | None = None,
+    processes: int | None = None,
+    chunk_size: int = STUB_CHUNK_SIZE,
 ) -> Path:
-    contexts = _build_stub_contexts(payments, employees)
+    """Write one page per check.
+
+    More than ``chunk_size`` stubs are rendered as contiguous chunks, in ``processes``
+    worker processes when given, and the partial PDFs are concatenated in order, so
+    only a bounded number of chunks is ever held in memory.
+    """
+    contexts = _build_stub_contexts(payments, employees, ytd)
     if not contexts:
         contexts = [
             StubContext(
@@ -281,8 +308,23 @@ def export_check_stub_pdf(
             )
         ]
 
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if len(contexts) <= chunk_size:
+        _write_stubs(contexts, str(output_path))
+        return output_path
+
+    chunks = [contexts[start : start + chunk_size] for start in range(0, len(contexts), chunk_size)]
+    with output_path.open("wb") as handle:
+        concatenator = PdfConcatenator(handle)
+        for part in _render_chunks(chunks, processes):
+            concatenator.append(part)
+        concatenator.close()
+    return output_path
+
+
+def _write_stubs(contexts: Sequence[StubContext], target: str | IO[bytes]) -> None:
     doc = SimpleDocTemplate(
-        output_path,
+        target,
         pagesize=letter,
         leftMargin=0.6 * inch,
         rightMargin=0.6 * inch,
@@ -295,7 +337,26 @@ def export_check_stub_pdf(
         if index:
             story.append(PageBreak())
         story.extend(_build_stub_story(context))
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
     doc.build(story)
-    return output_path
+
+
+def _render_chunk(contexts: Sequence[StubContext]) -> bytes:
+    buffer = io.BytesIO()
+    _write_stubs(contexts, buffer)
+    return buffer.getvalue()
+
+
+def _render_chunks(chunks: List[List[StubContext]], processes: int | None) -> Iterator[bytes]:
+    """Yield each chunk's PDF in order, keeping at most ``2 * processes`` chunks in flight."""
+    if not processes or processes < 2:
+        for chunk in chunks:
+            yield _render_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        window: Deque[Future] = deque()
+        for chunk in chunks:
+            window.append(pool.submit(_render_chunk, chunk))
+            if len(window) >= 2 * processes:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
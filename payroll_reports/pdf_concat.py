@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import re
+from typing import IO, Dict, List
+
+_STARTXREF = re.compile(rb"startxref\s+(\d+)")
+_XREF_SECTION = re.compile(rb"xref\s+(\d+) (\d+)\s+")
+_XREF_ENTRY = re.compile(rb"(\d{10}) (\d{5}) ([nf])")
+_OBJECT_HEADER = re.compile(rb"\d+ \d+ obj\s*")
+_OBJECT_END = re.compile(rb"\s*endobj\s*$")
+_STREAM_START = re.compile(rb">>\s*stream\r?\n")
+_REFERENCE = re.compile(rb"(?<![\d.])(\d+) 0 R\b")
+_ROOT = re.compile(rb"/Root (\d+) 0 R")
+_INFO = re.compile(rb"/Info (\d+) 0 R")
+_PAGES = re.compile(rb"/Pages (\d+) 0 R")
+_COUNT = re.compile(rb"/Count (\d+)")
+
+
+class PdfConcatenator:
+    """Append whole ReportLab-generated PDFs to ``output`` as one document.
+
+    Parts are read through their classic xref table and copied object by object:
+    references in each object's dictionary are renumbered, stream data is copied
+    untouched. Each part's catalog and info dictionary are dropped and its page
+    tree is hung under a shared root, so only one part is held in memory at a time.
+    """
+
+    def __init__(self, output: IO[bytes]):
+        self.output = output
+        self._position = 0
+        # Object 1 is the catalog and 2 the root page tree; both are written by ``close``.
+        self._offsets: List[int] = [0, 0, 0]
+        self._kids: List[int] = []
+        self._count = 0
+        self._write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+
+    def _write(self, data: bytes) -> None:
+        self.output.write(data)
+        self._position += len(data)
+
+    def _write_object(self, number: int, body: bytes) -> None:
+        self._offsets[number] = self._position
+        self._write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def append(self, pdf: bytes) -> None:
+        objects = _read_objects(pdf)
+        trailer = pdf[pdf.rindex(b"trailer") :]
+        catalog = int(_ROOT.search(trailer).group(1))
+        info = _INFO.search(trailer)
+        pages = int(_PAGES.search(_dictionary(objects[catalog])).group(1))
+        skipped = {catalog, int(info.group(1))} if info else {catalog}
+
+        numbers: Dict[int, int] = {}
+        for number in objects:
+            if number not in skipped:
+                numbers[number] = len(self._offsets)
+                self._offsets.append(0)
+
+        def renumber(match: re.Match) -> bytes:
+            return b"%d 0 R" % numbers[int(match.group(1))]
+
+        for number, body in objects.items():
+            if number in skipped:
+                continue
+            dictionary = _dictionary(body)
+            rest = body[len(dictionary) :]
+            dictionary = _REFERENCE.sub(renumber, dictionary)
+            if number == pages:
+                dictionary = dictionary.replace(b"<<", b"<<\n/Parent 2 0 R", 1)
+                self._count += int(_COUNT.search(dictionary).group(1))
+            self._write_object(numbers[number], dictionary + rest)
+        self._kids.append(numbers[pages])
+
+    @property
+    def page_count(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        kids = b" ".join(b"%d 0 R" % kid for kid in self._kids)
+        self._write_object(2, b"<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>" % (self._count, kids))
+        self._write_object(1, b"<<\n/Pages 2 0 R /Type /Catalog\n>>")
+        xref = self._position
+        entries = [b"0000000000 65535 f \n"] + [b"%010d 00000 n \n" % offset for offset in self._offsets[1:]]
+        self._write(b"xref\n0 %d\n" % len(self._offsets) + b"".join(entries))
+        self._write(b"trailer\n<<\n/Root 1 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n" % (len(self._offsets), xref))
+
+
+def _read_objects(pdf: bytes) -> Dict[int, bytes]:
+    """Object number -> body (between ``N 0 obj`` and ``endobj``) from the part's xref table."""
+    xref = int(_STARTXREF.findall(pdf[-1024:])[-1])
+    section = _XREF_SECTION.match(pdf, xref)
+    if section is None:
+        raise ValueError("Only PDFs with a classic xref table can be concatenated.")
+    first, size = int(section.group(1)), int(section.group(2))
+    offsets: Dict[int, int] = {}
+    for index, entry in enumerate(_XREF_ENTRY.finditer(pdf, section.end())):
+        if index == size:
+            break
+        if entry.group(3) == b"n":
+            offsets[first + index] = int(entry.group(1))
+    ordered = sorted(offsets.items(), key=lambda item: item[1])
+    objects: Dict[int, bytes] = {}
+    for position, (number, start) in enumerate(ordered):
+        end = ordered[position + 1][1] if position + 1 < len(ordered) else xref
+        chunk = pdf[start:end]
+        header = _OBJECT_HEADER.match(chunk)
+        body = chunk[header.end() :]
+        objects[number] = body[: _OBJECT_END.search(body).start()]
+    return objects
+
+
+def _dictionary(body: bytes) -> bytes:
+    """The object's dictionary part, excluding any stream data."""
+    stream = _STREAM_START.search(body)
+    return body[: stream.start() + 2] if stream else body
@@ -3,9 +3,12 @@ from __future__ import annotations
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date
-from typing import Dict, List, Any, Iterable
+from typing import Dict, List, Any, Iterable, Iterator
 
-from .filters import filter_payments
+from .columnar import PaymentTable, group_sum, group_sums
+from .filters import filter_payments, iter_filtered_payments
+from .rollups import PeriodRollups, PeriodTotals
+from .ytd import YtdLedger
 
 
 @dataclass
@@ -28,20 +31,8 @@ def _round_dict(values: Dict[str, float]) -> Dict[str, float]:
     return {key: round(value, 2) for key, value in values.items()}
 
 
-def _aggregate_by_type(payments: Iterable[ReportRow], field: str, amount_key: str) -> Dict[str, float]:
-    totals: Dict[str, float] = defaultdict(float)
-    for payment in payments:
-        for item in payment.get(field, []):
-            totals[item["type"]] += float(item.get(amount_key, 0.0))
-    return _round_dict(totals)
-
-
-def _aggregate_hours_by_type(payments: Iterable[ReportRow], field: str) -> Dict[str, float]:
-    totals: Dict[str, float] = defaultdict(float)
-    for payment in payments:
-        for item in payment.get(field, []):
-            totals[item["type"]] += float(item.get("hours", 0.0))
-    return _round_dict(totals)
+def _round_map(values: Dict[str, Any]) -> Dict[str, float]:
+    return {key: round(float(value), 2) for key, value in values.items()}
 
 
 def _aggregate_tax_map(payments: Iterable[ReportRow], field: str) -> Dict[str, float]:
@@ -52,16 +43,25 @@ def _aggregate_tax_map(payments: Iterable[ReportRow], field: str) -> Dict[str, f
     return _round_dict(totals)
 
 
-def _aggregate_payments(payments: Iterable[ReportRow]) -> Dict[str, Any]:
-    payment_list = list(payments)
-    earnings_by_type = _aggregate_by_type(payment_list, "earnings", "amount")
-    hours_by_type = _aggregate_hours_by_type(payment_list, "earnings")
-    deductions_by_type = _aggregate_by_type(payment_list, "deductions_detail", "amount")
-    contributions_by_type = _aggregate_by_type(payment_list, "contributions_detail", "amount")
-    employee_taxes = _aggregate_tax_map(payment_list, "employee_taxes")
-    employer_taxes = _aggregate_tax_map(payment_list, "employer_taxes")
-    taxable_wages = _aggregate_tax_map(payment_list, "taxable_wages")
+def _sum_line_items(totals: Dict[str, float], items: Iterable[ReportRow]) -> None:
+    for item in items:
+        totals[item["type"]] += float(item.get("amount", 0.0))
+
 
+def _sum_tax_map(totals: Dict[str, float], values: Dict[str, float]) -> None:
+    for key, value in values.items():
+        totals[key] += float(value)
+
+
+def _totals_row(
+    earnings_by_type: Dict[str, float],
+    hours_by_type: Dict[str, float],
+    deductions_by_type: Dict[str, float],
+    contributions_by_type: Dict[str, float],
+    employee_taxes: Dict[str, float],
+    employer_taxes: Dict[str, float],
+    taxable_wages: Dict[str, float],
+) -> Dict[str, Any]:
     return {
         "earnings_by_type": earnings_by_type,
         "earnings_total": round(sum(earnings_by_type.values()), 2),
@@ -79,6 +79,56 @@ def _aggregate_payments(payments: Iterable[ReportRow]) -> Dict[str, Any]:
     }
 
 
+def _aggregate_payments(payments: Iterable[ReportRow]) -> Dict[str, Any]:
+    """Accumulate every payroll-details metric in a single pass over ``payments``."""
+    earnings: Dict[str, float] = defaultdict(float)
+    hours: Dict[str, float] = defaultdict(float)
+    deductions: Dict[str, float] = defaultdict(float)
+    contributions: Dict[str, float] = defaultdict(float)
+    employee_taxes: Dict[str, float] = defaultdict(float)
+    employer_taxes: Dict[str, float] = defaultdict(float)
+    taxable_wages: Dict[str, float] = defaultdict(float)
+
+    for payment in payments:
+        for item in payment.get("earnings", []):
+            item_type = item["type"]
+            earnings[item_type] += float(item.get("amount", 0.0))
+            hours[item_type] += float(item.get("hours", 0.0))
+        _sum_line_items(deductions, payment.get("deductions_detail", []))
+        _sum_line_items(contributions, payment.get("contributions_detail", []))
+        _sum_tax_map(employee_taxes, payment.get("employee_taxes", {}))
+        _sum_tax_map(employer_taxes, payment.get("employer_taxes", {}))
+        _sum_tax_map(taxable_wages, payment.get("taxable_wages", {}))
+
+    return _totals_row(
+        _round_dict(earnings),
+        _round_dict(hours),
+        _round_dict(deductions),
+        _round_dict(contributions),
+        _round_dict(employee_taxes),
+        _round_dict(employer_taxes),
+        _round_dict(taxable_wages),
+    )
+
+
+def _aggregate_payment(payment: ReportRow) -> Dict[str, Any]:
+    """``_aggregate_payments([payment])`` without the per-call accumulator setup."""
+    earnings_items = payment.get("earnings", [])
+    deduction_items = payment.get("deductions_detail", [])
+    contribution_items = payment.get("contributions_detail", [])
+    if len({item["type"] for item in earnings_items}) < len(earnings_items) or deduction_items or contribution_items:
+        return _aggregate_payments((payment,))
+    return _totals_row(
+        {item["type"]: round(float(item.get("amount", 0.0)), 2) for item in earnings_items},
+        {item["type"]: round(float(item.get("hours", 0.0)), 2) for item in earnings_items},
+        {},
+        {},
+        _round_map(payment.get("employee_taxes", {})),
+        _round_map(payment.get("employer_taxes", {})),
+        _round_map(payment.get("taxable_wages", {})),
+    )
+
+
 def _quarter_for_date(pay_date: date) -> int:
     return (pay_date.month - 1) // 3 + 1
 
@@ -133,48 +183,60 @@ def payroll_details(payments: Iterable[ReportRow], group_by: str | None = None)
             )
         return rows
 
-    for payment in payment_list:
-        totals = _aggregate_payments([payment])
-        rows.append(
-            {
-                "group_by": "none",
-                "pay_date": payment["pay_date"],
-                "employee_id": payment["employee_id"],
-                "employee_name": payment.get("employee_name", payment["employee_id"]),
-                **totals,
-            }
-        )
-    return rows
+    return list(iter_payment_totals(payment_list))
+
+
+def iter_payment_totals(payments: Iterable[ReportRow]) -> Iterator[ReportRow]:
+    """Ungrouped payroll-details rows, one per payment."""
+    for payment in payments:
+        yield {
+            "group_by": "none",
+            "pay_date": payment["pay_date"],
+            "employee_id": payment["employee_id"],
+            "employee_name": payment.get("employee_name", payment["employee_id"]),
+            **_aggregate_payment(payment),
+        }
+
+
+def iter_payroll_register(payments: Iterable[ReportRow]) -> Iterator[ReportRow]:
+    for payment in payments:
+        yield {
+            "employee_id": payment["employee_id"],
+            "pay_date": payment["pay_date"],
+            "department": payment["department"],
+            "project": payment.get("project"),
+            "gross_pay": payment["gross_pay"],
+            "taxes": payment["taxes"],
+            "deductions": payment["deductions"],
+            "net_pay": payment["net_pay"],
+        }
 
 
 def payroll_register(payments: Iterable[ReportRow]) -> List[ReportRow]:
-    rows: List[ReportRow] = []
+    return list(iter_payroll_register(payments))
+
+
+def iter_payment_detail(payments: Iterable[ReportRow]) -> Iterator[ReportRow]:
     for payment in payments:
-        rows.append(
-            {
-                "employee_id": payment["employee_id"],
-                "pay_date": payment["pay_date"],
-                "department": payment["department"],
-                "project": payment.get("project"),
-                "gross_pay": payment["gross_pay"],
-                "taxes": payment["taxes"],
-                "deductions": payment["deductions"],
-                "net_pay": payment["net_pay"],
-            }
-        )
-    return rows
+        yield {
+            **payment,
+            "allocations": payment.get("allocations", []),
+        }
 
 
 def payment_detail(payments: Iterable[ReportRow]) -> List[ReportRow]:
-    rows: List[ReportRow] = []
-    for payment in payments:
-        rows.append(
-            {
-                **payment,
-                "allocations": payment.get("allocations", []),
-            }
-        )
-    return rows
+    return list(iter_payment_detail(payments))
+
+
+def _deductions_and_taxes_rows(totals: Dict[str, Dict[str, float]]) -> List[ReportRow]:
+    return [
+        {
+            "employee_id": employee_id,
+            "taxes": round(values["taxes"], 2),
+            "deductions": round(values["deductions"], 2),
+        }
+        for employee_id, values in totals.items()
+    ]
 
 
 def deductions_and_taxes_summary(payments: Iterable[ReportRow]) -> List[ReportRow]:
@@ -183,28 +245,24 @@ def deductions_and_taxes_summary(payments: Iterable[ReportRow]) -> List[ReportRo
         employee_totals = totals[payment["employee_id"]]
         employee_totals["taxes"] += payment["taxes"]
         employee_totals["deductions"] += payment["deductions"]
-
-    rows: List[ReportRow] = []
-    for employee_id, values in totals.items():
-        rows.append(
-            {
-                "employee_id": employee_id,
-                "taxes": round(values["taxes"], 2),
-                "deductions": round(values["deductions"], 2),
-            }
-        )
-    return rows
+    return _deductions_and_taxes_rows(totals)
 
 
-def labor_distribution(payments: Iterable[ReportRow]) -> List[ReportRow]:
-    buckets: Dict[str, Dict[str, float]] = defaultdict(lambda: {"hours": 0.0, "wages": 0.0})
+def labor_buckets(
+    payments: Iterable[ReportRow], buckets: Dict[str, Dict[str, float]] | None = None
+) -> Dict[str, Dict[str, float]]:
+    """Unrounded hours and wages per ``department|project``, added onto ``buckets`` when given."""
+    buckets = {} if buckets is None else buckets
     for payment in payments:
         for allocation in payment.get("allocations", []):
             key = f"{allocation['department']}|{allocation['project']}"
-            bucket = buckets[key]
+            bucket = buckets.setdefault(key, {"hours": 0.0, "wages": 0.0})
             bucket["hours"] += allocation.get("hours", 0.0)
             bucket["wages"] += allocation.get("wages", 0.0)
+    return buckets
+
 
+def labor_distribution_rows(buckets: Dict[str, Dict[str, float]]) -> List[ReportRow]:
     rows: List[ReportRow] = []
     for key, totals in buckets.items():
         department, project = key.split("|")
@@ -219,62 +277,128 @@ def labor_distribution(payments: Iterable[ReportRow]) -> List[ReportRow]:
     return rows
 
 
+def labor_distribution(payments: Iterable[ReportRow]) -> List[ReportRow]:
+    return labor_distribution_rows(labor_buckets(payments))
+
+
+def _form_940_row(year: int, taxable_wages: Dict[str, float], employer_taxes: Dict[str, float], gross: float) -> ReportRow:
+    return {
+        "year": year,
+        "futa_taxable_wages": taxable_wages.get("futa", 0.0),
+        "futa_tax": employer_taxes.get("futa", 0.0),
+        "total_gross_wages": round(gross, 2),
+    }
+
+
 def form_940_summary(payments: Iterable[ReportRow], request: ReportRequest) -> List[ReportRow]:
     payment_list = list(payments)
     year = _resolve_year(request, payment_list)
-    rows: List[ReportRow] = []
     year_payments = [p for p in payment_list if p["pay_date"].year == year]
     taxable_wages = _aggregate_tax_map(year_payments, "taxable_wages")
     employer_taxes = _aggregate_tax_map(year_payments, "employer_taxes")
-    rows.append(
-        {
-            "year": year,
-            "futa_taxable_wages": taxable_wages.get("futa", 0.0),
-            "futa_tax": employer_taxes.get("futa", 0.0),
-            "total_gross_wages": round(sum(p["gross_pay"] for p in year_payments), 2),
-        }
-    )
-    return rows
+    return [_form_940_row(year, taxable_wages, employer_taxes, sum(p["gross_pay"] for p in year_payments))]
 
 
-def form_941_summary(payments: Iterable[ReportRow], request: ReportRequest) -> List[ReportRow]:
-    payment_list = list(payments)
-    year = _resolve_year(request, payment_list)
+def _resolve_quarter(request: ReportRequest) -> int:
     quarter = request.quarter
     if quarter is None and request.start_date:
         quarter = _quarter_for_date(request.start_date)
     if quarter is None:
         quarter = 1
+    return quarter
+
+
+def _form_941_row(
+    year: int,
+    quarter: int,
+    taxable_wages: Dict[str, float],
+    employee_taxes: Dict[str, float],
+    employer_taxes: Dict[str, float],
+) -> ReportRow:
+    return {
+        "year": year,
+        "quarter": quarter,
+        "fit_taxable_wages": taxable_wages.get("fit", 0.0),
+        "ss_taxable_wages": taxable_wages.get("ss", 0.0),
+        "medicare_taxable_wages": taxable_wages.get("medicare", 0.0),
+        "employee_fit_tax": employee_taxes.get("fit", 0.0),
+        "employee_ss_tax": employee_taxes.get("ss", 0.0),
+        "employee_medicare_tax": employee_taxes.get("medicare", 0.0),
+        "employer_fit_tax": employer_taxes.get("fit", 0.0),
+        "employer_ss_tax": employer_taxes.get("ss", 0.0),
+        "employer_medicare_tax": employer_taxes.get("medicare", 0.0),
+    }
+
+
+def form_941_summary(payments: Iterable[ReportRow], request: ReportRequest) -> List[ReportRow]:
+    payment_list = list(payments)
+    year = _resolve_year(request, payment_list)
+    quarter = _resolve_quarter(request)
     quarter_payments = [
         p for p in payment_list if p["pay_date"].year == year and _quarter_for_date(p["pay_date"]) == quarter
     ]
     taxable_wages = _aggregate_tax_map(quarter_payments, "taxable_wages")
     employee_taxes = _aggregate_tax_map(quarter_payments, "employee_taxes")
     employer_taxes = _aggregate_tax_map(quarter_payments, "employer_taxes")
-    return [
-        {
-            "year": year,
-            "quarter": quarter,
-            "fit_taxable_wages": taxable_wages.get("fit", 0.0),
-            "ss_taxable_wages": taxable_wages.get("ss", 0.0),
-            "medicare_taxable_wages": taxable_wages.get("medicare", 0.0),
-            "employee_fit_tax": employee_taxes.get("fit", 0.0),
-            "employee_ss_tax": employee_taxes.get("ss", 0.0),
-            "employee_medicare_tax": employee_taxes.get("medicare", 0.0),
-            "employer_fit_tax": employer_taxes.get("fit", 0.0),
-            "employer_ss_tax": employer_taxes.get("ss", 0.0),
-            "employer_medicare_tax": employer_taxes.get("medicare", 0.0),
-        }
-    ]
+    return [_form_941_row(year, quarter, taxable_wages, employee_taxes, employer_taxes)]
+
+
+def _wage_totals_row(section: str, values: List[float], **fields: Any) -> ReportRow:
+    gross, taxable, tax = values
+    return {
+        "section": section,
+        **fields,
+        "gross_wages": round(gross, 2),
+        "taxable_wages": round(taxable, 2),
+        "taxes": round(tax, 2),
+    }
 
 
 def payroll_tax_liabilities(payments: Iterable[ReportRow]) -> List[ReportRow]:
-    payment_list = list(payments)
-    rows: List[ReportRow] = []
-    taxable_wages = _aggregate_tax_map(payment_list, "taxable_wages")
-    employee_taxes = _aggregate_tax_map(payment_list, "employee_taxes")
-    employer_taxes = _aggregate_tax_map(payment_list, "employer_taxes")
+    """Federal totals, then SUTA per employee and state, SUTA per state and FUTA per employee.
+
+    Everything is accumulated in one pass keyed by employee (and state for SUTA);
+    employee names are captured from the first payment seen for each employee.
+    """
+    taxable_totals: Dict[str, float] = defaultdict(float)
+    employee_totals: Dict[str, float] = defaultdict(float)
+    employer_totals: Dict[str, float] = defaultdict(float)
+    names: Dict[str, str] = {}
+    suta: Dict[tuple[str, str], List[float]] = {}
+    suta_by_state: Dict[str, List[float]] = {}
+    futa: Dict[str, List[float]] = {}
 
+    for payment in payments:
+        employee_id = payment["employee_id"]
+        state = payment.get("state", "")
+        taxable_wages = payment.get("taxable_wages", {})
+        employer_taxes = payment.get("employer_taxes", {})
+        _sum_tax_map(taxable_totals, taxable_wages)
+        _sum_tax_map(employee_totals, payment.get("employee_taxes", {}))
+        _sum_tax_map(employer_totals, employer_taxes)
+
+        gross = float(payment["gross_pay"])
+        suta_taxable = float(taxable_wages.get("suta", 0.0))
+        suta_tax = float(employer_taxes.get("suta", 0.0))
+        if employee_id not in names:
+            names[employee_id] = payment.get("employee_name", employee_id)
+            futa[employee_id] = [0.0, 0.0, 0.0]
+        for bucket in (
+            suta.setdefault((employee_id, state), [0.0, 0.0, 0.0]),
+            suta_by_state.setdefault(state, [0.0, 0.0, 0.0]),
+        ):
+            bucket[0] += gross
+            bucket[1] += suta_taxable
+            bucket[2] += suta_tax
+        futa_bucket = futa[employee_id]
+        futa_bucket[0] += gross
+        futa_bucket[1] += float(taxable_wages.get("futa", 0.0))
+        futa_bucket[2] += float(employer_taxes.get("futa", 0.0))
+
+    taxable_wages = _round_dict(taxable_totals)
+    employee_taxes = _round_dict(employee_totals)
+    employer_taxes = _round_dict(employer_totals)
+    rows: List[ReportRow] = []
     for tax_key, label in [("fit", "FIT"), ("ss", "SS"), ("medicare", "Medicare")]:
         ee_tax = employee_taxes.get(tax_key, 0.0)
         er_tax = employer_taxes.get(tax_key, 0.0)
@@ -288,98 +412,64 @@ def payroll_tax_liabilities(payments: Iterable[ReportRow]) -> List[ReportRow]:
                 "total_taxes": round(ee_tax + er_tax, 2),
             }
         )
+    rows.extend(
+        _wage_totals_row("suta", values, employee_id=employee_id, employee_name=names[employee_id], state=state)
+        for (employee_id, state), values in suta.items()
+    )
+    rows.extend(_wage_totals_row("suta_state", values, state=state) for state, values in suta_by_state.items())
+    rows.extend(
+        _wage_totals_row("futa", values, employee_id=employee_id, employee_name=names[employee_id])
+        for employee_id, values in futa.items()
+    )
+    return rows
 
-    suta_rows: Dict[str, Dict[str, float]] = defaultdict(lambda: {"gross": 0.0, "taxable": 0.0, "tax": 0.0})
-    futa_rows: Dict[str, Dict[str, float]] = defaultdict(lambda: {"gross": 0.0, "taxable": 0.0, "tax": 0.0})
-    for payment in payment_list:
-        employee_id = payment["employee_id"]
-        suta_rows[employee_id]["gross"] += float(payment["gross_pay"])
-        suta_rows[employee_id]["taxable"] += float(payment.get("taxable_wages", {}).get("suta", 0.0))
-        suta_rows[employee_id]["tax"] += float(payment.get("employer_taxes", {}).get("suta", 0.0))
-        futa_rows[employee_id]["gross"] += float(payment["gross_pay"])
-        futa_rows[employee_id]["taxable"] += float(payment.get("taxable_wages", {}).get("futa", 0.0))
-        futa_rows[employee_id]["tax"] += float(payment.get("employer_taxes", {}).get("futa", 0.0))
-
-    for employee_id, values in suta_rows.items():
-        rows.append(
-            {
-                "section": "suta",
-                "employee_id": employee_id,
-                "employee_name": next(
-                    (p.get("employee_name") for p in payment_list if p["employee_id"] == employee_id), employee_id
-                ),
-                "gross_wages": round(values["gross"], 2),
-                "taxable_wages": round(values["taxable"], 2),
-                "taxes": round(values["tax"], 2),
-            }
-        )
-
-    for employee_id, values in futa_rows.items():
-        rows.append(
-            {
-                "section": "futa",
-                "employee_id": employee_id,
-                "employee_name": next(
-                    (p.get("employee_name") for p in payment_list if p["employee_id"] == employee_id), employee_id
-                ),
-                "gross_wages": round(values["gross"], 2),
-                "taxable_wages": round(values["taxable"], 2),
-                "taxes": round(values["tax"], 2),
-            }
-        )
 
-    return rows
+def _tax_deposit_row(pay_date: date, employee_taxes: Dict[str, float], employer_taxes: Dict[str, float]) -> ReportRow:
+    fit_total = employee_taxes.get("fit", 0.0) + employer_taxes.get("fit", 0.0)
+    ss_total = employee_taxes.get("ss", 0.0) + employer_taxes.get("ss", 0.0)
+    medicare_total = employee_taxes.get("medicare", 0.0) + employer_taxes.get("medicare", 0.0)
+    suta_total = employer_taxes.get("suta", 0.0)
+    futa_total = employer_taxes.get("futa", 0.0)
+    total = round(fit_total + ss_total + medicare_total + suta_total + futa_total, 2)
+    return {
+        "pay_date": pay_date,
+        "fit_total": round(fit_total, 2),
+        "ss_total": round(ss_total, 2),
+        "medicare_total": round(medicare_total, 2),
+        "suta_total": round(suta_total, 2),
+        "futa_total": round(futa_total, 2),
+        "total_tax_deposit": total,
+    }
 
 
 def tax_deposits(payments: Iterable[ReportRow]) -> List[ReportRow]:
     payment_list = list(payments)
-    rows: List[ReportRow] = []
     grouped: Dict[date, List[ReportRow]] = defaultdict(list)
     for payment in payment_list:
         grouped[payment["pay_date"]].append(payment)
 
-    for pay_date, bucket in sorted(grouped.items(), key=lambda item: item[0]):
-        employee_taxes = _aggregate_tax_map(bucket, "employee_taxes")
-        employer_taxes = _aggregate_tax_map(bucket, "employer_taxes")
-        fit_total = employee_taxes.get("fit", 0.0) + employer_taxes.get("fit", 0.0)
-        ss_total = employee_taxes.get("ss", 0.0) + employer_taxes.get("ss", 0.0)
-        medicare_total = employee_taxes.get("medicare", 0.0) + employer_taxes.get("medicare", 0.0)
-        suta_total = employer_taxes.get("suta", 0.0)
-        futa_total = employer_taxes.get("futa", 0.0)
-        total = round(fit_total + ss_total + medicare_total + suta_total + futa_total, 2)
-        rows.append(
-            {
-                "pay_date": pay_date,
-                "fit_total": round(fit_total, 2),
-                "ss_total": round(ss_total, 2),
-                "medicare_total": round(medicare_total, 2),
-                "suta_total": round(suta_total, 2),
-                "futa_total": round(futa_total, 2),
-                "total_tax_deposit": total,
-            }
+    return [
+        _tax_deposit_row(
+            pay_date,
+            _aggregate_tax_map(bucket, "employee_taxes"),
+            _aggregate_tax_map(bucket, "employer_taxes"),
         )
-    return rows
+        for pay_date, bucket in sorted(grouped.items(), key=lambda item: item[0])
+    ]
 
 
-def w2_w3_summary(payments: Iterable[ReportRow], request: ReportRequest) -> List[ReportRow]:
-    payment_list = list(payments)
-    year = _resolve_year(request, payment_list)
-    year_payments = [p for p in payment_list if p["pay_date"].year == year]
-    grouped: Dict[str, List[ReportRow]] = defaultdict(list)
-    for payment in year_payments:
-        grouped[payment["employee_id"]].append(payment)
-
+def _w2_w3_rows(
+    year: int, employees: Iterable[tuple[str, str, float, Dict[str, float], Dict[str, float]]]
+) -> List[ReportRow]:
     rows: List[ReportRow] = []
     totals = defaultdict(float)
 
-    for employee_id, bucket in grouped.items():
-        taxable_wages = _aggregate_tax_map(bucket, "taxable_wages")
-        employee_taxes = _aggregate_tax_map(bucket, "employee_taxes")
-        gross_wages = round(sum(p["gross_pay"] for p in bucket), 2)
+    for employee_id, employee_name, gross, taxable_wages, employee_taxes in employees:
+        gross_wages = round(gross, 2)
         row = {
             "year": year,
             "employee_id": employee_id,
-            "employee_name": bucket[0].get("employee_name", employee_id),
+            "employee_name": employee_name,
             "gross_wages": gross_wages,
             "fit_wages": taxable_wages.get("fit", 0.0),
             "ss_wages": taxable_wages.get("ss", 0.0),
@@ -414,6 +504,29 @@ def w2_w3_summary(payments: Iterable[ReportRow], request: ReportRequest) -> List
     return rows
 
 
+def w2_w3_summary(payments: Iterable[ReportRow], request: ReportRequest) -> List[ReportRow]:
+    payment_list = list(payments)
+    year = _resolve_year(request, payment_list)
+    year_payments = [p for p in payment_list if p["pay_date"].year == year]
+    grouped: Dict[str, List[ReportRow]] = defaultdict(list)
+    for payment in year_payments:
+        grouped[payment["employee_id"]].append(payment)
+
+    return _w2_w3_rows(
+        year,
+        (
+            (
+                employee_id,
+                bucket[0].get("employee_name", employee_id),
+                sum(p["gross_pay"] for p in bucket),
+                _aggregate_tax_map(bucket, "taxable_wages"),
+                _aggregate_tax_map(bucket, "employee_taxes"),
+            )
+            for employee_id, bucket in grouped.items()
+        ),
+    )
+
+
 def electronic_w2_placeholder(_: Iterable[ReportRow], request: ReportRequest) -> List[ReportRow]:
     year = request.year
     return [
@@ -425,6 +538,103 @@ def electronic_w2_placeholder(_: Iterable[ReportRow], request: ReportRequest) ->
     ]
 
 
+def _resolve_table_year(request: ReportRequest, table: PaymentTable) -> int:
+    if request.year:
+        return request.year
+    if request.start_date:
+        return request.start_date.year
+    if not len(table):
+        raise ValueError("No payments available to resolve reporting year.")
+    return date.fromordinal(table.pay_date[0]).year
+
+
+def _table_positions(table: PaymentTable, start: date, end: date) -> List[int]:
+    """Positions with ``start <= pay_date < end``."""
+    first, stop = start.toordinal(), end.toordinal()
+    return [index for index, ordinal in enumerate(table.pay_date) if first <= ordinal < stop]
+
+
+def _column_sums(columns: Dict[str, Any], positions: Iterable[int]) -> Dict[str, float]:
+    positions = list(positions)
+    if not positions:
+        return {}
+    return {key: sum((column[index] for index in positions), 0.0) for key, column in columns.items()}
+
+
+def _table_deductions_and_taxes(table: PaymentTable, _: ReportRequest) -> List[ReportRow]:
+    return _deductions_and_taxes_rows(
+        group_sums(table.employee_id, {"taxes": table.taxes, "deductions": table.deductions})
+    )
+
+
+def _table_tax_deposits(table: PaymentTable, _: ReportRequest) -> List[ReportRow]:
+    employee_taxes = group_sums(table.pay_date, table.employee_taxes)
+    employer_taxes = group_sums(table.pay_date, table.employer_taxes)
+    return [
+        _tax_deposit_row(
+            date.fromordinal(ordinal),
+            _round_dict(employee_taxes[ordinal]),
+            _round_dict(employer_taxes[ordinal]),
+        )
+        for ordinal in sorted(employee_taxes)
+    ]
+
+
+def _table_form_940(table: PaymentTable, request: ReportRequest) -> List[ReportRow]:
+    year = _resolve_table_year(request, table)
+    positions = _table_positions(table, date(year, 1, 1), date(year + 1, 1, 1))
+    return [
+        _form_940_row(
+            year,
+            _round_dict(_column_sums(table.taxable_wages, positions)),
+            _round_dict(_column_sums(table.employer_taxes, positions)),
+            sum(table.gross_pay[index] for index in positions),
+        )
+    ]
+
+
+def _table_form_941(table: PaymentTable, request: ReportRequest) -> List[ReportRow]:
+    year = _resolve_table_year(request, table)
+    quarter = _resolve_quarter(request)
+    start = date(year, 3 * quarter - 2, 1)
+    end = date(year + quarter // 4, (3 * quarter) % 12 + 1, 1)
+    positions = _table_positions(table, start, end)
+    return [
+        _form_941_row(
+            year,
+            quarter,
+            _round_dict(_column_sums(table.taxable_wages, positions)),
+            _round_dict(_column_sums(table.employee_taxes, positions)),
+            _round_dict(_column_sums(table.employer_taxes, positions)),
+        )
+    ]
+
+
+def _table_w2_w3(table: PaymentTable, request: ReportRequest) -> List[ReportRow]:
+    year = _resolve_table_year(request, table)
+    positions = _table_positions(table, date(year, 1, 1), date(year + 1, 1, 1))
+    keys = table.employee_id
+    gross = group_sum(keys, table.gross_pay, positions)
+    taxable_wages = group_sums(keys, table.taxable_wages, positions)
+    employee_taxes = group_sums(keys, table.employee_taxes, positions)
+    names: Dict[str, str] = {}
+    for index in positions:
+        names.setdefault(keys[index], table.employee_name[index])
+    return _w2_w3_rows(
+        year,
+        (
+            (
+                employee_id,
+                names[employee_id],
+                total,
+                _round_dict(taxable_wages[employee_id]),
+                _round_dict(employee_taxes[employee_id]),
+            )
+            for employee_id, total in gross.items()
+        ),
+    )
+
+
 REPORT_BUILDERS = {
     "payroll-register": payroll_register,
     "payment-detail": payment_detail,
@@ -434,16 +644,189 @@ REPORT_BUILDERS = {
     "tax-deposits": tax_deposits,
 }
 
+TABLE_BUILDERS = {
+    "deductions-taxes-summary": _table_deductions_and_taxes,
+    "tax-deposits": _table_tax_deposits,
+    "form-940": _table_form_940,
+    "form-941": _table_form_941,
+    "w2-w3": _table_w2_w3,
+}
+
+ROLLUP_REPORTS = {"form-940", "form-941", "w2-w3", "tax-deposits"}
+
+# Reports with one row per payment, yielded by ``iter_report`` without building a list.
+STREAMING_BUILDERS = {
+    "payroll-register": iter_payroll_register,
+    "payment-detail": iter_payment_detail,
+    "payroll-details": iter_payment_totals,
+}
+
+_TOTALS_COLUMNS = [
+    "earnings_by_type",
+    "earnings_total",
+    "hours_by_type",
+    "hours_total",
+    "deductions_by_type",
+    "deductions_total",
+    "contributions_by_type",
+    "contributions_total",
+    "employee_taxes",
+    "employee_taxes_total",
+    "employer_taxes",
+    "employer_taxes_total",
+    "taxable_wages",
+]
+
+# Export schemas for the streamed reports; other reports take their columns from their rows.
+REPORT_COLUMNS: Dict[str, List[str]] = {
+    "payroll-register": [
+        "employee_id",
+        "pay_date",
+        "department",
+        "project",
+        "gross_pay",
+        "taxes",
+        "deductions",
+        "net_pay",
+    ],
+    "payment-detail": [
+        "check_id",
+        "employee_id",
+        "employee_name",
+        "pay_date",
+        "gross_pay",
+        "net_pay",
+        "taxes",
+        "deductions",
+        "hours",
+        "department",
+        "project",
+        "pay_schedule",
+        "state",
+        "earnings",
+        "deductions_detail",
+        "contributions_detail",
+        "employee_taxes",
+        "employer_taxes",
+        "taxable_wages",
+        "allocations",
+    ],
+    "payroll-details": ["group_by", "pay_date", "employee_id", "employee_name", *_TOTALS_COLUMNS],
+}
+
+
+def _has_payment_filters(request: ReportRequest) -> bool:
+    return any(
+        (request.start_date, request.end_date, request.pay_schedules, request.departments, request.employee_ids)
+    )
+
+
+def _period_row_values(totals: PeriodTotals | None, field_name: str) -> Dict[str, float]:
+    return _round_dict(getattr(totals, field_name)) if totals is not None else {}
+
+
+def _rollup_report(request: ReportRequest, rollups: PeriodRollups) -> List[ReportRow]:
+    daily = rollups.daily
+    if not _has_payment_filters(request) and request.report_type in ("form-940", "form-941"):
+        year = _resolve_table_year(request, daily)
+        if request.report_type == "form-940":
+            totals = rollups.year_totals(year)
+            return [
+                _form_940_row(
+                    year,
+                    _period_row_values(totals, "taxable_wages"),
+                    _period_row_values(totals, "employer_taxes"),
+                    totals.gross_pay if totals is not None else 0,
+                )
+            ]
+        quarter = _resolve_quarter(request)
+        totals = rollups.quarters.get((year, quarter))
+        return [
+            _form_941_row(
+                year,
+                quarter,
+                _period_row_values(totals, "taxable_wages"),
+                _period_row_values(totals, "employee_taxes"),
+                _period_row_values(totals, "employer_taxes"),
+            )
+        ]
+    table = daily.take(
+        daily.select(
+            start_date=request.start_date,
+            end_date=request.end_date,
+            pay_schedules=request.pay_schedules,
+            departments=request.departments,
+            employee_ids=request.employee_ids,
+        )
+    )
+    return TABLE_BUILDERS[request.report_type](table, request)
+
+
+def _ytd_w2_w3(year: int, ytd: YtdLedger, table: PaymentTable | None = None) -> List[ReportRow]:
+    """W-2/W-3 rows from the ledger, with employees in the order the ``table`` path lists them."""
+    buckets = list(ytd.years(year))
+    if table is not None:
+        order: Dict[str, int] = {}
+        for index in _table_positions(table, date(year, 1, 1), date(year + 1, 1, 1)):
+            order.setdefault(table.employee_id[index], len(order))
+        buckets.sort(key=lambda bucket: order.get(bucket.employee_id, len(order)))
+    return _w2_w3_rows(
+        year,
+        (
+            (
+                bucket.employee_id,
+                bucket.employee_name,
+                bucket.totals.gross,
+                _round_dict(bucket.totals.taxable_wages),
+                _round_dict(bucket.totals.employee_taxes),
+            )
+            for bucket in buckets
+        ),
+    )
+
 
-def build_report(request: ReportRequest, payments: Iterable[ReportRow]) -> List[ReportRow]:
-    filtered = filter_payments(
-        payments,
-        start_date=request.start_date,
-        end_date=request.end_date,
-        pay_schedules=request.pay_schedules,
-        departments=request.departments,
-        employee_ids=request.employee_ids,
+def _select_table(request: ReportRequest, table: PaymentTable) -> PaymentTable:
+    return table.take(
+        table.select(
+            start_date=request.start_date,
+            end_date=request.end_date,
+            pay_schedules=request.pay_schedules,
+            departments=request.departments,
+            employee_ids=request.employee_ids,
+        )
     )
+
+
+def build_report(
+    request: ReportRequest,
+    payments: Iterable[ReportRow] | PaymentTable,
+    rollups: PeriodRollups | None = None,
+    ytd: YtdLedger | None = None,
+) -> List[ReportRow]:
+    """Build ``request`` from payments, a ``PaymentTable`` or, for tax forms, precomputed rollups.
+
+    An unfiltered W-2/W-3 for an explicit year is read straight from the ``ytd`` ledger.
+    """
+    if ytd is not None and request.report_type == "w2-w3" and request.year and not _has_payment_filters(request):
+        order = rollups.daily if rollups is not None else payments if isinstance(payments, PaymentTable) else None
+        return _ytd_w2_w3(request.year, ytd, order)
+    if rollups is not None and request.report_type in ROLLUP_REPORTS:
+        return _rollup_report(request, rollups)
+    if isinstance(payments, PaymentTable):
+        table = _select_table(request, payments)
+        table_builder = TABLE_BUILDERS.get(request.report_type)
+        if table_builder is not None:
+            return table_builder(table, request)
+        filtered = list(table.rows())
+    else:
+        filtered = filter_payments(
+            payments,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            pay_schedules=request.pay_schedules,
+            departments=request.departments,
+            employee_ids=request.employee_ids,
+        )
     if request.report_type == "payroll-details":
         return payroll_details(filtered, group_by=request.group_by)
     if request.report_type == "form-940":
@@ -459,3 +842,34 @@ def build_report(request: ReportRequest, payments: Iterable[ReportRow]) -> List[
     except KeyError as exc:
         raise ValueError(f"Unknown report type: {request.report_type}") from exc
     return builder(filtered)
+
+
+def iter_report(
+    request: ReportRequest,
+    payments: Iterable[ReportRow] | PaymentTable,
+    rollups: PeriodRollups | None = None,
+    ytd: YtdLedger | None = None,
+) -> Iterator[ReportRow]:
+    """Yield the rows of ``build_report(request, ...)``.
+
+    Reports in ``STREAMING_BUILDERS`` (ungrouped for payroll-details) are produced one
+    payment at a time; every other report is an aggregate and is built as usual.
+    """
+    builder = STREAMING_BUILDERS.get(request.report_type)
+    if request.report_type == "payroll-details" and (request.group_by or "none").lower() != "none":
+        builder = None
+    if builder is None:
+        yield from build_report(request, payments, rollups, ytd)
+        return
+    if isinstance(payments, PaymentTable):
+        selected: Iterable[ReportRow] = _select_table(request, payments).rows()
+    else:
+        selected = iter_filtered_payments(
+            payments,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            pay_schedules=request.pay_schedules,
+            departments=request.departments,
+            employee_ids=request.employee_ids,
+        )
+    yield from builder(selected)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from .columnar import TAX_MAP_FIELDS, PaymentTable
+
+ROLLUP_DIR = Path(".report_cache")
+ROLLUP_VERSION = 2
+
+Period = Tuple[int, int]
+
+_NUMERIC_COLUMNS = ("gross_pay", "net_pay", "taxes", "deductions", "hours")
+_TEXT_COLUMNS = ("check_id", "employee_id", "employee_name", "department", "project", "pay_schedule", "state")
+
+
+def store_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+@dataclass
+class PeriodTotals:
+    gross_pay: float = 0.0
+    employee_taxes: Dict[str, float] = field(default_factory=dict)
+    employer_taxes: Dict[str, float] = field(default_factory=dict)
+    taxable_wages: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, other: "PeriodTotals") -> None:
+        self.gross_pay += other.gross_pay
+        for field_name in TAX_MAP_FIELDS:
+            totals = getattr(self, field_name)
+            for key, value in getattr(other, field_name).items():
+                totals[key] = totals.get(key, 0.0) + value
+
+
+@dataclass(frozen=True)
+class PeriodRollups:
+    """Tax-form aggregates computed once per store load.
+
+    ``daily`` holds one row per (employee, pay date) in ``PaymentTable`` form, so it
+    filters and groups like the full table; its line-item tables are left empty.
+    ``quarters`` maps (year, quarter) to the summed gross pay and tax maps.
+    """
+
+    store_hash: str
+    daily: PaymentTable
+    quarters: Dict[Period, PeriodTotals]
+
+    @classmethod
+    def from_table(cls, digest: str, table: PaymentTable) -> "PeriodRollups":
+        daily = PaymentTable.empty()
+        positions: Dict[Tuple[str, int], int] = {}
+        for index, ordinal in enumerate(table.pay_date):
+            key = (table.employee_id[index], ordinal)
+            position = positions.get(key)
+            if position is None:
+                positions[key] = len(daily)
+                daily.pay_date.append(ordinal)
+                for name in _TEXT_COLUMNS:
+                    getattr(daily, name).append(getattr(table, name)[index])
+                for name in _NUMERIC_COLUMNS:
+                    getattr(daily, name).append(getattr(table, name)[index])
+                for field_name in TAX_MAP_FIELDS:
+                    for key_name, column in getattr(table, field_name).items():
+                        getattr(daily, field_name)[key_name].append(column[index])
+                continue
+            for name in _NUMERIC_COLUMNS:
+                getattr(daily, name)[position] += getattr(table, name)[index]
+            for field_name in TAX_MAP_FIELDS:
+                columns = getattr(daily, field_name)
+                for key_name, column in getattr(table, field_name).items():
+                    columns[key_name][position] += column[index]
+        return cls(store_hash=digest, daily=daily, quarters=_quarter_totals(daily))
+
+    def year_totals(self, year: int) -> PeriodTotals | None:
+        totals: PeriodTotals | None = None
+        for quarter in range(1, 5):
+            period = self.quarters.get((year, quarter))
+            if period is None:
+                continue
+            if totals is None:
+                totals = PeriodTotals()
+            totals.add(period)
+        return totals
+
+    def to_json(self) -> Dict[str, Any]:
+        daily = self.daily
+        return {
+            "version": ROLLUP_VERSION,
+            "store_hash": self.store_hash,
+            "daily": {
+                "pay_date": daily.pay_date.tolist(),
+                **{name: getattr(daily, name) for name in _TEXT_COLUMNS},
+                **{name: getattr(daily, name).tolist() for name in _NUMERIC_COLUMNS},
+                **{
+                    field_name: {key: column.tolist() for key, column in getattr(daily, field_name).items()}
+                    for field_name in TAX_MAP_FIELDS
+                },
+            },
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "PeriodRollups":
+        columns = payload["daily"]
+        daily = PaymentTable.empty()
+        daily.pay_date.extend(columns["pay_date"])
+        for name in _TEXT_COLUMNS:
+            getattr(daily, name).extend(columns[name])
+        for name in _NUMERIC_COLUMNS:
+            getattr(daily, name).extend(columns[name])
+        for field_name in TAX_MAP_FIELDS:
+            for key, values in columns[field_name].items():
+                getattr(daily, field_name)[key].extend(values)
+        return cls(store_hash=payload["store_hash"], daily=daily, quarters=_quarter_totals(daily))
+
+
+def _quarter_totals(daily: PaymentTable) -> Dict[Period, PeriodTotals]:
+    periods: Dict[int, Period] = {}
+    totals: Dict[Period, PeriodTotals] = {}
+    for index, ordinal in enumerate(daily.pay_date):
+        period = periods.get(ordinal)
+        if period is None:
+            pay_date = date.fromordinal(ordinal)
+            period = periods[ordinal] = (pay_date.year, (pay_date.month - 1) // 3 + 1)
+        bucket = totals.get(period)
+        if bucket is None:
+            bucket = totals[period] = PeriodTotals()
+        bucket.gross_pay += daily.gross_pay[index]
+        for field_name in TAX_MAP_FIELDS:
+            sums = getattr(bucket, field_name)
+            for key, column in getattr(daily, field_name).items():
+                sums[key] = sums.get(key, 0.0) + column[index]
+    return totals
+
+
+def rollup_dir_for(store_path: Path) -> Path:
+    """The cache directory for ``store_path``: ``ROLLUP_DIR`` beside the store, not the working directory."""
+    return store_path.resolve().parent / ROLLUP_DIR.name
+
+
+def store_key(store_path: Path) -> str:
+    """A short name for ``store_path`` that keeps its cache files apart from other stores'."""
+    return hashlib.sha256(str(store_path.resolve()).encode("utf-8")).hexdigest()[:12]
+
+
+def load_rollups(
+    digest: str, table: PaymentTable, cache_dir: Path | None = ROLLUP_DIR, key: str = "store"
+) -> PeriodRollups:
+    """Return the rollups for the store with content hash ``digest``, building them on a cache miss.
+
+    The cache file is ``rollups-<key>-<digest>.json``; writing it replaces the store's
+    earlier versions (same ``key``) and leaves other stores' files alone. An unreadable
+    file counts as a miss. With ``cache_dir`` of ``None`` nothing is read or written.
+    """
+    if cache_dir is None:
+        return PeriodRollups.from_table(digest, table)
+    path = cache_dir / f"rollups-{key}-{digest}.json"
+    try:
+        with path.open("r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("version") == ROLLUP_VERSION and payload.get("store_hash") == digest:
+            return PeriodRollups.from_json(payload)
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass  # missing, half written by another process, or damaged; rebuilt below
+
+    rollups = PeriodRollups.from_table(digest, table)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=cache_dir, prefix=path.name, suffix=".tmp", delete=False
+    )
+    try:
+        with handle:
+            json.dump(rollups.to_json(), handle)
+        os.replace(handle.name, path)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+    for stale in cache_dir.glob(f"rollups-{key}-*.json"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return rollups
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
+import heapq
+import itertools
 import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from dataclasses import dataclass, asdict
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, List, Iterable
+from typing import Callable, Dict, Any, List, Iterable, Optional, Tuple
 
 from .audit import AuditLogger
+from .columnar import PaymentTable
+from .cron import parse_cron
 from .exporter import export_report
-from .reports import ReportRequest, build_report
+from .incremental import INCREMENTAL_DIR, build_incremental, supports_incremental
+from .reports import REPORT_COLUMNS, ReportRequest, iter_report
+from .rollups import PeriodRollups
+from .ytd import YtdLedger
 
 SCHEDULE_FILE = Path("report_schedules.json")
+# Every schedule runs on one clock, naive UTC: ``last_run`` is stored in it and cron,
+# daily and weekly schedules alike fall due by it (daily and weekly at UTC midnight).
+FREQUENCY_DAYS = {"daily": 1, "weekly": 7}
+# Fields a run updates; the others identify a schedule when run times are merged into the file.
+RUN_FIELDS = ("last_run", "last_duration")
+
+# The schedule file's size and mtime, ``None`` when it does not exist.
+FileState = Optional[Tuple[int, int]]
 
 
 @dataclass
 class Schedule:
     schedule_id: str
     report_type: str
-    frequency: str  # daily or weekly
+    frequency: str  # daily, weekly, or cron
     output_path: str
     last_run: str | None = None
     start_date: str | None = None
@@ -28,27 +48,168 @@ class Schedule:
     group_by: str | None = None
     year: int | None = None
     quarter: int | None = None
+    last_duration: float | None = None
+    cron: str | None = None
+    incremental: bool = False
 
-    def is_due(self, today: date) -> bool:
+    def due_at(self) -> datetime | None:
+        """When the schedule next falls due (naive UTC), ``datetime.min`` if it never ran, ``None`` if never."""
         if not self.last_run:
-            return True
-        last_run_date = datetime.fromisoformat(self.last_run).date()
-        if self.frequency == "daily":
-            return last_run_date < today
-        if self.frequency == "weekly":
-            return last_run_date <= today - timedelta(days=7)
-        return False
+            return datetime.min
+        last_run = datetime.fromisoformat(self.last_run)
+        if self.cron:
+            return parse_cron(self.cron).next_after(last_run)
+        if self.frequency in FREQUENCY_DAYS:
+            return datetime.combine(last_run.date() + timedelta(days=FREQUENCY_DAYS[self.frequency]), datetime.min.time())
+        return None
+
+    def is_due(self, now: datetime) -> bool:
+        """Whether the schedule is due at ``now``, a naive UTC time."""
+        due_at = self.due_at()
+        return due_at is not None and due_at <= now
 
     def next_dates(self) -> tuple[date | None, date | None]:
         start = date.fromisoformat(self.start_date) if self.start_date else None
         end = date.fromisoformat(self.end_date) if self.end_date else None
         return start, end
 
+    def request(self) -> ReportRequest:
+        start_date, end_date = self.next_dates()
+        return ReportRequest(
+            report_type=self.report_type,
+            start_date=start_date,
+            end_date=end_date,
+            pay_schedules=self.pay_schedules,
+            departments=self.departments,
+            employee_ids=self.employee_ids,
+            group_by=self.group_by,
+            year=self.year,
+            quarter=self.quarter,
+        )
+
+    def definition_key(self) -> str:
+        """Canonical text for everything about the schedule except its run history."""
+        return json.dumps(
+            {key: value for key, value in asdict(self).items() if key not in RUN_FIELDS}, sort_keys=True
+        )
+
+    def report_key(self) -> str:
+        """Canonical text for the report this schedule builds, ignoring where it is written.
+
+        Filter lists are sorted and de-duplicated, and empty ones count as no filter, as
+        they do in ``filter_payments``.
+        """
+        start_date, end_date = self.next_dates()
+        return json.dumps(
+            {
+                "report_type": self.report_type,
+                "start_date": start_date.isoformat() if start_date else None,
+                "end_date": end_date.isoformat() if end_date else None,
+                "pay_schedules": sorted(set(self.pay_schedules)) if self.pay_schedules else None,
+                "departments": sorted(set(self.departments)) if self.departments else None,
+                "employee_ids": sorted(set(self.employee_ids)) if self.employee_ids else None,
+                "group_by": self.group_by,
+                "year": self.year,
+                "quarter": self.quarter,
+            },
+            sort_keys=True,
+        )
+
+
+ReportInputs = Tuple[Any, Optional[PeriodRollups], Optional[YtdLedger]]
+
+# Set in each worker process by ``_init_worker``; read-only afterwards.
+_worker_inputs: ReportInputs | None = None
+
+
+def _export_group(group: List[Schedule], inputs: ReportInputs, state_dir: Path) -> List[Tuple[Path, float]]:
+    """Build the report shared by ``group`` once and export it to each schedule's output.
+
+    Returns each output path with the seconds it took: the build plus that export. A
+    report with a single output streams straight into its export, unless it is built
+    incrementally from the state in ``state_dir``.
+    """
+    started = time.perf_counter()
+    payments, rollups, ytd = inputs
+    report_type = group[0].report_type
+    request = group[0].request()
+    rows: Iterable[Dict[str, Any]]
+    if (
+        any(schedule.incremental for schedule in group)
+        and supports_incremental(request)
+        and isinstance(payments, PaymentTable)
+    ):
+        rows = build_incremental(request, group[0].report_key(), payments, rollups, ytd, state_dir)
+    else:
+        rows = iter_report(request, payments, rollups, ytd)
+    if len(group) > 1:
+        rows = list(rows)
+    built = time.perf_counter() - started
+    results = []
+    for schedule in group:
+        export_started = time.perf_counter()
+        output_path = Path(schedule.output_path)
+        export_report(rows, output_path, title=report_type, fieldnames=REPORT_COLUMNS.get(report_type))
+        results.append((output_path, built + time.perf_counter() - export_started))
+    return results
+
+
+def _try_export_group(
+    group: List[Schedule], inputs: ReportInputs, state_dir: Path
+) -> Tuple[List[Tuple[Path, float]] | Exception, float]:
+    """``_export_group``'s results, or the exception it raised, and the seconds it took."""
+    started = time.perf_counter()
+    try:
+        return _export_group(group, inputs, state_dir), time.perf_counter() - started
+    except Exception as exc:
+        return exc, time.perf_counter() - started
+
+
+def _init_worker(payments: Any, rollups: PeriodRollups | None, ytd: YtdLedger | None) -> None:
+    global _worker_inputs
+    _worker_inputs = (payments, rollups, ytd)
+
+
+def _run_in_worker(
+    group: List[Schedule], state_dir: Path
+) -> Tuple[List[Tuple[Path, float]] | Exception, float]:
+    assert _worker_inputs is not None
+    return _try_export_group(group, _worker_inputs, state_dir)
+
 
 class Scheduler:
-    def __init__(self, schedule_path: Path = SCHEDULE_FILE, audit_logger: AuditLogger | None = None):
+    def __init__(
+        self,
+        schedule_path: Path = SCHEDULE_FILE,
+        audit_logger: AuditLogger | None = None,
+        state_dir: Path = INCREMENTAL_DIR,
+    ):
         self.schedule_path = schedule_path
         self.audit = audit_logger or AuditLogger()
+        self.state_dir = state_dir
+        # The file as last read or written here: its state, schedules and each
+        # schedule's index by definition key. ``generation`` counts the reads.
+        self._current: Tuple[FileState, List[Schedule], Dict[str, int]] | None = None
+        self.generation = 0
+
+    def file_state(self) -> FileState:
+        try:
+            stat = self.schedule_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_current(self) -> Tuple[FileState, List[Schedule], Dict[str, int]]:
+        """The schedule file's state and contents, re-read only if it changed since last read or written."""
+        state = self.file_state()
+        if self._current is None or self._current[0] != state:
+            schedules = self._load()
+            index: Dict[str, int] = {}
+            for position, schedule in enumerate(schedules):
+                index.setdefault(schedule.definition_key(), position)
+            self._current = (state, schedules, index)
+            self.generation += 1
+        return self._current
 
     def _load(self) -> List[Schedule]:
         if not self.schedule_path.exists():
@@ -57,11 +218,26 @@ class Scheduler:
             records = json.load(handle)
         return [Schedule(**record) for record in records]
 
-    def _save(self, schedules: Iterable[Schedule]) -> None:
+    def _save(self, schedules: Iterable[Schedule]) -> FileState:
+        """Replace the schedule file atomically, so a crash never leaves it half written.
+
+        Returns the new file's state, taken before the rename so no later write is mistaken for it.
+        """
         payload = [asdict(schedule) for schedule in schedules]
         self.schedule_path.parent.mkdir(parents=True, exist_ok=True)
-        with self.schedule_path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, indent=2)
+        handle = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.schedule_path.parent, prefix=self.schedule_path.name, suffix=".tmp", delete=False
+        )
+        try:
+            with handle:
+                json.dump(payload, handle, indent=2)
+                handle.flush()
+                stat = os.fstat(handle.fileno())
+            os.replace(handle.name, self.schedule_path)
+        except BaseException:
+            Path(handle.name).unlink(missing_ok=True)
+            raise
+        return stat.st_size, stat.st_mtime_ns
 
     def add_schedule(self, schedule: Schedule) -> None:
         schedules = self._load()
@@ -75,48 +251,258 @@ class Scheduler:
     def list_schedules(self) -> List[Schedule]:
         return self._load()
 
-    def run_due_schedules(self, payments: Iterable[Dict[str, Any]]) -> List[Path]:
-        today = date.today()
-        schedules = self._load()
-        outputs: List[Path] = []
+    def _record_runs(self, completed: Iterable[Schedule]) -> None:
+        """Save the run times of ``completed`` into the schedule file as it is now.
 
-        for schedule in schedules:
-            if not schedule.is_due(today):
-                continue
-            start_date, end_date = schedule.next_dates()
-            request = ReportRequest(
-                report_type=schedule.report_type,
-                start_date=start_date,
-                end_date=end_date,
-                pay_schedules=schedule.pay_schedules,
-                departments=schedule.departments,
-                employee_ids=schedule.employee_ids,
-                group_by=schedule.group_by,
-                year=schedule.year,
-                quarter=schedule.quarter,
-            )
-            rows = build_report(request, payments)
-            output_path = Path(schedule.output_path)
-            export_report(rows, output_path, title=schedule.report_type)
-            outputs.append(output_path)
-            schedule.last_run = datetime.utcnow().date().isoformat()
-            self.audit.log(
-                {
-                    "action": "scheduled-run",
-                    "report_type": schedule.report_type,
-                    "output_path": str(output_path),
-                    "filters": {
-                        "start_date": schedule.start_date,
-                        "end_date": schedule.end_date,
-                        "pay_schedules": schedule.pay_schedules,
-                        "departments": schedule.departments,
-                        "employee_ids": schedule.employee_ids,
-                        "group_by": schedule.group_by,
-                        "year": schedule.year,
-                        "quarter": schedule.quarter,
-                    },
-                }
-            )
+        The file is re-read first if anything else changed it, so schedules added,
+        removed or edited while reports were running are kept; a schedule removed or
+        edited meanwhile is left as it is. Each completed schedule is found by its
+        definition key in the index kept with the file's contents.
+        """
+        _, schedules, index = self._load_current()
+        for schedule in completed:
+            position = index.get(schedule.definition_key())
+            if position is not None:
+                stored = schedules[position]
+                stored.last_run, stored.last_duration = schedule.last_run, schedule.last_duration
+        self._current = (self._save(schedules), schedules, index)
 
-        self._save(schedules)
+    def run_due_schedules(
+        self,
+        payments: Iterable[Dict[str, Any]] | PaymentTable,
+        rollups: PeriodRollups | None = None,
+        ytd: YtdLedger | None = None,
+        processes: int | None = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> List[Path]:
+        """Export every schedule due by ``clock`` (naive UTC) and return the output paths in schedule order.
+
+        Schedules with the same ``report_key`` share one build, exported to each of their
+        outputs; the audit entries of all but the first are marked as cache hits. With
+        ``processes`` of 2 or more, reports are built in that many worker processes,
+        each handed the payments, rollups and ledger once when it starts. Each schedule's
+        ``last_run`` and ``last_duration`` are saved as soon as its export finishes. A
+        report that fails is logged and the rest still run; once all are done the first
+        failure is raised, and the failed schedules stay due.
+        """
+        now = clock()
+        due = [schedule for schedule in self._load() if schedule.is_due(now)]
+        if not isinstance(payments, PaymentTable):
+            payments = list(payments)
+        outputs, failures = self._run(due, (payments, rollups, ytd), processes, clock)
+        if failures:
+            raise failures[0]
         return outputs
+
+    def _run(
+        self,
+        due: List[Schedule],
+        inputs: ReportInputs,
+        processes: int | None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ) -> Tuple[List[Path], List[Exception]]:
+        """Export ``due``, recording each schedule's run in the schedule file as its report completes.
+
+        Each report is built on its own: one that fails is logged as a
+        ``scheduled-run-failed`` entry and the others carry on. Returns the outputs of
+        the schedules that completed and the exception of each report that failed.
+        """
+        outputs: List[Path | None] = [None] * len(due)
+        failures: List[Exception] = []
+        groups: Dict[str, List[int]] = {}
+        for index, schedule in enumerate(due):
+            groups.setdefault(schedule.report_key(), []).append(index)
+
+        def finish(indices: List[int], outcome: Tuple[List[Tuple[Path, float]] | Exception, float]) -> None:
+            results, duration = outcome
+            if isinstance(results, Exception):
+                failures.append(results)
+                for index in indices:
+                    self._log_failure(due[index], results, duration)
+                return
+            for position, (index, (output_path, duration)) in enumerate(zip(indices, results)):
+                schedule = due[index]
+                outputs[index] = output_path
+                schedule.last_run = clock().isoformat(timespec="seconds")
+                schedule.last_duration = round(duration, 3)
+                self._log_run(schedule, output_path, duration, cache_hit=position > 0)
+            self._record_runs(due[index] for index in indices)
+
+        try:
+            if not processes or processes < 2 or len(groups) < 2:
+                for indices in groups.values():
+                    finish(indices, _try_export_group([due[index] for index in indices], inputs, self.state_dir))
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=min(processes, len(groups)), initializer=_init_worker, initargs=inputs
+                ) as pool:
+                    pending: Dict[Future, List[int]] = {
+                        pool.submit(_run_in_worker, [due[index] for index in indices], self.state_dir): indices
+                        for indices in groups.values()
+                    }
+                    try:
+                        while pending:
+                            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                indices = pending.pop(future)
+                                try:
+                                    outcome = future.result()
+                                except Exception as exc:  # the worker died or its result did not pickle
+                                    outcome = exc, 0.0
+                                finish(indices, outcome)
+                    except BaseException:
+                        for future in pending:
+                            future.cancel()
+                        raise
+        finally:
+            # The run's audit records are on disk once it ends, failed or not.
+            self.audit.flush()
+        return [path for path in outputs if path is not None], failures
+
+    def _log_failure(self, schedule: Schedule, error: Exception, duration: float) -> None:
+        self.audit.log(
+            {
+                "action": "scheduled-run-failed",
+                "schedule_id": schedule.schedule_id,
+                "report_type": schedule.report_type,
+                "output_path": schedule.output_path,
+                "duration_seconds": round(duration, 3),
+                "error": str(error),
+            }
+        )
+
+    def _log_run(self, schedule: Schedule, output_path: Path, duration: float, cache_hit: bool = False) -> None:
+        self.audit.log(
+            {
+                "action": "scheduled-run",
+                "report_type": schedule.report_type,
+                "output_path": str(output_path),
+                "duration_seconds": round(duration, 3),
+                "cache_hit": cache_hit,
+                "filters": {
+                    "start_date": schedule.start_date,
+                    "end_date": schedule.end_date,
+                    "pay_schedules": schedule.pay_schedules,
+                    "departments": schedule.departments,
+                    "employee_ids": schedule.employee_ids,
+                    "group_by": schedule.group_by,
+                    "year": schedule.year,
+                    "quarter": schedule.quarter,
+                },
+            }
+        )
+
+
+class SchedulerDaemon:
+    """Run schedules as they fall due, instead of on each ``schedule-run``.
+
+    Due times are kept in a heap, so a wake-up pops only the schedules that are due,
+    O(log n) each, rather than checking every schedule. The schedule file is re-read,
+    and the heap rebuilt, only when its size or mtime changes. ``load_inputs`` is called
+    on each wake-up with due work, so reports see the current store; due schedules run
+    through the same path as ``run_due_schedules``, at most ``processes`` at a time.
+    """
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        load_inputs: Callable[[], ReportInputs],
+        processes: int | None = None,
+        poll_interval: float = 30.0,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self.scheduler = scheduler
+        self.load_inputs = load_inputs
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self._queue: List[Tuple[datetime, int, Schedule]] = []
+        self._retry_at: Dict[str, datetime] = {}
+        self._order = itertools.count()
+        self._file_state: FileState = None
+        self._loaded = False
+        self._stopped = threading.Event()
+
+    def _push(self, schedule: Schedule, due_at: datetime | None) -> None:
+        if due_at is not None:
+            heapq.heappush(self._queue, (due_at, next(self._order), schedule))
+
+    def _queue_schedule(self, schedule: Schedule) -> None:
+        """Queue ``schedule`` at its due time, or its retry time if a failed run set a later one."""
+        try:
+            due_at = schedule.due_at()
+        except ValueError as exc:
+            # Written before expressions were checked when added; it can never run.
+            self.scheduler.audit.log(
+                {"action": "scheduled-run-failed", "schedule_id": schedule.schedule_id, "error": str(exc)}
+            )
+            return
+        retry_at = self._retry_at.get(schedule.definition_key())
+        if due_at is not None and retry_at is not None:
+            due_at = max(due_at, retry_at)
+        self._push(schedule, due_at)
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the schedule file if it changed since the last load; returns whether it did."""
+        if self._loaded and self.scheduler.file_state() == self._file_state:
+            return False
+        self._file_state, schedules, _ = self.scheduler._load_current()
+        self._queue = []
+        for schedule in schedules:
+            self._queue_schedule(schedule)
+        self._loaded = True
+        return True
+
+    def run_pending(self) -> List[Path]:
+        """Run every schedule due by now and queue its next run; returns the outputs."""
+        self.reload_if_changed()
+        generation = self.scheduler.generation
+        now = self.clock()
+        due: List[Schedule] = []
+        while self._queue and self._queue[0][0] <= now:
+            due.append(heapq.heappop(self._queue)[2])
+        if not due:
+            return []
+        try:
+            # Failed reports are logged by ``_run`` and retried below, after the others ran.
+            return self.scheduler._run(due, self.load_inputs(), self.processes, self.clock)[0]
+        finally:
+            # Schedules that did not complete are still due; retry them after a poll interval.
+            retry_at = now + timedelta(seconds=self.poll_interval)
+            for schedule in due:
+                key = schedule.definition_key()
+                due_at = schedule.due_at()
+                if due_at is not None and due_at <= now:
+                    self._retry_at[key] = retry_at
+                    due_at = retry_at
+                else:
+                    self._retry_at.pop(key, None)
+                self._push(schedule, due_at)
+            # If only this run's own saves changed the file, the queue is current: only
+            # the schedules that ran were re-queued, O(log n) each. An edit made while it
+            # ran leaves the old state in place, so the next wake-up reloads.
+            current = self.scheduler._current
+            if (
+                self.scheduler.generation == generation
+                and current is not None
+                and current[0] == self.scheduler.file_state()
+            ):
+                self._file_state = current[0]
+
+    def seconds_until_due(self) -> float:
+        """Time to sleep before the next wake-up, at most ``poll_interval``."""
+        if not self._queue:
+            return self.poll_interval
+        waiting = (self._queue[0][0] - self.clock()).total_seconds()
+        return min(self.poll_interval, max(waiting, 0.0))
+
+    def serve_forever(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.run_pending()
+            except Exception as exc:
+                self.scheduler.audit.log({"action": "scheduled-run-failed", "error": str(exc)})
+            self._stopped.wait(self.seconds_until_due())
+
+    def stop(self) -> None:
+        self._stopped.set()
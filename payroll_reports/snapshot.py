@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import stat
+import struct
+import tempfile
+from array import array
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .columnar import PaymentTable
+from .rollups import PeriodRollups, PeriodTotals
+
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_VERSION = 1
+MAGIC = b"PAYSNAP1"
+_HEADER_SIZE = struct.Struct("<Q")
+
+StoreRecord = Dict[str, Any]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """What ``load_store_data`` builds from a store, keyed by the store's size, mtime and hash.
+
+    Array columns are stored as raw bytes and string columns dictionary-encoded, so a
+    load is a memory copy per column plus one list build per string column.
+    """
+
+    store_hash: str
+    employees: List[StoreRecord]
+    pay_types: List[StoreRecord]
+    rejected: List[str]
+    table: PaymentTable
+    rollups: PeriodRollups
+
+
+def snapshot_path(store_path: Path) -> Path:
+    return store_path.with_name(store_path.name + SNAPSHOT_SUFFIX)
+
+
+def _flatten(value: Any, prefix: str, columns: Dict[str, Any]) -> None:
+    """Leaf arrays and string lists of ``value`` by dotted path (``earnings.amount``)."""
+    if isinstance(value, (array, list)):
+        columns[prefix] = value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(item, f"{prefix}.{key}", columns)
+    else:
+        for item in fields(value):
+            _flatten(getattr(value, item.name), f"{prefix}.{item.name}", columns)
+
+
+def _rebuild(template: Any, prefix: str, columns: Dict[str, Any]) -> Any:
+    if isinstance(template, (array, list)):
+        return columns[prefix]
+    if isinstance(template, dict):
+        return {key: _rebuild(item, f"{prefix}.{key}", columns) for key, item in template.items()}
+    return type(template)(
+        **{
+            item.name: _rebuild(getattr(template, item.name), f"{prefix}.{item.name}", columns)
+            for item in fields(template)
+        }
+    )
+
+
+def _encode(values: Any) -> tuple[Dict[str, Any], bytes]:
+    if isinstance(values, array):
+        return {"typecode": values.typecode}, values.tobytes()
+    codes: Dict[Any, int] = {}
+    indices = array("I", (codes.setdefault(value, len(codes)) for value in values))
+    dictionary = json.dumps(list(codes), separators=(",", ":")).encode("utf-8")
+    return {"dictionary": len(dictionary)}, dictionary + indices.tobytes()
+
+
+def write_snapshot(store_path: Path, size: int, mtime_ns: int, snapshot: Snapshot) -> Path:
+    """Write ``snapshot`` next to ``store_path``, replacing any previous one atomically."""
+    columns: Dict[str, Any] = {}
+    _flatten(snapshot.table, "table", columns)
+    _flatten(snapshot.rollups.daily, "daily", columns)
+    layout: Dict[str, Dict[str, Any]] = {}
+    blobs: List[bytes] = []
+    offset = 0
+    for name, values in columns.items():
+        meta, data = _encode(values)
+        layout[name] = {**meta, "offset": offset, "length": len(data)}
+        blobs.append(data)
+        offset += len(data)
+    header = json.dumps(
+        {
+            "version": SNAPSHOT_VERSION,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "store_hash": snapshot.store_hash,
+            "employees": snapshot.employees,
+            "pay_types": snapshot.pay_types,
+            "rejected": snapshot.rejected,
+            "quarters": [[year, quarter, asdict(totals)] for (year, quarter), totals in snapshot.rollups.quarters.items()],
+            "columns": layout,
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+    path = snapshot_path(store_path)
+    handle = tempfile.NamedTemporaryFile("wb", dir=path.parent, prefix=path.name, suffix=".tmp", delete=False)
+    try:
+        with handle:
+            # NamedTemporaryFile creates 0600 files; give the snapshot the store's permissions.
+            os.chmod(handle.name, stat.S_IMODE(store_path.stat().st_mode))
+            handle.write(MAGIC)
+            handle.write(_HEADER_SIZE.pack(len(header)))
+            handle.write(header)
+            handle.writelines(blobs)
+        os.replace(handle.name, path)
+    except BaseException:
+        Path(handle.name).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def _decode(view: mmap.mmap, start: int, meta: Dict[str, Any]) -> Any:
+    begin = start + meta["offset"]
+    end = begin + meta["length"]
+    if "typecode" in meta:
+        values = array(meta["typecode"])
+        values.frombytes(view[begin:end])
+        return values
+    split = begin + meta["dictionary"]
+    dictionary = json.loads(view[begin:split])
+    codes = array("I")
+    codes.frombytes(view[split:end])
+    return [dictionary[code] for code in codes]
+
+
+def read_snapshot(store_path: Path, size: int, mtime_ns: int, store_hash: str | None = None) -> Snapshot | None:
+    """The snapshot for ``store_path`` if it matches the store's size and mtime, or its hash.
+
+    Returns ``None`` when there is no snapshot or it is stale, unreadable or from
+    another version.
+    """
+    path = snapshot_path(store_path)
+    try:
+        with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            if view[: len(MAGIC)] != MAGIC:
+                return None
+            (header_size,) = _HEADER_SIZE.unpack_from(view, len(MAGIC))
+            start = len(MAGIC) + _HEADER_SIZE.size
+            header = json.loads(view[start : start + header_size])
+            if header.get("version") != SNAPSHOT_VERSION:
+                return None
+            unchanged = header["size"] == size and header["mtime_ns"] == mtime_ns
+            if not unchanged and (store_hash is None or header["store_hash"] != store_hash):
+                return None
+            start += header_size
+            columns = {name: _decode(view, start, meta) for name, meta in header["columns"].items()}
+            rollups = PeriodRollups(
+                store_hash=header["store_hash"],
+                daily=_rebuild(PaymentTable.empty(), "daily", columns),
+                quarters={(year, quarter): PeriodTotals(**totals) for year, quarter, totals in header["quarters"]},
+            )
+            return Snapshot(
+                store_hash=header["store_hash"],
+                employees=header["employees"],
+                pay_types=header["pay_types"],
+                rejected=header["rejected"],
+                table=_rebuild(PaymentTable.empty(), "table", columns),
+                rollups=rollups,
+            )
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        return None
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import IO, Any, Dict, Iterable, List, Sequence, Tuple
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.lib.units import inch
-from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+from reportlab.platypus import HRFlowable, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 
 
 ReportRow = Dict[str, Any]
@@ -306,79 +312,71 @@ def _sum_earnings_by_type(lines: Iterable[ReportRow]) -> Dict[str, float]:
     return totals
 
 
-def _sum_year_to_date_earnings_by_type(
-    entries: Iterable[ReportRow],
-    employee: ReportRow,
-    pay_types: Iterable[ReportRow],
-    schedules: Iterable[ReportRow],
-    through_date: str,
-) -> Dict[str, float]:
-    if not through_date:
-        return {"regular": 0.0, "overtime": 0.0, "holiday": 0.0, "pto": 0.0}
-    year = _year_from_date(through_date)
-    totals = {"regular": 0.0, "overtime": 0.0, "holiday": 0.0, "pto": 0.0}
+TimeEntryIndex = Dict[Tuple[Any, str], List[ReportRow]]
+
+
+def _index_time_entries(entries: Iterable[ReportRow]) -> TimeEntryIndex:
+    """Group dated time entries by (employee id, year), keeping store order within each group."""
+    index: TimeEntryIndex = {}
     for entry in entries:
-        if entry.get("employee_id") != employee.get("id"):
-            continue
         entry_end_date = entry.get("end_date")
         if not entry_end_date:
             continue
-        if _year_from_date(entry_end_date) != year:
-            continue
-        if entry_end_date > through_date:
-            continue
-        earnings = _compute_earnings(entry, employee, pay_types)
-        totals = {
-            key: totals[key] + value
-            for key, value in _sum_earnings_by_type(earnings.get("lines") or []).items()
-        }
-    return totals
+        index.setdefault((entry.get("employee_id"), _year_from_date(entry_end_date)), []).append(entry)
+    return index
 
 
 def _sum_year_to_date(
-    entries: Iterable[ReportRow],
+    index: TimeEntryIndex,
+    entry: ReportRow,
     employee: ReportRow,
     pay_types: Iterable[ReportRow],
     schedules: Iterable[ReportRow],
-    through_date: str,
-) -> Tuple[float, Dict[str, float]]:
-    if not through_date:
-        return 0.0, {"fit": 0.0, "ss": 0.0, "medicare": 0.0}
-    year = _year_from_date(through_date)
+) -> Tuple[Dict[str, Any], float, Dict[str, float], Dict[str, float]]:
+    """Compute ``entry``'s earnings with YTD gross, taxes and earnings by type in one pass.
+
+    Prior entries are walked in store order so the SS wage-base cap and the running
+    sums come out exactly as a full scan of the store would.
+    """
+    through_date = entry.get("end_date")
     ytd_gross = 0.0
     ytd_taxes = {"fit": 0.0, "ss": 0.0, "medicare": 0.0}
-    for entry in entries:
-        if entry.get("employee_id") != employee.get("id"):
-            continue
-        entry_end_date = entry.get("end_date")
-        if not entry_end_date:
-            continue
-        if _year_from_date(entry_end_date) != year:
-            continue
-        if entry_end_date > through_date:
-            continue
-        earnings = _compute_earnings(entry, employee, pay_types)
-        taxes = _compute_taxes(earnings["gross"], employee, ytd_gross, schedules)
-        ytd_gross += earnings["gross"]
-        ytd_taxes["fit"] += taxes["fit"]
-        ytd_taxes["ss"] += taxes["ss"]
-        ytd_taxes["medicare"] += taxes["medicare"]
-    return ytd_gross, ytd_taxes
+    ytd_earnings = {"regular": 0.0, "overtime": 0.0, "holiday": 0.0, "pto": 0.0}
+    current = None
+    if through_date:
+        for prior in index.get((employee.get("id"), _year_from_date(through_date)), []):
+            if prior["end_date"] > through_date:
+                continue
+            earnings = _compute_earnings(prior, employee, pay_types)
+            if prior is entry:
+                current = earnings
+            ytd_earnings = {
+                key: ytd_earnings[key] + value
+                for key, value in _sum_earnings_by_type(earnings.get("lines") or []).items()
+            }
+            taxes = _compute_taxes(earnings["gross"], employee, ytd_gross, schedules)
+            ytd_gross += earnings["gross"]
+            ytd_taxes["fit"] += taxes["fit"]
+            ytd_taxes["ss"] += taxes["ss"]
+            ytd_taxes["medicare"] += taxes["medicare"]
+    if current is None:
+        current = _compute_earnings(entry, employee, pay_types)
+    return current, ytd_gross, ytd_taxes, ytd_earnings
 
 
 def build_stub_context(
-    store: ReportRow, setup: ReportRow, entry: ReportRow, employee: ReportRow
+    store: ReportRow,
+    setup: ReportRow,
+    entry: ReportRow,
+    employee: ReportRow,
+    index: TimeEntryIndex | None = None,
 ) -> StubContext:
     pay_types = store.get("pay_types") or DEFAULT_PAY_TYPES
     schedules = setup.get("paySchedules") or []
-    earnings = _compute_earnings(entry, employee, pay_types)
+    if index is None:
+        index = _index_time_entries(store.get("time_entries", []))
+    earnings, ytd_gross, ytd_taxes, ytd_earnings = _sum_year_to_date(index, entry, employee, pay_types, schedules)
     current_earnings = _sum_earnings_by_type(earnings.get("lines") or [])
-    ytd_earnings = _sum_year_to_date_earnings_by_type(
-        store.get("time_entries", []), employee, pay_types, schedules, entry.get("end_date")
-    )
-    ytd_gross, ytd_taxes = _sum_year_to_date(
-        store.get("time_entries", []), employee, pay_types, schedules, entry.get("end_date")
-    )
     taxes = _compute_taxes(earnings["gross"], employee, ytd_gross - earnings["gross"], schedules)
     company = setup.get("company") or {}
     addresses = setup.get("addresses") or []
@@ -462,72 +460,123 @@ def build_stub_context(
     )
 
 
-def build_pdf(context: StubContext, output_path: Path) -> None:
-    styles = getSampleStyleSheet()
-    header_style = ParagraphStyle("stub_header", parent=styles["Heading3"], fontSize=11)
-    body_style = ParagraphStyle("stub_body", parent=styles["Normal"], fontSize=9.5)
+class StubTemplate:
+    """Styles, column widths and static flowables shared by every stub a process renders."""
+
+    def __init__(self) -> None:
+        styles = getSampleStyleSheet()
+        self.header_style = ParagraphStyle("stub_header", parent=styles["Heading3"], fontSize=11)
+        self.body_style = ParagraphStyle("stub_body", parent=styles["Normal"], fontSize=9.5)
+        self.title = Paragraph("Earnings Statement", styles["Title"])
+        self.earnings_heading = Paragraph("Earnings & Summary", self.header_style)
+        self.deductions_heading = Paragraph("Itemized Deductions (Current vs Year-to-Date)", self.header_style)
+        # Keyed by markup: a renderer serves one employer, so this holds a single entry in practice.
+        self._employers: Dict[str, Paragraph] = {}
+
+        self.party_widths = [3.35 * inch, 3.35 * inch]
+        self.metadata_widths = [1.05 * inch, 2.35 * inch, 1.05 * inch, 2.35 * inch]
+        self.amount_widths = [3.3 * inch, 1.5 * inch, 1.5 * inch]
+
+        padding = [
+            ("LEFTPADDING", (0, 0), (-1, -1), 6),
+            ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+            ("TOPPADDING", (0, 0), (-1, -1), 4),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+        ]
+        self.header_table_style = TableStyle(
+            [
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 0),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+                ("TOPPADDING", (0, 0), (-1, -1), 0),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
+            ]
+        )
+        self.metadata_style = TableStyle(
+            [
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                ("BACKGROUND", (0, 0), (0, 0), colors.whitesmoke),
+                ("BACKGROUND", (2, 0), (2, 0), colors.whitesmoke),
+                ("FONTNAME", (0, 0), (0, 0), "Helvetica-Bold"),
+                ("FONTNAME", (2, 0), (2, 0), "Helvetica-Bold"),
+                *padding,
+            ]
+        )
+        # The last three earnings rows are always gross pay, total deductions and net pay.
+        self.earnings_style = TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+                ("LINEABOVE", (0, -3), (-1, -3), 0.9, colors.black),
+                ("LINEABOVE", (0, -2), (-1, -2), 0.9, colors.black),
+                ("LINEABOVE", (0, -1), (-1, -1), 0.9, colors.black),
+                *padding,
+            ]
+        )
+        self.deductions_style = TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
+                ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+                ("LINEABOVE", (0, -1), (-1, -1), 0.9, colors.black),
+                *padding,
+            ]
+        )
+
+    def employer(self, context: StubContext) -> Paragraph:
+        fein_line = f"FEIN: {context.employer_fein}" if context.employer_fein != "—" else ""
+        fein_break = "<br/>" if fein_line else ""
+        markup = (
+            f"<b>{context.employer_name}</b><br/>{context.employer_address_line1}<br/>"
+            f"{context.employer_address_line2}<br/>"
+            f"{context.employer_phone}{fein_break}{fein_line}"
+        )
+        paragraph = self._employers.get(markup)
+        if paragraph is None:
+            paragraph = self._employers[markup] = Paragraph(markup, self.body_style)
+        return paragraph
+
+
+@lru_cache(maxsize=None)
+def stub_template() -> StubTemplate:
+    return StubTemplate()
+
+
+def _stub_story(context: StubContext) -> List[Any]:
+    template = stub_template()
 
-    story: List[Any] = [Paragraph("Earnings Statement", styles["Title"])]
-    fein_line = f"FEIN: {context.employer_fein}" if context.employer_fein != "—" else ""
-    fein_break = "<br/>" if fein_line else ""
+    story: List[Any] = [template.title]
     header_table = Table(
         [
             [
-                Paragraph(
-                    (
-                        f"<b>{context.employer_name}</b><br/>{context.employer_address_line1}<br/>"
-                        f"{context.employer_address_line2}<br/>"
-                        f"{context.employer_phone}{fein_break}{fein_line}"
-                    ),
-                    body_style,
-                ),
+                template.employer(context),
                 Paragraph(
                     (
                         f"<b>{context.employee_name}</b><br/>{context.employee_address_line1}<br/>"
                         f"{context.employee_address_line2}"
                     ),
-                    body_style,
+                    template.body_style,
                 ),
             ]
         ],
-        colWidths=[3.35 * inch, 3.35 * inch],
-    )
-    header_table.setStyle(
-        TableStyle(
-            [
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 0),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-                ("TOPPADDING", (0, 0), (-1, -1), 0),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 0),
-            ]
-        )
+        colWidths=template.party_widths,
     )
+    header_table.setStyle(template.header_table_style)
     story.append(header_table)
     story.append(HRFlowable(width="100%"))
     story.append(Spacer(1, 8))
     metadata_table = Table(
         [["Pay date", context.pay_date, "Pay period", context.pay_period]],
-        colWidths=[1.05 * inch, 2.35 * inch, 1.05 * inch, 2.35 * inch],
-    )
-    metadata_table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                ("BACKGROUND", (0, 0), (0, 0), colors.whitesmoke),
-                ("BACKGROUND", (2, 0), (2, 0), colors.whitesmoke),
-                ("FONTNAME", (0, 0), (0, 0), "Helvetica-Bold"),
-                ("FONTNAME", (2, 0), (2, 0), "Helvetica-Bold"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
+        colWidths=template.metadata_widths,
     )
+    metadata_table.setStyle(template.metadata_style)
     story.append(metadata_table)
     story.append(Spacer(1, 10))
-    story.append(Paragraph("Earnings & Summary", header_style))
+    story.append(template.earnings_heading)
     earnings_rows = [
         ["Description", "Current", "YTD"],
         *[[label, _money(current), _money(ytd)] for label, current, ytd in context.earnings_rows],
@@ -535,61 +584,33 @@ def build_pdf(context: StubContext, output_path: Path) -> None:
         ["Total deductions", _money(context.total_deductions), _money(context.ytd_total_deductions)],
         ["Net pay", _money(context.net_pay), _money(context.ytd_net)],
     ]
-    earnings_table = Table(earnings_rows, colWidths=[3.3 * inch, 1.5 * inch, 1.5 * inch])
-    gross_row = 1 + len(context.earnings_rows)
-    total_deductions_row = gross_row + 1
-    net_pay_row = total_deductions_row + 1
-    earnings_table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-                ("LINEABOVE", (0, gross_row), (-1, gross_row), 0.9, colors.black),
-                ("LINEABOVE", (0, total_deductions_row), (-1, total_deductions_row), 0.9, colors.black),
-                ("LINEABOVE", (0, net_pay_row), (-1, net_pay_row), 0.9, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
+    earnings_table = Table(earnings_rows, colWidths=template.amount_widths)
+    earnings_table.setStyle(template.earnings_style)
     story.append(earnings_table)
 
     story.append(Spacer(1, 12))
     story.append(HRFlowable(width="100%"))
     story.append(Spacer(1, 10))
-    story.append(Paragraph("Itemized Deductions (Current vs Year-to-Date)", header_style))
+    story.append(template.deductions_heading)
     deduction_rows = [
         ["Deduction", "Current", "YTD"],
         *[[label, _money(current), _money(ytd)] for label, current, ytd in context.deduction_rows],
         ["Total deductions", _money(context.total_deductions), _money(context.ytd_total_deductions)],
     ]
-    deductions_table = Table(deduction_rows, colWidths=[3.3 * inch, 1.5 * inch, 1.5 * inch])
-    total_row_index = len(deduction_rows) - 1
-    deductions_table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("ALIGN", (1, 1), (-1, -1), "RIGHT"),
-                ("FONTNAME", (0, total_row_index), (-1, total_row_index), "Helvetica-Bold"),
-                ("LINEABOVE", (0, total_row_index), (-1, total_row_index), 0.9, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-            ]
-        )
-    )
+    deductions_table = Table(deduction_rows, colWidths=template.amount_widths)
+    deductions_table.setStyle(template.deductions_style)
     story.append(deductions_table)
+    return story
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+def _write_pdf(contexts: Sequence[StubContext], target: str | IO[bytes]) -> None:
+    story: List[Any] = []
+    for index, context in enumerate(contexts):
+        if index:
+            story.append(PageBreak())
+        story.extend(_stub_story(context))
     doc = SimpleDocTemplate(
-        str(output_path),
+        target,
         pagesize=letter,
         leftMargin=0.6 * inch,
         rightMargin=0.6 * inch,
@@ -599,32 +620,204 @@ def build_pdf(context: StubContext, output_path: Path) -> None:
     doc.build(story)
 
 
+def build_pdf(context: StubContext, output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_pdf([context], str(output_path))
+
+
+def build_merged_pdf(contexts: Sequence[StubContext], output_path: Path) -> None:
+    """Write every stub into one PDF, one page per stub."""
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_pdf(contexts, str(output_path))
+
+
+def _render_pdf_bytes(contexts: Sequence[StubContext]) -> bytes:
+    buffer = io.BytesIO()
+    _write_pdf(contexts, buffer)
+    return buffer.getvalue()
+
+
+def _archive_name(employee_id: Any) -> str:
+    safe = re.sub(r"[^A-Za-z0-9._-]+", "-", str(employee_id)).strip("-.") or "employee"
+    return f"pay-stubs-{safe}.pdf"
+
+
+def build_stub_zip(
+    contexts_by_employee: Dict[Any, List[StubContext]], output_path: Path, processes: int | None = None
+) -> None:
+    """Write a zip with one PDF per employee, rendering in a process pool when ``processes`` > 1."""
+    groups = list(contexts_by_employee.items())
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        if processes and processes > 1 and len(groups) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                rendered = pool.map(_render_pdf_bytes, [contexts for _, contexts in groups], chunksize=8)
+                for (employee_id, _), pdf in zip(groups, rendered):
+                    archive.writestr(_archive_name(employee_id), pdf)
+        else:
+            for employee_id, contexts in groups:
+                archive.writestr(_archive_name(employee_id), _render_pdf_bytes(contexts))
+
+
 def load_json(path: Path) -> ReportRow:
     if not path.exists():
         return {}
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def _file_version(path: Path) -> Tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class StubRenderer:
+    """Renders stubs from a store/setup pair kept parsed between requests.
+
+    Each file is re-read only when its mtime or size changes; the time-entry index
+    and the entry/employee lookups are rebuilt alongside the store.
+    """
+
+    def __init__(self, store_path: Path, setup_path: Path):
+        self.store_path = store_path
+        self.setup_path = setup_path
+        self._store_version: Tuple[int, int] | None = None
+        self._setup_version: Tuple[int, int] | None = None
+        self._store: ReportRow = {}
+        self._setup: ReportRow = {}
+        self._index: TimeEntryIndex = {}
+        self._entries: Dict[Any, ReportRow] = {}
+        self._employees: Dict[Any, ReportRow] = {}
+        self.loads = 0
+
+    def _refresh(self) -> None:
+        store_version = _file_version(self.store_path)
+        if store_version is None or store_version != self._store_version:
+            self._store = load_json(self.store_path)
+            self._store_version = store_version
+            entries = self._store.get("time_entries", [])
+            self._index = _index_time_entries(entries)
+            self._entries = {}
+            for item in entries:
+                self._entries.setdefault(item.get("id"), item)
+            self._employees = {}
+            for item in self._store.get("employees", []):
+                self._employees.setdefault(item.get("id"), item)
+            self.loads += 1
+        setup_version = _file_version(self.setup_path)
+        if setup_version is None or setup_version != self._setup_version:
+            self._setup = load_json(self.setup_path)
+            self._setup_version = setup_version
+
+    def context(self, entry_id: str) -> StubContext:
+        self._refresh()
+        return self._context(entry_id)
+
+    def _context(self, entry_id: str) -> StubContext:
+        entry = self._entries.get(entry_id)
+        if not entry or entry.get("status") != "paid":
+            raise ValueError("Paid time entry not found.")
+        employee = self._employees.get(entry.get("employee_id"))
+        if not employee:
+            raise ValueError("Employee not found for time entry.")
+        return build_stub_context(self._store, self._setup, entry, employee, self._index)
+
+    def render(self, entry_id: str, output_path: Path) -> None:
+        build_pdf(self.context(entry_id), output_path)
+
+    def select(
+        self,
+        run_id: str | None = None,
+        pay_date: str | None = None,
+        entry_ids: Iterable[str] | None = None,
+    ) -> List[str]:
+        """Entry ids for a payroll run, a pay date and/or explicit ids, in that order without repeats."""
+        self._refresh()
+        selected: Dict[str, None] = {}
+        if run_id:
+            run = next((item for item in self._store.get("payroll_runs", []) if item.get("id") == run_id), None)
+            if not run:
+                raise ValueError("Payroll run not found.")
+            run_entry_ids = run.get("entry_ids") or [
+                item.get("id")
+                for item in self._store.get("time_entries", [])
+                if item.get("start_date") == run.get("start_date") and item.get("end_date") == run.get("end_date")
+            ]
+            for entry_id in run_entry_ids:
+                entry = self._entries.get(entry_id)
+                if entry and entry.get("status") == "paid":
+                    selected[entry_id] = None
+        if pay_date:
+            for entry in self._store.get("time_entries", []):
+                paid_on = (entry.get("paid_at") or entry.get("end_date") or "")[:10]
+                if entry.get("status") == "paid" and paid_on == pay_date:
+                    selected[entry.get("id")] = None
+        for entry_id in entry_ids or []:
+            selected[entry_id] = None
+        return list(selected)
+
+    def render_batch(self, entry_ids: Sequence[str], output_path: Path, processes: int | None = None) -> int:
+        """Render many stubs from one store load: a merged PDF, or a per-employee zip for ``.zip`` paths."""
+        if not entry_ids:
+            raise ValueError("No paid time entries matched.")
+        self._refresh()
+        contexts = [(entry_id, self._context(entry_id)) for entry_id in entry_ids]
+        if output_path.suffix.lower() == ".zip":
+            by_employee: Dict[Any, List[StubContext]] = {}
+            for entry_id, context in contexts:
+                by_employee.setdefault(self._entries[entry_id].get("employee_id"), []).append(context)
+            build_stub_zip(by_employee, output_path, processes)
+        else:
+            build_merged_pdf([context for _, context in contexts], output_path)
+        return len(contexts)
+
+
+def serve(renderer: StubRenderer, requests: IO[str], responses: IO[str]) -> None:
+    """Answer line-delimited JSON requests ``{"id", "entry_id", "output"}`` until EOF.
+
+    Each request gets one response line: ``{"id", "ok": true}`` or ``{"id", "error"}``.
+    """
+    for line in requests:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            renderer.render(request["entry_id"], Path(request["output"]))
+            response: ReportRow = {"id": request_id, "ok": True}
+        except Exception as exc:  # one bad request must not take the worker down
+            response = {"id": request_id, "error": str(exc) or exc.__class__.__name__}
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
 def main() -> None:
-    parser = argparse.ArgumentParser(description="Generate a pay stub PDF from stored payroll data.")
+    parser = argparse.ArgumentParser(description="Generate pay stub PDFs from stored payroll data.")
     parser.add_argument("--store-path", required=True)
     parser.add_argument("--setup-path", required=True)
-    parser.add_argument("--entry-id", required=True)
-    parser.add_argument("--output", required=True)
+    parser.add_argument("--entry-id", action="append", help="Paid time entry id (repeatable)")
+    parser.add_argument("--run-id", help="Render every paid entry in this payroll run")
+    parser.add_argument("--pay-date", help="Render every entry paid on this date (YYYY-MM-DD)")
+    parser.add_argument("--output", help="Output .pdf (all stubs merged) or .zip (one PDF per employee)")
+    parser.add_argument("--processes", type=int, help="Render zip members in this many worker processes")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep running and render stubs for JSON requests read line by line from stdin",
+    )
     args = parser.parse_args()
 
-    store = load_json(Path(args.store_path))
-    setup = load_json(Path(args.setup_path))
-    entries = store.get("time_entries", [])
-    entry = next((item for item in entries if item.get("id") == args.entry_id), None)
-    if not entry or entry.get("status") != "paid":
-        raise ValueError("Paid time entry not found.")
-    employee = next((item for item in store.get("employees", []) if item.get("id") == entry.get("employee_id")), None)
-    if not employee:
-        raise ValueError("Employee not found for time entry.")
-
-    context = build_stub_context(store, setup, entry, employee)
-    build_pdf(context, Path(args.output))
+    renderer = StubRenderer(Path(args.store_path), Path(args.setup_path))
+    if args.serve:
+        serve(renderer, sys.stdin, sys.stdout)
+        return
+    if not (args.entry_id or args.run_id or args.pay_date) or not args.output:
+        parser.error("--output and one of --entry-id, --run-id or --pay-date are required unless --serve is given")
+    entry_ids = renderer.select(run_id=args.run_id, pay_date=args.pay_date, entry_ids=args.entry_id)
+    renderer.render_batch(entry_ids, Path(args.output), args.processes)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from .columnar import PaymentTable
+
+YTD_FILE = Path("ytd_ledger.json")
+YTD_SUFFIX = ".ytd.json"
+YTD_VERSION = 1
+
+PaymentRecord = Dict[str, Any]
+LedgerKey = Tuple[str, int]
+
+
+@dataclass
+class YtdTotals:
+    gross: float = 0.0
+    net: float = 0.0
+    taxes: float = 0.0
+    deductions: float = 0.0
+    employee_taxes: Dict[str, float] = field(default_factory=dict)
+    taxable_wages: Dict[str, float] = field(default_factory=dict)
+    earnings: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_payment(cls, payment: PaymentRecord) -> "YtdTotals":
+        earnings: Dict[str, float] = {}
+        for item in payment.get("earnings", []):
+            earnings[item["type"]] = earnings.get(item["type"], 0.0) + float(item.get("amount", 0.0))
+        return cls(
+            gross=float(payment.get("gross_pay") or 0.0),
+            net=float(payment.get("net_pay") or 0.0),
+            taxes=float(payment.get("taxes") or 0.0),
+            deductions=float(payment.get("deductions") or 0.0),
+            employee_taxes={key: float(value) for key, value in payment.get("employee_taxes", {}).items()},
+            taxable_wages={key: float(value) for key, value in payment.get("taxable_wages", {}).items()},
+            earnings=earnings,
+        )
+
+    def plus(self, other: "YtdTotals") -> "YtdTotals":
+        return YtdTotals(
+            gross=self.gross + other.gross,
+            net=self.net + other.net,
+            taxes=self.taxes + other.taxes,
+            deductions=self.deductions + other.deductions,
+            employee_taxes=_add_maps(self.employee_taxes, other.employee_taxes),
+            taxable_wages=_add_maps(self.taxable_wages, other.taxable_wages),
+            earnings=_add_maps(self.earnings, other.earnings),
+        )
+
+
+def _add_maps(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    totals = dict(left)
+    for key, value in right.items():
+        totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def ledger_path(store_path: Path) -> Path:
+    """Where the ledger for ``store_path`` is kept: beside the store, like its snapshot."""
+    return store_path.with_name(store_path.name + YTD_SUFFIX)
+
+
+def check_key(payment: PaymentRecord) -> str:
+    """Identify a recorded check: its history id, or employee, date and gross for entries without one."""
+    if payment.get("check_id"):
+        return payment["check_id"]
+    return f"{payment['employee_id']}|{payment['pay_date'].isoformat()}|{payment.get('gross_pay')}"
+
+
+@dataclass
+class YtdCheck:
+    check_id: str
+    pay_date: date
+    amounts: YtdTotals
+    ytd: YtdTotals
+
+
+@dataclass
+class EmployeeYear:
+    employee_id: str
+    employee_name: str
+    year: int
+    checks: List[YtdCheck] = field(default_factory=list)
+
+    @property
+    def totals(self) -> YtdTotals:
+        return self.checks[-1].ytd if self.checks else YtdTotals()
+
+    def insert(self, check: YtdCheck) -> int:
+        """Insert ``check`` in pay-date order and re-cumulate the checks after it."""
+        position = len(self.checks)
+        while position and self.checks[position - 1].pay_date > check.pay_date:
+            position -= 1
+        self.checks.insert(position, check)
+        running = self.checks[position - 1].ytd if position else YtdTotals()
+        for later in self.checks[position:]:
+            running = later.ytd = running.plus(later.amounts)
+        return position
+
+
+class YtdLedger:
+    """Running year-to-date totals per employee and calendar year.
+
+    Checks are recorded incrementally; each keeps its own amounts and the YTD totals
+    through it, so both the latest YTD and the YTD as of any check are O(1) lookups.
+    Totals restart each calendar year. ``store_hash`` is the store last synced in.
+    """
+
+    def __init__(self, path: Path = YTD_FILE):
+        self.path = path
+        self.store_hash: str | None = None
+        self._years: Dict[LedgerKey, EmployeeYear] = {}
+        self._checks: Dict[str, YtdCheck] = {}
+
+    @classmethod
+    def from_payments(cls, payments: Iterable[PaymentRecord], path: Path = YTD_FILE) -> "YtdLedger":
+        ledger = cls(path)
+        ledger.record_all(payments)
+        return ledger
+
+    @classmethod
+    def load(cls, path: Path = YTD_FILE) -> "YtdLedger":
+        """The ledger saved at ``path``; empty if it is missing, unreadable or from another version."""
+        ledger = cls(path)
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return ledger
+        if payload.get("version") != YTD_VERSION:
+            return ledger
+        ledger.store_hash = payload.get("store_hash")
+        for record in payload["years"]:
+            for check in record["checks"]:
+                ledger._record(
+                    record["employee_id"],
+                    record["employee_name"],
+                    check["check_id"],
+                    date.fromisoformat(check["pay_date"]),
+                    YtdTotals(**check["amounts"]),
+                )
+        return ledger
+
+    def save(self) -> None:
+        payload = {
+            "version": YTD_VERSION,
+            "store_hash": self.store_hash,
+            "years": [
+                {
+                    "employee_id": year.employee_id,
+                    "employee_name": year.employee_name,
+                    "year": year.year,
+                    "checks": [
+                        {
+                            "check_id": check.check_id,
+                            "pay_date": check.pay_date.isoformat(),
+                            "amounts": asdict(check.amounts),
+                        }
+                        for check in year.checks
+                    ],
+                }
+                for year in self._years.values()
+            ],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handle = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.path.parent, prefix=self.path.name, suffix=".tmp", delete=False
+        )
+        try:
+            with handle:
+                json.dump(payload, handle)
+            os.replace(handle.name, self.path)
+        except BaseException:
+            Path(handle.name).unlink(missing_ok=True)
+            raise
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._checks
+
+    def __len__(self) -> int:
+        return len(self._checks)
+
+    def _record(
+        self, employee_id: str, employee_name: str, key: str, pay_date: date, amounts: YtdTotals
+    ) -> YtdTotals:
+        bucket = self._years.get((employee_id, pay_date.year))
+        if bucket is None:
+            bucket = self._years[(employee_id, pay_date.year)] = EmployeeYear(
+                employee_id, employee_name, pay_date.year
+            )
+        check = YtdCheck(key, pay_date, amounts, amounts)
+        bucket.insert(check)
+        self._checks[key] = check
+        return check.ytd
+
+    def record(self, payment: PaymentRecord) -> YtdTotals:
+        """Add one check and return the YTD totals through it."""
+        return self._record(
+            payment["employee_id"],
+            payment.get("employee_name", payment["employee_id"]),
+            check_key(payment),
+            payment["pay_date"],
+            YtdTotals.from_payment(payment),
+        )
+
+    def record_all(self, payments: Iterable[PaymentRecord]) -> None:
+        for payment in sorted(payments, key=lambda payment: payment["pay_date"]):
+            self.record(payment)
+
+    def rebuild(self, payments: Iterable[PaymentRecord]) -> None:
+        self._years.clear()
+        self._checks.clear()
+        self.record_all(payments)
+
+    def _recorded_as(self, key: str, payment: PaymentRecord) -> bool:
+        """Whether ``key`` is recorded with ``payment``'s employee, name, pay date and amounts."""
+        check = self._checks.get(key)
+        if check is None or check.pay_date != payment["pay_date"]:
+            return False
+        bucket = self._years.get((payment["employee_id"], check.pay_date.year))
+        return (
+            bucket is not None
+            and bucket.employee_name == payment.get("employee_name", payment["employee_id"])
+            and check.amounts == YtdTotals.from_payment(payment)
+        )
+
+    def sync(self, payments: Iterable[PaymentRecord]) -> int:
+        """Record checks not yet in the ledger; rebuild if a recorded check disappeared or changed.
+
+        A check counts as changed when its employee, name, pay date or any amount the
+        ledger keeps differs from what was recorded. Returns the number of checks added
+        (or recorded by the rebuild).
+        """
+        payments = list(payments)
+        new: List[PaymentRecord] = []
+        seen = 0
+        for payment in payments:
+            key = check_key(payment)
+            if key not in self._checks:
+                new.append(payment)
+            elif self._recorded_as(key, payment):
+                seen += 1
+            else:
+                self.rebuild(payments)
+                return len(self._checks)
+        if seen != len(self._checks):
+            self.rebuild(payments)
+            return len(self._checks)
+        self.record_all(new)
+        return len(new)
+
+    def sync_table(self, table: PaymentTable, store_hash: str | None = None) -> int:
+        """``sync`` for a ``PaymentTable`` loaded from the store hashing to ``store_hash``."""
+        changed = self.sync(table.rows())
+        self.store_hash = store_hash
+        return changed
+
+    def totals(self, employee_id: str, year: int) -> YtdTotals:
+        bucket = self._years.get((employee_id, year))
+        return bucket.totals if bucket is not None else YtdTotals()
+
+    def through(self, payment: PaymentRecord) -> YtdTotals:
+        """YTD totals including ``payment``, which must already be recorded."""
+        return self._checks[check_key(payment)].ytd
+
+    def years(self, year: int) -> Iterator[EmployeeYear]:
+        return (bucket for (_, bucket_year), bucket in self._years.items() if bucket_year == year)
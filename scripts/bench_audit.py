@@ -0,0 +1,87 @@
+"""Measure audit-log throughput (events/sec) and filtered read time.
+
+Writes the same events with one open/write/close per event (the old logger) and
+with ``AuditLogger`` under each fsync policy, then compares a full parse of the
+log with an indexed, filtered page read, and a full hash-chain verification with
+an incremental one after a few more events.
+
+    python scripts/bench_audit.py [--events 100000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from payroll_reports.audit import AuditLogger, verify_log  # noqa: E402
+
+
+def event(index: int) -> dict:
+    return {
+        "action": "scheduled-run" if index % 50 == 0 else "run-report",
+        "report_type": "payroll-register",
+        "output_path": f"out/report-{index}.csv",
+        "filters": {"start_date": None, "end_date": None, "departments": ["Ops"]},
+    }
+
+
+def open_per_event(path: Path, count: int) -> None:
+    for index in range(count):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        record = {**event(index), "timestamp": datetime.utcnow().isoformat()}
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record) + "\n")
+
+
+def buffered(path: Path, count: int, fsync: str) -> None:
+    with AuditLogger(path, fsync=fsync, max_bytes=16 * 1024 * 1024) as logger:
+        for index in range(count):
+            logger.log(event(index))
+
+
+def rate(label: str, count: int, action) -> None:
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    print(f"{label:32s} {count / elapsed:12,.0f} events/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+    count = args.events
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        rate("open/write/close per event", count, lambda: open_per_event(root / "old" / "audit.jsonl", count))
+        rate("fsync=always", min(count, 2000), lambda: buffered(root / "always" / "audit.jsonl", min(count, 2000), "always"))
+        for policy in ("batch", "never"):
+            rate(f"fsync={policy} (batches of 256)", count, lambda: buffered(root / policy / "audit.jsonl", count, policy))
+
+        logger = AuditLogger(root / "batch" / "audit.jsonl")
+        started = time.perf_counter()
+        total = len(logger.read())
+        print(f"{'read all (' + str(total) + ')':32s} {time.perf_counter() - started:12.3f}s")
+        started = time.perf_counter()
+        page = logger.read(action="scheduled-run", offset=count // 100, limit=20)
+        print(f"{'scheduled-run page of ' + str(len(page)):32s} {time.perf_counter() - started:12.3f}s")
+
+        started = time.perf_counter()
+        result = verify_log(root / "batch" / "audit.jsonl", full=True)
+        print(f"{'verify all (' + str(result.records) + ')':32s} {time.perf_counter() - started:12.3f}s")
+        buffered(root / "batch" / "audit.jsonl", 1000, "batch")
+        started = time.perf_counter()
+        result = verify_log(root / "batch" / "audit.jsonl")
+        print(f"{'verify since last (' + str(result.records) + ')':32s} {time.perf_counter() - started:12.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare CSV and columnar (.pcol) exports of a synthetic payroll register.
+
+Builds the register rows once, then reports write time, file size and full
+re-read time for each format, plus a projected, date-filtered columnar read.
+
+    python scripts/bench_export.py [--payments 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_reports import synthetic_store  # noqa: E402
+from payroll_reports.colfile import ColfileReader  # noqa: E402
+from payroll_reports.columnar import PaymentTable  # noqa: E402
+from payroll_reports.data import build_payments  # noqa: E402
+from payroll_reports.exporter import export_report  # noqa: E402
+from payroll_reports.reports import REPORT_COLUMNS, ReportRequest, iter_report  # noqa: E402
+
+
+def timed(label: str, action) -> None:
+    started = time.perf_counter()
+    action()
+    print(f"{label:32s} {time.perf_counter() - started:8.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=1_000_000)
+    parser.add_argument("--employees", type=int, default=2000)
+    args = parser.parse_args()
+
+    table = PaymentTable.from_payments(build_payments(synthetic_store(args.payments, args.employees)))
+    request = ReportRequest("payroll-register")
+    columns = REPORT_COLUMNS["payroll-register"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, pcol_path = Path(tmp) / "register.csv", Path(tmp) / "register.pcol"
+        rows = []
+        timed("build register rows", lambda: rows.extend(iter_report(request, table)))
+        timed("write csv", lambda: export_report(rows, csv_path, "register", columns))
+        timed("write pcol", lambda: export_report(rows, pcol_path, "register", columns))
+        print(f"{'size csv':32s} {csv_path.stat().st_size / 1e6:8.1f} MB")
+        print(f"{'size pcol':32s} {pcol_path.stat().st_size / 1e6:8.1f} MB")
+
+        def read_csv() -> None:
+            with csv_path.open(newline="", encoding="utf-8") as handle:
+                for row in csv.DictReader(handle):
+                    float(row["gross_pay"])
+                    date.fromisoformat(row["pay_date"])
+
+        def read_pcol() -> None:
+            with ColfileReader(pcol_path) as reader:
+                reader.read()
+
+        def read_projected() -> None:
+            with ColfileReader(pcol_path) as reader:
+                reader.read(["employee_id", "gross_pay"], start_date=date(2023, 1, 1), end_date=date(2023, 12, 31))
+
+        timed("re-read csv (typed)", read_csv)
+        timed("re-read pcol", read_pcol)
+        timed("pcol 2 columns, one year", read_projected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Time report builders over a synthetic payroll history.
+
+    python scripts/bench_reports.py --payments 1000000 --report payroll-details
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from payroll_reports.data import build_payments  # noqa: E402
+from payroll_reports.reports import ReportRequest, build_report  # noqa: E402
+
+STATES = ["FL", "GA", "NY", "CA", "TX"]
+
+
+def synthetic_store(payments: int, employees: int, seed: int = 11) -> dict:
+    rng = random.Random(seed)
+    store = {
+        "employees": [
+            {
+                "id": f"e{index}",
+                "name": f"Employee {index}",
+                "department": rng.choice(["Ops", "Engineering", "Sales"]),
+                "pay_schedule": rng.choice(["Biweekly", "Monthly"]),
+                "state": rng.choice(STATES),
+            }
+            for index in range(employees)
+        ],
+        "pay_types": [{"id": "regular", "name": "Regular"}, {"id": "overtime", "name": "Overtime"}],
+        "payroll_history": [],
+    }
+    start = date(2020, 1, 3)
+    history = store["payroll_history"]
+    for index in range(payments):
+        gross = round(rng.uniform(500, 4000), 2)
+        history.append(
+            {
+                "entry_type": "check",
+                "employee_id": f"e{index % employees}",
+                "check_date": (start + timedelta(days=14 * (index // employees))).isoformat(),
+                "gross": gross,
+                "net": round(gross * 0.78, 2),
+                "taxes": round(gross * 0.22, 2),
+                "fit": round(gross * 0.12, 2),
+                "employee_ss": round(gross * 0.062, 2),
+                "employee_medicare": round(gross * 0.0145, 2),
+                "employer_ss": round(gross * 0.062, 2),
+                "employer_medicare": round(gross * 0.0145, 2),
+                "futa": round(gross * 0.006, 2),
+                "suta": round(gross * 0.027, 2),
+                "pay_lines": {
+                    "regular": {"hours": 80, "amount": gross - 150},
+                    "overtime": {"hours": 2, "amount": 150},
+                },
+            }
+        )
+    return store
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--report", action="append", help="Report type (repeatable)")
+    parser.add_argument("--group-by", choices=["pay_date", "employee", "none"])
+    parser.add_argument("--year", type=int)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    payments = build_payments(synthetic_store(args.payments, args.employees))
+    print(f"built {len(payments)} payments in {time.perf_counter() - started:.2f}s")
+    for report_type in args.report or ["payroll-details"]:
+        request = ReportRequest(report_type=report_type, group_by=args.group_by, year=args.year)
+        started = time.perf_counter()
+        rows = build_report(request, payments)
+        print(f"{report_type:28s} {time.perf_counter() - started:8.2f}s  {len(rows)} rows")
+
+
+if __name__ == "__main__":
+    main()
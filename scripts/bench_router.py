@@ -0,0 +1,93 @@
+"""Micro-benchmark of route resolution for the admin app in ``app.py``.
+
+Builds a realistic table of several hundred routes (resource collections,
+``<int:id>`` members and nested actions) and compares the compiled trie
+``Router`` against the previous approach of trying each route pattern in turn.
+
+    python scripts/bench_router.py [--resources 60] [--number 200000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import Router  # noqa: E402
+
+ACTIONS = ["edit", "history", "audit", "compensation", "pto-usage", "documents"]
+
+
+def build_routes(resources: int) -> list[tuple[str, str]]:
+    routes: list[tuple[str, str]] = []
+    for index in range(resources):
+        base = f"/resource-{index}"
+        routes.append(("GET", base))
+        routes.append(("POST", f"{base}/new"))
+        routes.append(("GET", f"{base}/<int:record_id>"))
+        for action in ACTIONS:
+            routes.append(("POST", f"{base}/<int:record_id>/{action}"))
+    return routes
+
+
+def sample_paths(routes: list[tuple[str, str]], count: int) -> list[tuple[str, str]]:
+    rng = random.Random(7)
+    samples = []
+    for _ in range(count):
+        method, pattern = rng.choice(routes)
+        samples.append((method, pattern.replace("<int:record_id>", str(rng.randint(1, 99999)))))
+    return samples
+
+
+def build_linear(routes: list[tuple[str, str]]):
+    compiled = [
+        (method, re.compile("^" + re.sub(r"<int:(\w+)>", r"(?P<\1>\\d+)", pattern) + "$"))
+        for method, pattern in routes
+    ]
+
+    def resolve(method: str, path: str):
+        for route_method, regex in compiled:
+            match = regex.match(path)
+            if match and route_method == method:
+                return route_method, {key: int(value) for key, value in match.groupdict().items()}
+        return None
+
+    return resolve
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resources", type=int, default=60)
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    routes = build_routes(args.resources)
+    router = Router()
+    for method, pattern in routes:
+        router.add(method, pattern, pattern)
+    linear = build_linear(routes)
+    paths = sample_paths(routes, 1000)
+
+    def run_router():
+        for method, path in paths:
+            router.resolve(method, path)
+
+    def run_linear():
+        for method, path in paths:
+            linear(method, path)
+
+    loops = max(args.number // len(paths), 1)
+    print(f"{len(routes)} routes, {loops * len(paths)} resolutions each")
+    for label, func in [("trie router", run_router), ("linear scan", run_linear)]:
+        seconds = min(timeit.repeat(func, number=loops, repeat=3))
+        per_call = seconds / (loops * len(paths)) * 1e6
+        print(f"{label:12s} {per_call:8.2f} us/resolve")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measure pay-stub throughput (stubs/sec) for both stub renderers.
+
+Reports story construction on its own and full rendering to an in-memory PDF,
+for ``pay_stub`` (check stubs) and ``web_stub_export`` (earnings statements).
+
+    python scripts/bench_stub_render.py [--stubs 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from payroll_reports import pay_stub, web_stub_export  # noqa: E402
+
+
+def check_stub_contexts(count: int) -> list:
+    contexts = []
+    for index in range(count):
+        pay_date = date(2024, 1, 5) + timedelta(days=14 * (index % 26))
+        contexts.append(
+            pay_stub.StubContext(
+                employee_id=f"e{index % 50}",
+                employee_name=f"Employee {index % 50}",
+                employee_address_1="456 Main St",
+                employee_address_2="Orlando, FL 32803",
+                department="Ops",
+                pay_schedule="Biweekly",
+                pay_date=pay_date,
+                pay_period_start=pay_date - timedelta(days=13),
+                pay_period_end=pay_date,
+                hours=80.0,
+                gross_pay=2000.0 + index,
+                taxes=300.0,
+                deductions=50.0,
+                net_pay=1650.0 + index,
+                ytd_gross=20000.0,
+                ytd_taxes=3000.0,
+                ytd_deductions=500.0,
+                ytd_net=16500.0,
+            )
+        )
+    return contexts
+
+
+def web_stub_contexts(count: int) -> list:
+    return [
+        web_stub_export.StubContext(
+            employer_name="Acme Services, LLC",
+            employer_address_line1="123 Business Rd",
+            employer_address_line2="Orlando, FL 32801",
+            employer_phone="(407) 555-0199",
+            employer_fein="12-3456789",
+            employee_name=f"Employee {index % 50}",
+            employee_address_line1="456 Main St",
+            employee_address_line2="Orlando, FL 32803",
+            pay_date="Jan 05, 2024",
+            pay_period="Dec 23, 2023 - Jan 05, 2024",
+            pay_rate_label="$25.00/hr",
+            gross_pay=2000.0 + index,
+            total_taxes=300.0,
+            net_pay=1700.0 + index,
+            ytd_gross=20000.0,
+            ytd_taxes=3000.0,
+            ytd_net=17000.0,
+            earnings_rows=[("Regular", 1800.0, 18000.0), ("Vacation", 200.0, 2000.0)],
+            deduction_rows=[("Federal income tax", 150.0, 1500.0), ("Social Security", 124.0, 1240.0)],
+            total_deductions=300.0,
+            ytd_total_deductions=3000.0,
+        )
+        for index in range(count)
+    ]
+
+
+def rate(label: str, count: int, action) -> None:
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    print(f"{label:28s} {count / elapsed:10.1f} stubs/sec  ({elapsed:.2f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stubs", type=int, default=2000)
+    args = parser.parse_args()
+
+    checks = check_stub_contexts(args.stubs)
+    rate("check stub story", args.stubs, lambda: [pay_stub._build_stub_story(context) for context in checks])
+    rate("check stub render", args.stubs, lambda: pay_stub._render_chunk(checks))
+
+    statements = web_stub_contexts(args.stubs)
+    rate("web stub story", args.stubs, lambda: [web_stub_export._stub_story(context) for context in statements])
+    rate("web stub render", args.stubs, lambda: web_stub_export._render_pdf_bytes(statements))
+
+
+if __name__ == "__main__":
+    main()
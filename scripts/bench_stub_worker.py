@@ -0,0 +1,134 @@
+"""Compare pay-stub latency: one Python process per PDF versus the ``--serve`` worker.
+
+Writes a synthetic store with ``--entries`` paid time entries, then renders
+``--stubs`` of them both ways and reports per-stub latency.
+
+    python scripts/bench_stub_worker.py [--entries 5000] [--stubs 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODULE = ["-m", "payroll_reports.web_stub_export"]
+
+
+def write_store(directory: Path, entries: int, employees: int = 50, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    store = {
+        "employees": [
+            {"id": f"e{index}", "name": f"Employee {index}", "pay_rate": 25 + index, "pay_schedule": "Biweekly"}
+            for index in range(employees)
+        ],
+        "time_entries": [],
+    }
+    start = date(2024, 1, 5)
+    for index in range(entries):
+        end = start + timedelta(days=14 * (index // employees))
+        store["time_entries"].append(
+            {
+                "id": f"t{index}",
+                "employee_id": f"e{index % employees}",
+                "start_date": (end - timedelta(days=13)).isoformat(),
+                "end_date": end.isoformat(),
+                "status": "paid",
+                "hours": {"regular": 80, "vacation": rng.choice([0, 8])},
+            }
+        )
+    (directory / "store.json").write_text(json.dumps(store), encoding="utf-8")
+    (directory / "setup.json").write_text(json.dumps({}), encoding="utf-8")
+    return [entry["id"] for entry in store["time_entries"]]
+
+
+def bench_spawn(directory: Path, entry_ids: list[str]) -> list[float]:
+    timings = []
+    for entry_id in entry_ids:
+        started = time.perf_counter()
+        subprocess.run(
+            [
+                sys.executable,
+                *MODULE,
+                "--store-path",
+                str(directory / "store.json"),
+                "--setup-path",
+                str(directory / "setup.json"),
+                "--entry-id",
+                entry_id,
+                "--output",
+                str(directory / f"spawn-{entry_id}.pdf"),
+            ],
+            cwd=ROOT,
+            check=True,
+        )
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_worker(directory: Path, entry_ids: list[str]) -> tuple[float, list[float]]:
+    started = time.perf_counter()
+    worker = subprocess.Popen(
+        [
+            sys.executable,
+            *MODULE,
+            "--serve",
+            "--store-path",
+            str(directory / "store.json"),
+            "--setup-path",
+            str(directory / "setup.json"),
+        ],
+        cwd=ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    timings = []
+    for index, entry_id in enumerate(entry_ids):
+        request_started = time.perf_counter()
+        request = {"id": index, "entry_id": entry_id, "output": str(directory / f"worker-{entry_id}.pdf")}
+        worker.stdin.write(json.dumps(request) + "\n")
+        worker.stdin.flush()
+        response = json.loads(worker.stdout.readline())
+        if not response.get("ok"):
+            raise RuntimeError(response.get("error"))
+        timings.append(time.perf_counter() - request_started)
+    worker.stdin.close()
+    worker.wait()
+    return time.perf_counter() - started, timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    print(
+        f"{label:18s} mean {statistics.mean(timings) * 1000:8.1f} ms"
+        f"  p50 {statistics.median(timings) * 1000:8.1f} ms  max {max(timings) * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--stubs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        entry_ids = write_store(directory, args.entries)
+        sample = random.Random(1).sample(entry_ids, min(args.stubs, len(entry_ids)))
+        report("spawn per stub", bench_spawn(directory, sample))
+        total, timings = bench_worker(directory, sample)
+        report("worker (first)", timings[:1])
+        report("worker (warm)", timings[1:] or timings)
+        print(f"worker total {total:.2f}s for {len(sample)} stubs")
+
+
+if __name__ == "__main__":
+    main()
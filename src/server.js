@@ -2,7 +2,6 @@ const http = require('http');
 const fs = require('fs');
 const path = require('path');
 const os = require('os');
-const { spawn } = require('child_process');
 const { randomUUID } = require('crypto');
 const {
   validatePartialSetup,
@@ -10,6 +9,7 @@ const {
   STATES
 } = require('./validators');
 const { loadSetup, saveSetup, appendAuditEvent, loadAuditLog } = require('./storage');
+const { createStubWorker } = require('./stubWorker');
 
 const ADMIN_TOKEN = process.env.ADMIN_TOKEN || 'changeme';
 const PORT = process.env.PORT || 3000;
@@ -55,36 +55,22 @@ function sendFile(res, filePath) {
   fs.createReadStream(filePath).pipe(res);
 }
 
+const stubWorker = createStubWorker({
+  pythonPath: process.env.PAYROLL_PDF_PYTHON || 'python3',
+  storePath: DATA_STORE_PATH,
+  setupPath: path.join(DATA_DIR, 'setup.json')
+});
+
 function runStubPdfExport({ entryId }) {
-  return new Promise((resolve, reject) => {
-    const tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'paystub-'));
-    const outputPath = path.join(tempDir, `pay-stub-${entryId}.pdf`);
-    const setupPath = path.join(DATA_DIR, 'setup.json');
-    const scriptArgs = [
-      '-m',
-      'payroll_reports.web_stub_export',
-      '--store-path',
-      DATA_STORE_PATH,
-      '--setup-path',
-      setupPath,
-      '--entry-id',
-      entryId,
-      '--output',
-      outputPath
-    ];
-    const pythonPath = process.env.PAYROLL_PDF_PYTHON || 'python3';
-    const childProcess = spawn(pythonPath, scriptArgs, { stdio: 'pipe' });
-    let stderr = '';
-    childProcess.stderr.on('data', (chunk) => {
-      stderr += chunk.toString();
+  const tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'paystub-'));
+  const outputPath = path.join(tempDir, `pay-stub-${entryId}.pdf`);
+  return stubWorker
+    .render({ entryId, outputPath })
+    .then(() => ({ outputPath, tempDir }))
+    .catch((error) => {
+      fs.rm(tempDir, { recursive: true, force: true }, () => undefined);
+      throw error;
     });
-    childProcess.on('close', (code) => {
-      if (code !== 0) {
-        return reject(new Error(stderr || 'PDF generation failed.'));
-      }
-      return resolve({ outputPath, tempDir });
-    });
-  });
 }
 
 function requireAdmin(req, res) {
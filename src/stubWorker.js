@@ -0,0 +1,126 @@
+const { spawn } = require('child_process');
+const readline = require('readline');
+
+// Keeps one `payroll_reports.web_stub_export --serve` process alive and sends it
+// one JSON line per stub. The worker keeps store.json/setup.json parsed between
+// requests, so a stub no longer pays interpreter startup and the reportlab import.
+//
+// The worker renders one stub at a time, so requests wait in a FIFO and only the
+// one in flight is written to it. `requestTimeoutMs` limits that render alone;
+// `queueTimeoutMs` limits how long a request may wait for its turn.
+function createStubWorker({ pythonPath, storePath, setupPath, requestTimeoutMs = 30000, queueTimeoutMs = 120000 }) {
+  let child = null;
+  let nextId = 1;
+  let inFlight = null;
+  const queue = [];
+
+  function settle(request, error) {
+    clearTimeout(request.timer);
+    if (error) request.reject(error);
+    else request.resolve();
+  }
+
+  // Sends the next queued request once the previous one has been answered.
+  function pump() {
+    if (inFlight || queue.length === 0) return;
+    const request = queue.shift();
+    clearTimeout(request.timer);
+    if (!child) child = start();
+    request.proc = child;
+    request.timer = setTimeout(() => timeOut(request), requestTimeoutMs);
+    inFlight = request;
+    child.stdin.write(request.message);
+  }
+
+  function finish(request, error) {
+    if (inFlight !== request) return;
+    inFlight = null;
+    settle(request, error);
+    pump();
+  }
+
+  function start() {
+    const args = [
+      '-m',
+      'payroll_reports.web_stub_export',
+      '--serve',
+      '--store-path',
+      storePath,
+      '--setup-path',
+      setupPath
+    ];
+    const proc = spawn(pythonPath, args, { stdio: ['pipe', 'pipe', 'pipe'] });
+    let stderr = '';
+    proc.stderr.on('data', (chunk) => {
+      stderr = (stderr + chunk.toString()).slice(-4000);
+    });
+    readline.createInterface({ input: proc.stdout }).on('line', (line) => {
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (error) {
+        return;
+      }
+      if (!inFlight || inFlight.proc !== proc || inFlight.id !== response.id) return;
+      finish(inFlight, response.ok ? null : new Error(response.error || 'PDF generation failed.'));
+    });
+    // A worker that dies fails only the request it was rendering; the queue moves
+    // on to a fresh worker.
+    proc.on('error', (error) => {
+      if (child === proc) child = null;
+      if (inFlight && inFlight.proc === proc) finish(inFlight, error);
+    });
+    proc.on('close', (code) => {
+      if (child === proc) child = null;
+      if (inFlight && inFlight.proc === proc) {
+        finish(inFlight, new Error(stderr || `Pay stub worker exited with code ${code}`));
+      }
+    });
+    proc.stdin.on('error', () => undefined);
+    return proc;
+  }
+
+  // Only the request that timed out fails. The stuck worker is killed and the
+  // queue carries on with a fresh one.
+  function timeOut(request) {
+    if (inFlight !== request) return;
+    const stuck = request.proc;
+    if (child === stuck) child = null;
+    stuck.kill();
+    finish(request, new Error('Pay stub worker timed out.'));
+  }
+
+  function expire(request) {
+    const position = queue.indexOf(request);
+    if (position === -1) return;
+    queue.splice(position, 1);
+    settle(request, new Error('Pay stub worker is busy; the request waited too long.'));
+  }
+
+  function render({ entryId, outputPath }) {
+    const id = nextId++;
+    return new Promise((resolve, reject) => {
+      const request = {
+        id,
+        resolve,
+        reject,
+        message: `${JSON.stringify({ id, entry_id: entryId, output: outputPath })}\n`
+      };
+      request.timer = setTimeout(() => expire(request), queueTimeoutMs);
+      queue.push(request);
+      pump();
+    });
+  }
+
+  function stop() {
+    for (const request of queue.splice(0)) settle(request, new Error('Pay stub worker stopped.'));
+    if (child) {
+      child.stdin.end();
+      child = null;
+    }
+  }
+
+  return { render, stop };
+}
+
+module.exports = { createStubWorker };
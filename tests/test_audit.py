@@ -0,0 +1,160 @@
+import gc
+import gzip
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports import audit
+from payroll_reports.audit import AuditLogger
+
+
+def test_records_are_written_in_blocks_and_read_back_in_order(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditLogger(path, batch_size=4, fsync="never") as logger:
+        for index in range(10):
+            logger.log({"action": "run-report" if index % 3 else "scheduled-run", "index": index})
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 8
+
+    assert [record["index"] for record in AuditLogger(path).read()] == list(range(10))
+    assert [block.count for block in audit._read_index(path)] == [4, 4, 2]
+
+
+def test_records_of_a_dropped_logger_are_written_by_its_timer_and_at_exit(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    AuditLogger(path, flush_interval=0.05).log({"action": "manual-run"})
+    gc.collect()
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert [record["action"] for record in AuditLogger(path).read()] == ["manual-run"]
+
+    script = (
+        "import sys; from pathlib import Path; sys.path.insert(0, sys.argv[1]);"
+        "from payroll_reports.audit import AuditLogger;"
+        "AuditLogger(Path(sys.argv[2]), flush_interval=3600).log({'action': 'scheduled-run'})"
+    )
+    subprocess.run([sys.executable, "-c", script, str(ROOT), str(path)], check=True)
+    assert [record["action"] for record in AuditLogger(path).read()] == ["manual-run", "scheduled-run"]
+
+
+def test_filtered_pages_skip_blocks_the_index_rules_out(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    with AuditLogger(path, batch_size=5, max_bytes=600) as logger:
+        for index in range(40):
+            logger.log({"action": "scheduled-run" if index % 5 == 0 else "run-report", "index": index})
+
+    rotated = sorted(tmp_path.glob("audit.*.jsonl.gz"))
+    assert rotated and gzip.decompress(rotated[0].read_bytes()).startswith(b'{"action"')
+
+    reader = AuditLogger(path)
+    decoded = []
+    real_parse = audit._parse_lines
+    monkeypatch.setattr(audit, "_parse_lines", lambda data: decoded.append(data) or real_parse(data))
+    page = reader.read(action="scheduled-run", offset=2, limit=3)
+
+    assert [record["index"] for record in page] == [10, 15, 20]
+    assert len(decoded) == 3
+
+    everything = reader.read()
+    timestamps = [record["timestamp"] for record in everything]
+    window = reader.read(since=timestamps[12], until=timestamps[17])
+    assert [record["index"] for record in everything] == list(range(40))
+    assert [record["index"] for record in window] == list(range(12, 18))
+
+
+def test_logs_written_without_an_index_are_indexed_on_first_write(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    legacy = [{"action": "run-report", "timestamp": f"2024-01-0{day}T00:00:00"} for day in range(1, 4)]
+    path.write_text("".join(json.dumps(record) + "\n" for record in legacy) + '{"action": "run-', encoding="utf-8")
+
+    assert AuditLogger(path).read(since="2024-01-02") == legacy[1:]
+    with AuditLogger(path) as logger:
+        logger.log({"action": "scheduled-run"})
+
+    records = AuditLogger(path).read()
+    assert records[:3] == legacy
+    assert records[3]["action"] == "scheduled-run"
+    assert sum(block.count for block in audit._read_index(path)) == 4
+
+
+def test_hash_chain_spans_rotated_segments_and_verifies(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditLogger(path, batch_size=5, max_bytes=1500, checkpoint_interval=4) as logger:
+        for index in range(40):
+            logger.log({"action": "run-report", "index": index, "hash": "forged"})
+
+    rotated = sorted(tmp_path.glob("audit.*.jsonl.gz"))
+    assert len(rotated) > 1
+    records = AuditLogger(path).read()
+    assert [record["index"] for record in records] == list(range(40))
+    assert len({record["hash"] for record in records}) == 40
+
+    result = audit.verify_log(path, processes=2)
+    assert result.ok, result.errors
+    assert result.records == 40 and result.head == records[-1]["hash"]
+    for first, second in zip(rotated, rotated[1:] + [path]):
+        assert audit._read_checkpoints(second)[0].head == audit._read_checkpoints(first)[-1].head
+
+
+def test_segments_from_two_writers_keep_write_order(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    first = AuditLogger(path, max_bytes=1, flush_interval=3600)
+    second = AuditLogger(path, max_bytes=1, flush_interval=3600)
+    second.log({"action": "run-report", "index": 0})
+    for index in range(1, 13):
+        first.log({"action": "run-report", "index": index})
+        first.flush()
+    second.flush()
+    for index in range(13, 16):
+        first.log({"action": "run-report", "index": index})
+        first.flush()
+    first.close()
+    second.close()
+
+    written = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 0, 13, 14, 15]
+    assert [record["index"] for record in AuditLogger(path).read()] == written
+    result = audit.verify_log(path)
+    assert result.ok, result.errors
+    assert result.records == 16
+
+
+def test_verification_reports_edited_and_deleted_records(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditLogger(path, checkpoint_interval=4) as logger:
+        for index in range(10):
+            logger.log({"action": "run-report", "index": index})
+    original = path.read_bytes()
+
+    path.write_bytes(original.replace(b'"index": 6', b'"index": 7', 1))
+    assert audit.verify_log(path, full=True).errors == ["audit.jsonl: record 7 does not match its hash"]
+
+    lines = original.splitlines(keepends=True)
+    path.write_bytes(b"".join(lines[:2] + lines[3:]))
+    assert not audit.verify_log(path, full=True).ok
+
+    path.write_bytes(b"".join(lines[:7]))
+    assert audit.verify_log(path, full=True).errors == [
+        "audit.jsonl: ends at record 7 before the checkpoint at record 8"
+    ]
+
+
+def test_verification_resumes_from_the_last_verified_checkpoint(tmp_path, monkeypatch):
+    path = tmp_path / "audit.jsonl"
+    with AuditLogger(path, batch_size=1, checkpoint_interval=4) as logger:
+        for index in range(10):
+            logger.log({"action": "run-report", "index": index})
+        assert audit.verify_log(path).records == 10
+
+        for index in range(10, 13):
+            logger.log({"action": "run-report", "index": index})
+
+    result = audit.verify_log(path)
+    assert result.ok and result.records == 5
+    assert audit.verify_log(path, full=True).records == 13
@@ -0,0 +1,67 @@
+import math
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports.colfile import ColfileReader, write_colfile
+from payroll_reports.data import build_payments
+from payroll_reports.exporter import export_report
+from payroll_reports.reports import REPORT_COLUMNS, ReportRequest, build_report
+
+from test_reports import build_store
+
+
+def test_payment_detail_round_trips_through_a_columnar_export(tmp_path):
+    rows = build_report(ReportRequest("payment-detail"), build_payments(build_store()))
+    rows[0] = {**rows[0], "project": None, "gross_pay": 1234.5678}
+    path = export_report(rows, tmp_path / "detail.pcol", "payment-detail", REPORT_COLUMNS["payment-detail"])
+
+    with ColfileReader(path) as reader:
+        assert len(reader) == len(rows)
+        assert list(reader.rows()) == rows
+
+
+def test_values_come_back_with_their_types_and_key_order(tmp_path):
+    rows = [
+        {"hours": 40, "gross_pay": float("nan"), "earnings_by_type": {"Salary": 1000.0, "Bonus": 50.0}},
+        {"hours": 37.5, "gross_pay": 812.25, "earnings_by_type": {"Overtime": 12.0, "Hourly": 600}},
+    ]
+    path = write_colfile(rows, tmp_path / "details.pcol")
+
+    with ColfileReader(path) as reader:
+        read_back = list(reader.rows())
+
+    assert [type(row["hours"]) for row in read_back] == [int, float]
+    assert [list(row["earnings_by_type"]) for row in read_back] == [["Salary", "Bonus"], ["Overtime", "Hourly"]]
+    assert read_back[1]["earnings_by_type"]["Hourly"] == 600 and type(read_back[1]["earnings_by_type"]["Hourly"]) is int
+    assert math.isnan(read_back[0]["gross_pay"]) and read_back[1]["gross_pay"] == 812.25
+
+
+def test_reader_projects_columns_and_skips_row_groups_by_pay_date(tmp_path):
+    rows = [
+        {"employee_id": f"e{index % 4}", "pay_date": date(2024, 1 + index // 10, 1 + index % 10), "gross_pay": 100.0 + index}
+        for index in range(120)
+    ]
+    path = write_colfile(rows, tmp_path / "register.pcol", row_group_rows=10)
+
+    with ColfileReader(path) as reader:
+        assert len(reader.row_groups) == 12
+        assert len(list(reader._groups("pay_date", date(2024, 3, 5), date(2024, 4, 2)))) == 2
+        selected = reader.read(["gross_pay"], start_date=date(2024, 3, 5), end_date=date(2024, 4, 2))
+
+    expected = [row["gross_pay"] for row in rows if date(2024, 3, 5) <= row["pay_date"] <= date(2024, 4, 2)]
+    assert selected == {"gross_pay": expected}
+
+
+def test_reader_rejects_files_that_are_not_columnar_exports(tmp_path):
+    path = tmp_path / "register.pcol"
+    path.write_text("employee_id,gross_pay\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="not a columnar export"):
+        ColfileReader(path)
@@ -0,0 +1,46 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports.cron import parse_cron
+
+MOMENT = datetime(2024, 3, 30, 12, 0)
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("*/15 * * * *", [datetime(2024, 3, 30, 12, 15), datetime(2024, 3, 30, 12, 30)]),
+        ("30 6 * * 1-5", [datetime(2024, 4, 1, 6, 30), datetime(2024, 4, 2, 6, 30)]),
+        ("0 9 1 * 1", [datetime(2024, 4, 1, 9, 0), datetime(2024, 4, 8, 9, 0)]),
+        ("0 0 * * 7", [datetime(2024, 3, 31), datetime(2024, 4, 7)]),
+        ("@monthly", [datetime(2024, 4, 1), datetime(2024, 5, 1)]),
+        ("quarter end + 5 days", [datetime(2024, 4, 5), datetime(2024, 7, 5)]),
+        ("Year End - 2 days at 18:30", [datetime(2024, 12, 29, 18, 30), datetime(2025, 12, 29, 18, 30)]),
+        ("every payday semimonthly", [datetime(2024, 3, 31), datetime(2024, 4, 15)]),
+        ("payday biweekly from 2024-01-05 at 06:00", [datetime(2024, 4, 12, 6), datetime(2024, 4, 26, 6)]),
+        ("payday weekly from 2024-04-05", [datetime(2024, 4, 5), datetime(2024, 4, 12)]),
+    ],
+)
+def test_next_after_returns_the_following_runs(expression, expected):
+    schedule = parse_cron(expression)
+    first = schedule.next_after(MOMENT)
+    assert [first, schedule.next_after(first)] == expected
+
+
+@pytest.mark.parametrize(
+    "expression", ["61 * * * *", "* * *", "payday biweekly", "month end at 24:00", "soon", "0 0 31 2 *", "0 0 30 2 *"]
+)
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(ValueError, match="Invalid schedule expression"):
+        parse_cron(expression)
+
+
+def test_leap_day_expressions_are_accepted():
+    assert parse_cron("0 0 29 2 *").next_after(MOMENT) == datetime(2028, 2, 29)
@@ -0,0 +1,131 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports.data import build_payments, load_store_data
+from payroll_reports.jsonstream import skip_value, top_level_offsets
+from payroll_reports.snapshot import read_snapshot, snapshot_path
+
+from test_reports import build_store
+
+
+def test_streamed_store_matches_a_full_parse(tmp_path):
+    store = build_store()
+    history = store.pop("payroll_history")
+    store = {"payroll_history": history, "time_entries": [{"id": "t1", "note": "[{\"}"}], **store}
+    path = tmp_path / "store.json"
+    path.write_text(json.dumps(store), encoding="utf-8")
+
+    data = load_store_data(path, tmp_path / "cache")
+
+    assert data.payments == build_payments(store)
+    assert data.employees == store["employees"]
+    assert data.rejected == []
+
+
+def test_malformed_history_entries_are_rejected_without_aborting(tmp_path):
+    entry = '{"id": "%s", "entry_type": "check", "employee_id": "e1", "check_date": "2024-01-05", "gross": %s}'
+    text = (
+        '{"employees": [{"id": "e1", "name": "Pat"}], "time_entries": [{"bad": tru}], "payroll_history": ['
+        + ", ".join([entry % ("a", "100"), entry % ("b", "10,,"), '"not a check"', entry % ("c", '"n/a"'), entry % ("d", "200")])
+        + "]}"
+    )
+    path = tmp_path / "store.json"
+    path.write_text(text, encoding="utf-8")
+
+    data = load_store_data(path, tmp_path / "cache")
+
+    assert [payment["check_id"] for payment in data.payments] == ["a", "d"]
+    assert [reason.split(":")[0] for reason in data.rejected] == [
+        "payroll_history[1]",
+        "payroll_history[2]",
+        "payroll_history[3]",
+    ]
+
+
+def test_history_entries_with_unbalanced_brackets_or_quotes_are_rejected(tmp_path):
+    entry = '{"id": "%s", "entry_type": "check", "employee_id": "e1", "check_date": "2024-01-05", "gross": 100}'
+    history = [entry % "a", '{"id": "b", "earnings": [{"amount": 1}}', entry % "c"]
+    text = '{"payroll_history": [' + ", ".join(history) + '], "employees": [{"id": "e1", "name": "Pat"}]}'
+    path = tmp_path / "store.json"
+    path.write_text(text, encoding="utf-8")
+
+    data = load_store_data(path, tmp_path / "cache")
+
+    assert [payment["check_id"] for payment in data.payments] == ["a", "c"]
+    assert data.employees == [{"id": "e1", "name": "Pat"}]
+    assert [reason.split(":")[0] for reason in data.rejected] == ["payroll_history[1]"]
+
+
+def test_history_is_not_resynced_inside_a_broken_entry(tmp_path):
+    broken = [
+        '{"employee_id": "e1", "earnings": [{"type": "reg", "amount": 1}, {"type": "ot", "amount": 2}]',
+        '{"id": "d, "gross": 5}',
+    ]
+    entry = '{"id": "%s", "entry_type": "check", "employee_id": "e1", "check_date": "2024-01-05", "gross": 100}'
+    for malformed in broken:
+        history = [entry % "a", malformed, entry % "c", entry % "e"]
+        text = '{"employees": [{"id": "e1", "name": "Pat"}], "payroll_history": [' + ", ".join(history) + "]}"
+        path = tmp_path / "store.json"
+        path.write_text(text, encoding="utf-8")
+
+        data = load_store_data(path, tmp_path / "cache", use_snapshot=False)
+
+        assert [payment["check_id"] for payment in data.payments] == ["a"]
+        assert [reason.split(":")[0] for reason in data.rejected] == [
+            "payroll_history",
+            "payroll_history[1]",
+            "payroll_history[2",
+        ]
+
+    reasons: list = []
+    offsets = top_level_offsets('{"payroll_history": [' + broken[0] + '], "employees": []}', errors=reasons)
+    assert list(offsets) == ["payroll_history"]
+    assert reasons == ["payroll_history: unreadable to its end; the keys after it were not read"]
+
+
+def test_scan_stops_once_wanted_sections_are_found():
+    text = '{"employees": [], "payroll_history": [1, 2], "time_entries": [oops'
+
+    offsets = top_level_offsets(text, ["employees", "payroll_history"])
+
+    assert text[offsets["payroll_history"] : skip_value(text, offsets["payroll_history"])] == "[1, 2]"
+
+
+def test_snapshot_is_reused_until_the_store_changes(tmp_path):
+    store = build_store()
+    path = tmp_path / "store.json"
+    path.write_text(json.dumps(store), encoding="utf-8")
+
+    cold = load_store_data(path, tmp_path / "cache")
+    assert snapshot_path(path).exists()
+    os.utime(path, ns=(0, 0))
+    warm = load_store_data(path, tmp_path / "cache")
+
+    assert warm.payments == cold.payments
+    assert warm.table == cold.table
+    assert warm.rollups == cold.rollups
+    assert read_snapshot(path, path.stat().st_size, 0) is not None
+
+    store["employees"][0]["name"] = "Renamed"
+    path.write_text(json.dumps(store), encoding="utf-8")
+    assert read_snapshot(path, path.stat().st_size, path.stat().st_mtime_ns) is None
+    assert load_store_data(path, tmp_path / "cache").employees[0]["name"] == "Renamed"
+
+
+def test_snapshot_can_be_bypassed(tmp_path):
+    path = tmp_path / "store.json"
+    path.write_text(json.dumps(build_store()), encoding="utf-8")
+
+    load_store_data(path, tmp_path / "cache", use_snapshot=False)
+
+    assert not snapshot_path(path).exists()
+    assert not (tmp_path / "cache").exists()
+
+    load_store_data(path)
+    assert list((tmp_path / ".report_cache").glob("rollups-*.json"))
@@ -0,0 +1,58 @@
+import csv
+import gzip
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports.exporter import export_csv, export_pdf
+
+
+def _xref_offsets(pdf):
+    xref = int(re.findall(rb"startxref\s+(\d+)", pdf)[-1])
+    return [int(offset) for offset in re.findall(rb"(\d{10}) \d{5} n", pdf[xref:])]
+
+
+def test_export_pdf_paginates_every_row_with_repeated_headers(tmp_path):
+    rows = ({"employee_id": f"e{index}", "note": "a (b)"} for index in range(120))
+    pdf = export_pdf(rows, tmp_path / "register.pdf", title="Register").read_bytes()
+
+    assert pdf.count(b"/Type /Page ") == 3
+    assert b"/Count 3 >>" in pdf
+    assert pdf.count(b"(employee_id | note) Tj") == 3
+    assert b"(e119 | a \\(b\\)) Tj" in pdf
+    for number, offset in enumerate(_xref_offsets(pdf), start=1):
+        assert pdf[offset:].startswith(b"%d 0 obj" % number)
+
+
+def test_export_pdf_without_rows_writes_one_page(tmp_path):
+    pdf = export_pdf([], tmp_path / "empty.pdf", title="Register").read_bytes()
+
+    assert pdf.count(b"/Type /Page ") == 1
+    assert b"(No rows returned) Tj" in pdf
+
+
+def test_export_csv_keeps_columns_missing_from_the_first_row(tmp_path):
+    rows = [{"employee_id": "e1", "gross_pay": 10.0}, {"employee_id": "e2", "state": "FL", "gross_pay": None}]
+    text = export_csv(rows, tmp_path / "rows.csv").read_text(encoding="utf-8")
+
+    assert text.splitlines() == ["employee_id,gross_pay,state", "e1,10.0,", "e2,None,FL"]
+
+
+def test_export_csv_streams_a_schema_to_gzip(tmp_path):
+    rows = ({"employee_id": f"e{index}", "pay_date": date(2024, 1, 5)} for index in range(3000))
+    path = export_csv(rows, tmp_path / "rows.csv.gz", fieldnames=["employee_id", "pay_date", "state"])
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as handle:
+        records = list(csv.reader(handle))
+
+    assert len(records) == 3001
+    assert records[0] == ["employee_id", "pay_date", "state"]
+    assert records[-1] == ["e2999", "2024-01-05", ""]
+    with pytest.raises(ValueError, match="outside the export schema: gross_pay"):
+        export_csv([{"employee_id": "e1", "gross_pay": 1.0}], tmp_path / "bad.csv", fieldnames=["employee_id"])
@@ -0,0 +1,88 @@
+import json
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports import incremental
+from payroll_reports.columnar import PaymentTable
+from payroll_reports.data import build_payments
+from payroll_reports.incremental import build_incremental, load_state, state_path
+from payroll_reports.reports import ReportRequest, build_report
+from payroll_reports.rollups import PeriodRollups
+
+from test_reports import build_store
+
+CUTOFF = date(2024, 6, 1)
+
+
+def tables():
+    payments = build_payments(build_store())
+    earlier = [payment for payment in payments if payment["pay_date"] <= CUTOFF]
+    later = [payment for payment in payments if payment["pay_date"] > CUTOFF]
+    return PaymentTable.from_payments(earlier), PaymentTable.from_payments(earlier + later)
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [
+        ReportRequest("payroll-register", departments=["Ops", "Sales"]),
+        ReportRequest("tax-deposits", start_date=date(2024, 2, 1)),
+        ReportRequest("payroll-details", group_by="pay_date", pay_schedules=["Biweekly"]),
+        ReportRequest("labor-distribution"),
+    ],
+)
+def test_incremental_runs_match_a_full_rebuild(tmp_path, monkeypatch, request_):
+    earlier, full = tables()
+    key = request_.report_type
+    built = []
+
+    def recording_build_report(request, *args):
+        built.append(request)
+        return build_report(request, *args)
+
+    monkeypatch.setattr(incremental, "build_report", recording_build_report)
+
+    first = build_incremental(request_, key, earlier, PeriodRollups.from_table("a", earlier), state_dir=tmp_path)
+    assert first == build_report(request_, earlier, PeriodRollups.from_table("a", earlier))
+    watermark = load_state(state_path(tmp_path, key), key, key).watermark
+
+    rollups = PeriodRollups.from_table("b", full)
+    rows = build_incremental(request_, key, full, rollups, state_dir=tmp_path)
+    # Compared as text so nested dicts must also keep their key order, as a CSV export would.
+    assert json.dumps(rows, default=str) == json.dumps(build_report(request_, full, rollups), default=str)
+    if request_.report_type != "labor-distribution":
+        assert built[-1].start_date == date.fromordinal(watermark + 1)
+
+
+def test_changed_history_falls_back_to_a_full_rebuild(tmp_path):
+    earlier, full = tables()
+    request = ReportRequest("payroll-register")
+    build_incremental(request, "register", earlier, state_dir=tmp_path)
+
+    full.gross_pay[0] += 100.0
+    assert build_incremental(request, "register", full, state_dir=tmp_path) == build_report(request, full)
+
+    reordered = PaymentTable.from_payments(reversed(list(full.rows())))
+    assert build_incremental(request, "register", reordered, state_dir=tmp_path) == build_report(request, reordered)
+
+
+def test_corrections_to_covered_checks_fall_back_to_a_full_rebuild(tmp_path):
+    earlier, full = tables()
+    request = ReportRequest("tax-deposits")
+    build_incremental(request, "deposits", earlier, state_dir=tmp_path)
+
+    full.employee_taxes["fit"][0] += 25.0
+    full.taxes[0] += 25.0
+    assert build_incremental(request, "deposits", full, state_dir=tmp_path) == build_report(request, full)
+
+    full.department[1] = "Renamed"
+    register = ReportRequest("payroll-register")
+    build_incremental(register, "register", full, state_dir=tmp_path)
+    full.department[1] = "Ops"
+    assert build_incremental(register, "register", full, state_dir=tmp_path) == build_report(register, full)
@@ -0,0 +1,76 @@
+import re
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("reportlab")
+
+from payroll_reports.pay_stub import _build_stub_contexts, _build_stub_story, export_check_stub_pdf
+
+
+def _payments(count):
+    return [
+        {
+            "check_id": f"chk-{index}",
+            "employee_id": f"e{index % 3}",
+            "pay_date": date(2024, 1 + index % 12, 15),
+            "gross_pay": 1000.0 + index,
+            "taxes": 100.0,
+            "deductions": 10.0,
+            "net_pay": 890.0 + index,
+        }
+        for index in range(count)
+    ]
+
+
+def _xref_offsets(pdf):
+    xref = int(re.findall(rb"startxref\s+(\d+)", pdf)[-1])
+    entries = re.findall(rb"(\d{10}) \d{5} n", pdf[xref:])
+    return [int(offset) for offset in entries]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_sharded_check_stubs_concatenate_into_one_document(tmp_path, processes):
+    employees = [{"employee_id": f"e{index}", "name": f"Employee {index}"} for index in range(3)]
+    whole = export_check_stub_pdf(_payments(7), employees, tmp_path / "whole.pdf")
+    sharded = export_check_stub_pdf(
+        _payments(7), employees, tmp_path / "sharded.pdf", processes=processes, chunk_size=3
+    )
+
+    pdf = sharded.read_bytes()
+    assert pdf.count(b"/Type /Page\n") == whole.read_bytes().count(b"/Type /Page\n") == 7
+    assert pdf.count(b"/Type /Catalog") == 1
+    assert b"/Count 7 /Kids" in pdf
+    offsets = _xref_offsets(pdf)
+    assert offsets
+    for number, offset in enumerate(offsets, start=1):
+        assert pdf[offset:].startswith(b"%d 0 obj" % number)
+
+
+def test_stub_stories_share_one_template():
+    employees = [{"employee_id": f"e{index}", "name": f"Employee {index}"} for index in range(3)]
+    first, second = _build_stub_contexts(_payments(2), employees)
+    first_story, second_story = _build_stub_story(first), _build_stub_story(second)
+
+    assert first_story[0] is second_story[0]
+    assert first_story[1]._cellvalues[0][0] is second_story[1]._cellvalues[0][0]
+    assert first_story[1]._cellvalues[0][1] is not second_story[1]._cellvalues[0][1]
+
+
+def test_stub_ytd_restarts_each_calendar_year():
+    payments = [
+        {"check_id": "a", "employee_id": "e0", "pay_date": date(2023, 12, 15), "gross_pay": 1000.0, "taxes": 100.0},
+        {"check_id": "b", "employee_id": "e0", "pay_date": date(2024, 1, 12), "gross_pay": 400.0, "taxes": 40.0},
+        {"check_id": "c", "employee_id": "e0", "pay_date": date(2024, 1, 26), "gross_pay": 500.0, "taxes": 50.0},
+    ]
+
+    contexts = _build_stub_contexts(payments, [{"employee_id": "e0", "name": "Employee 0"}])
+
+    assert [context.ytd_gross for context in contexts] == [1000.0, 400.0, 900.0]
+    assert [context.ytd_taxes for context in contexts] == [100.0, 40.0, 90.0]
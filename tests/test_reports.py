@@ -0,0 +1,295 @@
+import json
+import random
+import time
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports.columnar import PaymentTable
+from payroll_reports.data import build_payments, load_store_data
+from payroll_reports.rollups import PeriodRollups, load_rollups
+from payroll_reports.ytd import YtdLedger
+from payroll_reports.reports import ReportRequest, build_report, iter_report
+
+
+def build_store(employees=12, checks_per_employee=30, seed=3):
+    rng = random.Random(seed)
+    store = {
+        "employees": [
+            {
+                "id": f"e{index}",
+                "name": f"Employee {index}",
+                "department": rng.choice(["Ops", "Engineering", "Sales"]),
+                "pay_schedule": rng.choice(["Biweekly", "Monthly"]),
+                "state": rng.choice(["FL", "GA", "NY"]),
+            }
+            for index in range(employees)
+        ],
+        "pay_types": [{"id": "regular", "name": "Regular"}, {"id": "vacation", "name": "Vacation"}],
+        "payroll_history": [],
+    }
+    start = date(2023, 11, 3)
+    for index in range(employees):
+        for check in range(checks_per_employee):
+            gross = round(rng.uniform(500, 4000), 2)
+            store["payroll_history"].append(
+                {
+                    "id": f"chk-{index}-{check}",
+                    "entry_type": "check",
+                    "employee_id": f"e{index}",
+                    "check_date": (start + timedelta(days=14 * check)).isoformat(),
+                    "gross": gross,
+                    "net": round(gross * 0.78, 2),
+                    "taxes": round(gross * 0.22, 2),
+                    "fit": round(gross * 0.12, 2),
+                    "employee_ss": round(gross * 0.062, 2),
+                    "employee_medicare": round(gross * 0.0145, 2),
+                    "employer_ss": round(gross * 0.062, 2),
+                    "employer_medicare": round(gross * 0.0145, 2),
+                    "futa": round(gross * 0.006, 2),
+                    "suta": round(gross * 0.027, 2),
+                    "pay_lines": {
+                        "regular": {"hours": 80, "amount": gross - 100},
+                        "vacation": {"hours": 4, "amount": 100},
+                    },
+                }
+            )
+    store["payroll_history"].append({"entry_type": "adjustment", "employee_id": "e0", "check_date": "2024-01-05"})
+    return store
+
+
+@pytest.fixture(scope="module")
+def payments():
+    return build_payments(build_store())
+
+
+REQUESTS = [
+    ReportRequest("payroll-register"),
+    ReportRequest("payroll-details", group_by="pay_date"),
+    ReportRequest("payroll-details", group_by="employee", departments=["Ops"]),
+    ReportRequest("payroll-details"),
+    ReportRequest("deductions-taxes-summary", pay_schedules=["Monthly"]),
+    ReportRequest("labor-distribution"),
+    ReportRequest("payroll-tax-liabilities"),
+    ReportRequest("tax-deposits", start_date=date(2024, 2, 1), end_date=date(2024, 6, 30)),
+    ReportRequest("form-940", year=2024),
+    ReportRequest("form-941", year=2024, quarter=4),
+    ReportRequest("form-941", start_date=date(2024, 4, 1)),
+    ReportRequest("w2-w3", year=2024),
+    ReportRequest("w2-w3", employee_ids=["e1", "e2"]),
+]
+
+
+@pytest.mark.parametrize("request_", REQUESTS, ids=lambda r: f"{r.report_type}-{r.group_by}")
+def test_table_reports_match_dict_reports(payments, request_):
+    table = PaymentTable.from_payments(payments)
+
+    assert build_report(request_, table) == build_report(request_, payments)
+
+
+@pytest.mark.parametrize(
+    "request_",
+    REQUESTS + [ReportRequest("payment-detail", departments=["Ops"]), ReportRequest("payroll-register", year=2024)],
+    ids=lambda r: f"{r.report_type}-{r.group_by}",
+)
+def test_iter_report_yields_the_built_rows(payments, request_):
+    table = PaymentTable.from_payments(payments)
+    rows = iter_report(request_, table)
+
+    assert not isinstance(rows, list)
+    assert list(rows) == build_report(request_, table)
+    assert list(iter_report(request_, payments)) == build_report(request_, payments)
+
+
+@pytest.mark.parametrize(
+    "request_",
+    [request for request in REQUESTS if request.report_type in ("form-940", "form-941", "w2-w3", "tax-deposits")]
+    + [ReportRequest("form-940"), ReportRequest("form-941", year=2023, quarter=1), ReportRequest("w2-w3")],
+    ids=lambda r: f"{r.report_type}-{r.year}-{r.quarter}",
+)
+def test_rollup_reports_match_table_reports(payments, request_):
+    table = PaymentTable.from_payments(payments)
+    rollups = PeriodRollups.from_table("digest", table)
+
+    assert build_report(request_, table, rollups) == build_report(request_, table)
+
+
+def test_rollups_merge_same_day_payments(payments):
+    doubled = PaymentTable.from_payments(payments + payments)
+    rollups = PeriodRollups.from_table("digest", doubled)
+
+    assert len(rollups.daily) == len(payments)
+    assert rollups.daily.gross_pay[0] == 2 * payments[0]["gross_pay"]
+
+
+def test_rollups_persist_by_store_hash(tmp_path, payments):
+    table = PaymentTable.from_payments(payments)
+    built = load_rollups("first", table, tmp_path)
+    cached = load_rollups("first", PaymentTable.empty(), tmp_path)
+
+    assert cached.daily.gross_pay == built.daily.gross_pay
+    assert cached.quarters == built.quarters
+    load_rollups("other", table, tmp_path, key="elsewhere")
+    assert len(load_rollups("second", PaymentTable.empty(), tmp_path).daily) == 0
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "rollups-elsewhere-other.json",
+        "rollups-store-second.json",
+    ]
+
+    (tmp_path / "rollups-store-second.json").write_text('{"version": 2, "store_ha', encoding="utf-8")
+    assert load_rollups("second", table, tmp_path).daily.gross_pay == built.daily.gross_pay
+
+
+def test_load_store_data_rebuilds_rollups_when_store_changes(tmp_path):
+    store_path = tmp_path / "store.json"
+    store_path.write_text(json.dumps(build_store(employees=2, checks_per_employee=3)), encoding="utf-8")
+    first = load_store_data(store_path, tmp_path / "cache")
+    store_path.write_text(json.dumps(build_store(employees=3, checks_per_employee=3)), encoding="utf-8")
+    second = load_store_data(store_path, tmp_path / "cache")
+
+    assert first.rollups.store_hash != second.rollups.store_hash
+    assert len(second.rollups.daily) == 9
+
+
+def test_ytd_ledger_tracks_running_totals_per_year(payments):
+    ledger = YtdLedger.from_payments(payments)
+    e1 = [payment for payment in payments if payment["employee_id"] == "e1"]
+    in_2024 = [payment for payment in e1 if payment["pay_date"].year == 2024]
+
+    totals = ledger.totals("e1", 2024)
+    assert totals.gross == pytest.approx(sum(payment["gross_pay"] for payment in in_2024))
+    assert totals.employee_taxes["fit"] == pytest.approx(sum(p["employee_taxes"]["fit"] for p in in_2024))
+    assert totals.earnings["Vacation"] == pytest.approx(100 * len(in_2024))
+    assert ledger.through(in_2024[0]).gross == pytest.approx(in_2024[0]["gross_pay"])
+    assert ledger.through(e1[0]).gross == pytest.approx(e1[0]["gross_pay"])
+    assert ledger.totals("e1", 1999).gross == 0.0
+
+
+def test_ytd_ledger_records_out_of_order_checks_incrementally(tmp_path, payments):
+    path = tmp_path / "ytd.json"
+    latest_first = sorted(payments, key=lambda payment: payment["pay_date"], reverse=True)
+    ledger = YtdLedger(path)
+    for payment in latest_first:
+        ledger.record(payment)
+    ledger.save()
+    rebuilt = YtdLedger.from_payments(payments)
+
+    reloaded = YtdLedger.load(path)
+    for payment in payments:
+        assert reloaded.through(payment).gross == pytest.approx(rebuilt.through(payment).gross)
+        assert ledger.through(payment).taxes == pytest.approx(rebuilt.through(payment).taxes)
+
+
+def test_ytd_ledger_sync_adds_new_checks_and_rebuilds_on_removal(payments):
+    ledger = YtdLedger.from_payments(payments[:-5])
+
+    assert ledger.sync(payments) == 5
+    assert ledger.sync(payments) == 0
+    assert ledger.sync(payments[1:]) == len(payments) - 1
+    assert payments[0]["check_id"] not in ledger and len(ledger) == len(payments) - 1
+
+
+def test_ytd_ledger_sync_rebuilds_when_a_recorded_check_is_corrected(tmp_path):
+    store_path = tmp_path / "store.json"
+    store = build_store(employees=2, checks_per_employee=3)
+    store_path.write_text(json.dumps(store), encoding="utf-8")
+    data = load_store_data(store_path, tmp_path / "cache")
+    ledger = YtdLedger(tmp_path / "ytd.json")
+    ledger.sync_table(data.table, data.rollups.store_hash)
+    ledger.save()
+
+    store["payroll_history"][0]["gross"] = 99999.0
+    store["employees"][1]["name"] = "Renamed"
+    store_path.write_text(json.dumps(store), encoding="utf-8")
+    data = load_store_data(store_path, tmp_path / "cache")
+    reloaded = YtdLedger.load(tmp_path / "ytd.json")
+    assert reloaded.store_hash != data.rollups.store_hash
+    reloaded.sync_table(data.table, data.rollups.store_hash)
+
+    request = ReportRequest("w2-w3", year=2024)
+    assert build_report(request, data.table, ytd=reloaded) == build_report(request, data.table)
+    assert reloaded.through(data.payments[0]).gross == 99999.0
+    assert [year.employee_name for year in reloaded.years(2023)] == ["Employee 0", "Renamed"]
+    assert reloaded.sync(data.payments) == 0
+
+
+@pytest.mark.parametrize("year", [2023, 2024, 2025])
+def test_ytd_w2_matches_table_w2(payments, year):
+    request = ReportRequest("w2-w3", year=year)
+    ledger = YtdLedger.from_payments(payments[::-1])
+    table = PaymentTable.from_payments(payments)
+    rollups = PeriodRollups.from_table("digest", table)
+
+    assert build_report(request, table, ytd=ledger) == build_report(request, table)
+    assert build_report(request, table, rollups, ledger) == build_report(request, table)
+
+
+def test_table_rows_round_trip(payments):
+    assert list(PaymentTable.from_payments(payments).rows()) == payments
+
+
+def test_payroll_details_aggregates_repeated_line_item_types():
+    payment = {
+        "employee_id": "e1",
+        "employee_name": "Employee 1",
+        "pay_date": date(2024, 1, 5),
+        "earnings": [
+            {"type": "Regular", "hours": 40, "amount": 1000.004},
+            {"type": "Regular", "hours": 2.5, "amount": 60},
+            {"type": "Vacation", "hours": 8, "amount": 200},
+        ],
+        "deductions_detail": [{"type": "401k", "amount": 50}],
+        "contributions_detail": [],
+        "employee_taxes": {"fit": 120, "ss": 62.0},
+        "employer_taxes": {"ss": 62.0},
+        "taxable_wages": {"fit": 1260.004},
+    }
+    plain = dict(payment, earnings=payment["earnings"][1:], deductions_detail=[])
+
+    rows = build_report(ReportRequest("payroll-details"), [payment, plain])
+
+    assert rows[0]["earnings_by_type"] == {"Regular": 1060.0, "Vacation": 200.0}
+    assert rows[0]["hours_by_type"] == {"Regular": 42.5, "Vacation": 8.0}
+    assert rows[0]["deductions_total"] == 50.0
+    assert rows[0]["employee_taxes_total"] == 182.0
+    assert rows[1]["earnings_total"] == 260.0
+    assert rows[1]["taxable_wages"] == {"fit": 1260.0}
+    assert rows[1]["employee_taxes"] == {"fit": 120.0, "ss": 62.0}
+
+
+def test_payroll_tax_liabilities_breaks_out_suta_by_state(payments):
+    rows = build_report(ReportRequest("payroll-tax-liabilities"), payments)
+
+    suta = [row for row in rows if row["section"] == "suta"]
+    by_state = {row["state"]: row for row in rows if row["section"] == "suta_state"}
+    futa = [row for row in rows if row["section"] == "futa"]
+    assert len(futa) == 12
+    assert {row["employee_name"] for row in suta} == {f"Employee {index}" for index in range(12)}
+    assert set(by_state) == {payment["state"] for payment in payments}
+    for state, total in by_state.items():
+        state_rows = [row for row in suta if row["state"] == state]
+        assert total["taxes"] == pytest.approx(sum(row["taxes"] for row in state_rows), abs=0.01)
+    assert sum(row["gross_wages"] for row in by_state.values()) == pytest.approx(
+        sum(row["gross_wages"] for row in futa), abs=0.05
+    )
+
+
+def _time_liabilities(employees):
+    payments = build_payments(build_store(employees=employees, checks_per_employee=4))
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        build_report(ReportRequest("payroll-tax-liabilities"), payments)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_payroll_tax_liabilities_scales_linearly():
+    # 4x the employees and payments: linear work grows ~4x, the old per-employee scan ~16x.
+    assert _time_liabilities(2000) / _time_liabilities(500) < 8
@@ -0,0 +1,214 @@
+import gzip
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from payroll_reports.audit import AuditLogger
+from payroll_reports.columnar import PaymentTable
+from payroll_reports import scheduler as scheduler_module
+from payroll_reports.data import build_payments
+from payroll_reports.reports import iter_report
+from payroll_reports.scheduler import Schedule, Scheduler, SchedulerDaemon
+
+from test_reports import build_store
+
+
+def make_scheduler(tmp_path, *schedules):
+    scheduler = Scheduler(tmp_path / "schedules.json", AuditLogger(tmp_path / "audit.jsonl"))
+    for schedule in schedules:
+        scheduler.add_schedule(schedule)
+    return scheduler
+
+
+def test_parallel_run_matches_a_sequential_run(tmp_path):
+    table = PaymentTable.from_payments(build_payments(build_store()))
+    reports = ["payroll-details", "payroll-register", "payment-detail", "labor-distribution"]
+    outputs = {}
+    for processes in (None, 2):
+        folder = tmp_path / str(processes)
+        scheduler = make_scheduler(
+            folder, *(Schedule(report, report, "daily", str(folder / f"{report}.csv")) for report in reports)
+        )
+        outputs[processes] = scheduler.run_due_schedules(table, processes=processes)
+        assert all(schedule.last_duration is not None for schedule in scheduler.list_schedules())
+        logged = AuditLogger(folder / "audit.jsonl").read()
+        assert [entry["duration_seconds"] >= 0 for entry in logged] == [True] * len(reports)
+
+    assert [path.name for path in outputs[2]] == [f"{report}.csv" for report in reports]
+    assert [path.read_bytes() for path in outputs[2]] == [path.read_bytes() for path in outputs[None]]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_a_failing_report_does_not_stop_the_others(tmp_path, processes):
+    scheduler = make_scheduler(
+        tmp_path,
+        Schedule("broken", "no-such-report", "daily", str(tmp_path / "broken.csv")),
+        Schedule("ok", "payroll-details", "daily", str(tmp_path / "details.csv")),
+        Schedule("also-ok", "payroll-register", "daily", str(tmp_path / "register.csv")),
+    )
+
+    with pytest.raises(ValueError, match="Unknown report type"):
+        scheduler.run_due_schedules(PaymentTable.from_payments(build_payments(build_store())), processes=processes)
+
+    saved = {schedule.schedule_id: schedule.last_run for schedule in scheduler.list_schedules()}
+    assert saved["ok"] is not None and saved["also-ok"] is not None
+    assert saved["broken"] is None
+    assert (tmp_path / "details.csv").exists() and (tmp_path / "register.csv").exists()
+    failed = AuditLogger(tmp_path / "audit.jsonl").read(action="scheduled-run-failed")
+    assert [(entry["schedule_id"], entry["duration_seconds"] >= 0) for entry in failed] == [("broken", True)]
+
+
+def test_daemon_keeps_running_other_schedules_when_one_always_fails(tmp_path):
+    now = datetime.utcnow().replace(microsecond=0)
+    scheduler = make_scheduler(
+        tmp_path,
+        Schedule("broken", "no-such-report", "daily", str(tmp_path / "broken.csv")),
+        Schedule("nightly", "payroll-register", "daily", str(tmp_path / "n.csv")),
+    )
+    daemon = SchedulerDaemon(scheduler, lambda: (build_payments(build_store()), None, None), clock=lambda: now)
+
+    assert [path.name for path in daemon.run_pending()] == ["n.csv"]
+    assert [schedule.schedule_id for _, _, schedule in sorted(daemon._queue)] == ["broken", "nightly"]
+    assert daemon._queue[0][0] == now + timedelta(seconds=daemon.poll_interval)
+
+
+def test_identical_reports_are_built_once_per_run(tmp_path, monkeypatch):
+    built = []
+
+    def counting_iter_report(request, *args):
+        built.append(request)
+        return iter_report(request, *args)
+
+    monkeypatch.setattr(scheduler_module, "iter_report", counting_iter_report)
+    scheduler = make_scheduler(
+        tmp_path,
+        Schedule("csv", "payroll-register", "daily", str(tmp_path / "a.csv"), departments=["Ops", "Eng"]),
+        Schedule("gzip", "payroll-register", "daily", str(tmp_path / "a.csv.gz"), departments=["Eng", "Ops", "Eng"]),
+        Schedule("other", "payroll-register", "daily", str(tmp_path / "b.csv"), departments=["Eng"]),
+    )
+
+    outputs = scheduler.run_due_schedules(build_payments(build_store()))
+
+    assert len(built) == 2
+    assert [path.name for path in outputs] == ["a.csv", "a.csv.gz", "b.csv"]
+    assert gzip.decompress(outputs[1].read_bytes()) == outputs[0].read_bytes()
+    assert [entry["cache_hit"] for entry in scheduler.audit.read()] == [False, True, False]
+
+
+def test_daily_and_cron_schedules_share_the_utc_day_boundary(tmp_path, monkeypatch):
+    # Far from UTC, so a local date would move the boundary fourteen hours.
+    monkeypatch.setenv("TZ", "Pacific/Kiritimati")
+    time.tzset()
+    payments = build_payments(build_store())
+    try:
+        for now, expected in [(datetime(2024, 3, 1, 23, 59), []), (datetime(2024, 3, 2, 0, 1), ["cron", "daily"])]:
+            folder = tmp_path / now.strftime("%d%H%M")
+            scheduler = make_scheduler(
+                folder,
+                Schedule("cron", "payroll-register", "cron", str(folder / "cron.csv"), last_run="2024-03-01T00:10:00", cron="0 0 * * *"),
+                Schedule("daily", "payroll-register", "daily", str(folder / "daily.csv"), last_run="2024-03-01T00:10:00"),
+            )
+            daemon = SchedulerDaemon(scheduler, lambda: (payments, None, None), clock=lambda: now)
+            daemon.reload_if_changed()
+
+            assert sorted(schedule.schedule_id for due_at, _, schedule in daemon._queue if due_at <= now) == expected
+            assert [path.stem for path in scheduler.run_due_schedules(payments, clock=lambda: now)] == expected
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_daemon_runs_schedules_as_they_fall_due(tmp_path):
+    now = datetime.utcnow().replace(microsecond=0)
+    scheduler = make_scheduler(
+        tmp_path,
+        Schedule("nightly", "payroll-register", "cron", str(tmp_path / "n.csv"), last_run=str(now - timedelta(days=2)), cron="@daily"),
+        Schedule("quarterly", "payroll-register", "cron", str(tmp_path / "q.csv"), last_run=str(now), cron="quarter end"),
+    )
+    clock = [now]
+    daemon = SchedulerDaemon(scheduler, lambda: (build_payments(build_store()), None, None), clock=lambda: clock[0])
+
+    assert [path.name for path in daemon.run_pending()] == ["n.csv"]
+    assert daemon.run_pending() == []
+    assert not daemon.reload_if_changed()
+    assert 0 < daemon.seconds_until_due() <= daemon.poll_interval
+
+    clock[0] = now + timedelta(days=100)
+    assert sorted(path.name for path in daemon.run_pending()) == ["n.csv", "q.csv"]
+
+    scheduler.add_schedule(Schedule("new", "payroll-register", "daily", str(tmp_path / "new.csv")))
+    assert [path.name for path in daemon.run_pending()] == ["new.csv"]
+
+
+def test_daemon_wakeups_touch_only_the_schedules_that_ran(tmp_path, monkeypatch):
+    now = datetime.utcnow().replace(microsecond=0)
+    idle = [
+        Schedule(f"idle-{index}", "payroll-register", "daily", str(tmp_path / f"{index}.csv"), last_run=str(now))
+        for index in range(50)
+    ]
+    scheduler = make_scheduler(tmp_path, *idle, Schedule("due", "payroll-register", "daily", str(tmp_path / "due.csv")))
+    daemon = SchedulerDaemon(scheduler, lambda: (build_payments(build_store()), None, None), clock=lambda: now)
+    daemon.reload_if_changed()
+    loads, keys = [], []
+    real_load, real_key = Scheduler._load, Schedule.definition_key
+    monkeypatch.setattr(Scheduler, "_load", lambda self: loads.append(1) or real_load(self))
+    monkeypatch.setattr(Schedule, "definition_key", lambda self: keys.append(1) or real_key(self))
+
+    assert [path.name for path in daemon.run_pending()] == ["due.csv"]
+    assert not daemon.reload_if_changed()
+    assert loads == [] and len(keys) <= 2
+    assert len(daemon._queue) == 51
+
+    monkeypatch.undo()
+    saved = {schedule.schedule_id: schedule.last_run for schedule in Scheduler(tmp_path / "schedules.json").list_schedules()}
+    assert saved["due"] == now.isoformat(timespec="seconds")
+
+
+def test_daemon_keeps_schedules_added_while_it_runs(tmp_path):
+    now = datetime.utcnow().replace(microsecond=0)
+    scheduler = make_scheduler(tmp_path, Schedule("first", "payroll-register", "daily", str(tmp_path / "first.csv")))
+    payments = build_payments(build_store())
+
+    def load_inputs():
+        if not (tmp_path / "first.csv").exists():
+            scheduler.add_schedule(Schedule("added", "payroll-register", "daily", str(tmp_path / "added.csv")))
+        return payments, None, None
+
+    daemon = SchedulerDaemon(scheduler, load_inputs, clock=lambda: now)
+
+    assert [path.name for path in daemon.run_pending()] == ["first.csv"]
+    saved = {schedule.schedule_id: schedule.last_run for schedule in scheduler.list_schedules()}
+    assert saved == {"first": now.isoformat(timespec="seconds"), "added": None}
+    assert [path.name for path in daemon.run_pending()] == ["added.csv"]
+
+
+def test_daemon_skips_saved_expressions_that_never_match(tmp_path):
+    now = datetime.utcnow().replace(microsecond=0)
+    scheduler = make_scheduler(
+        tmp_path,
+        Schedule("never", "payroll-register", "cron", str(tmp_path / "x.csv"), last_run=str(now), cron="0 0 31 2 *"),
+        Schedule("nightly", "payroll-register", "daily", str(tmp_path / "n.csv")),
+    )
+    daemon = SchedulerDaemon(scheduler, lambda: (build_payments(build_store()), None, None), clock=lambda: now)
+
+    assert [path.name for path in daemon.run_pending()] == ["n.csv"]
+    assert [entry.get("schedule_id") for entry in scheduler.audit.read(action="scheduled-run-failed")] == ["never"]
+
+
+def test_incremental_schedules_keep_state_between_runs(tmp_path):
+    table = PaymentTable.from_payments(build_payments(build_store()))
+    scheduler = Scheduler(tmp_path / "schedules.json", AuditLogger(tmp_path / "audit.jsonl"), state_dir=tmp_path / "state")
+    scheduler.add_schedule(Schedule("inc", "tax-deposits", "daily", str(tmp_path / "inc.csv"), incremental=True))
+    scheduler.add_schedule(Schedule("full", "tax-deposits", "daily", str(tmp_path / "full.csv"), start_date="2023-01-01"))
+
+    incremental, full = scheduler.run_due_schedules(table)
+
+    assert incremental.read_bytes() == full.read_bytes()
+    assert len(list((tmp_path / "state").glob("*.json"))) == 1
@@ -0,0 +1,136 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import app
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "DB_PATH", str(tmp_path / "payroll.db"))
+    app.init_db()
+    return tmp_path
+
+
+def call(method, path, body=b"", query=""):
+    captured = {}
+
+    def start_response(status, headers):
+        captured["status"] = status
+        captured["headers"] = dict(headers)
+
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+    }
+    chunks = list(app.application(environ, start_response))
+    return captured["status"], captured["headers"], b"".join(chunks).decode()
+
+
+def create_employee(first_name="Ada", last_name="Lovelace"):
+    form = f"first_name={first_name}&last_name={last_name}&pay_frequency_id=2&hourly_rate=30&effective_date=2024-01-01"
+    status, headers, _ = call("POST", "/employees/new", form.encode())
+    assert status.startswith("302")
+    return int(headers["Location"].rsplit("/", 1)[1])
+
+
+def test_template_escapes_values_and_streams_iterables():
+    template = app.Template("<p>{{name}}</p><ul>{{items}}</ul>")
+
+    chunks = list(template.stream(name="<b>Ada</b>", items=(b"<li>%d</li>" % i for i in range(3))))
+
+    assert b"".join(chunks) == b"<p>&lt;b&gt;Ada&lt;/b&gt;</p><ul><li>0</li><li>1</li><li>2</li></ul>"
+    assert len(chunks) > 3
+
+
+def test_markup_is_not_escaped():
+    assert app.Template("{{x}}").render(x=app.Markup("<br>")) == b"<br>"
+
+
+def test_employee_list_escapes_names(db):
+    create_employee(first_name="%3Cscript%3E")
+
+    status, _, body = call("GET", "/employees")
+
+    assert status.startswith("200")
+    assert "<script>" not in body
+    assert "&lt;script&gt; Lovelace" in body
+
+
+def test_employee_detail_renders_summary_and_defers_history(db):
+    employee_id = create_employee(last_name="O'Brien")
+
+    status, _, body = call("GET", f"/employees/{employee_id}")
+
+    assert status.startswith("200")
+    assert "Ada O&#x27;Brien" in body
+    assert "$30.00" in body
+    assert f"data-fragment='/employees/{employee_id}/audit'" in body
+    assert "Initial hourly compensation added" not in body
+    assert body.rstrip().endswith("</html>")
+
+
+def test_audit_fragment_is_paginated(db, monkeypatch):
+    monkeypatch.setattr(app, "SECTION_PAGE_SIZE", 3)
+    employee_id = create_employee()  # four audit events: employee, compensation, two balances
+
+    _, _, first = call("GET", f"/employees/{employee_id}/audit")
+    _, _, second = call("GET", f"/employees/{employee_id}/audit", query="page=2")
+
+    assert first.count("<tr><td>") == 3
+    assert "page=2" in first and "Older" in first
+    assert second.count("<tr><td>") == 1
+    assert "Newer" in second and "Older" not in second
+    assert "Created Ada Lovelace" in second
+
+
+def test_router_converts_typed_params_and_prefers_static_segments():
+    router = app.Router()
+    router.add("GET", "/employees/new", "new")
+    router.add("GET", "/employees/<int:employee_id>", "detail")
+    router.add(("GET", "POST"), "/employees/<int:employee_id>/edit", "edit")
+
+    assert router.resolve("GET", "/employees/new") == ("new", {}, ())
+    assert router.resolve("GET", "/employees/42") == ("detail", {"employee_id": 42}, ())
+    assert router.resolve("POST", "/employees/42/edit") == ("edit", {"employee_id": 42}, ())
+    assert router.resolve("GET", "/employees/abc") == (None, {}, ())
+    assert router.resolve("DELETE", "/employees/42") == (None, {}, ("GET",))
+
+
+def test_application_reports_wrong_method(db):
+    status, headers, _ = call("POST", "/employees")
+
+    assert status.startswith("405")
+    assert headers["Allow"] == "GET"
+
+
+def test_compensation_as_of_picks_rate_in_force(db):
+    first = create_employee()
+    second = create_employee(first_name="Grace", last_name="Hopper")
+    conn = app.get_db()
+    conn.executemany(
+        "INSERT INTO compensation (employee_id, compensation_type, hourly_rate, salary_amount, effective_date) VALUES (?, ?, ?, ?, ?)",
+        [
+            (first, "hourly", 35, None, "2024-06-01"),
+            (first, "hourly", 40, None, "2025-01-01"),
+            (second, "salary", None, 3000, "2024-03-01"),
+        ],
+    )
+    conn.commit()
+
+    rates = app.compensation_as_of(conn, "2024-12-31")
+    before_hire = app.compensation_as_of(conn, "2023-12-31")
+    conn.close()
+
+    assert rates[first]["hourly_rate"] == 35
+    assert rates[second]["salary_amount"] == 3000
+    assert before_hire == {}
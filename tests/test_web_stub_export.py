@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+pytest.importorskip("reportlab")
+
+from payroll_reports.web_stub_export import StubRenderer, _index_time_entries, build_stub_context, serve
+
+EMPLOYEE = {"id": "e1", "name": "Pat Doe", "pay_rate": 2000, "pay_rate_type": "hourly", "pay_schedule": "Weekly"}
+
+
+def _entry(entry_id, end_date, regular, vacation=0, employee_id="e1"):
+    return {
+        "id": entry_id,
+        "employee_id": employee_id,
+        "start_date": end_date,
+        "end_date": end_date,
+        "status": "paid",
+        "hours": {"regular": regular, "vacation": vacation},
+    }
+
+
+def test_stub_ytd_covers_same_year_entries_through_the_pay_date():
+    entries = [
+        _entry("late", "2024-12-27", 10),
+        _entry("prior-year", "2023-12-29", 40),
+        _entry("first", "2024-01-05", 40, vacation=8),
+        _entry("other", "2024-01-05", 40, employee_id="e2"),
+        _entry("second", "2024-01-12", 45),
+    ]
+    store = {"time_entries": entries}
+
+    context = build_stub_context(store, {}, entries[4], EMPLOYEE)
+
+    assert context.gross_pay == 90000
+    assert context.ytd_gross == 186000
+    assert dict((label, ytd) for label, _, ytd in context.earnings_rows) == {"Regular pay": 170000, "PTO pay": 16000}
+    ytd_ss = dict((label, ytd) for label, _, ytd in context.deduction_rows)["Social Security"]
+    assert ytd_ss == pytest.approx((96000 + 64200) * 0.062)
+    assert build_stub_context(store, {}, entries[4], EMPLOYEE, _index_time_entries(entries)) == context
+
+
+def test_renderer_reuses_the_parsed_store_until_it_changes(tmp_path):
+    store_path = tmp_path / "store.json"
+    store = {"employees": [EMPLOYEE], "time_entries": [_entry("first", "2024-01-05", 40)]}
+    store_path.write_text(json.dumps(store), encoding="utf-8")
+    renderer = StubRenderer(store_path, tmp_path / "setup.json")
+
+    assert renderer.context("first").gross_pay == 80000
+    assert renderer.context("first").gross_pay == 80000
+    assert renderer.loads == 1
+
+    store["time_entries"].append(_entry("second", "2024-01-12", 10))
+    store_path.write_text(json.dumps(store), encoding="utf-8")
+    os.utime(store_path, ns=(1, 1))
+    assert renderer.context("second").ytd_gross == 100000
+    assert renderer.loads == 2
+
+
+def test_serve_answers_each_request_and_survives_errors(tmp_path):
+    store_path = tmp_path / "store.json"
+    store_path.write_text(json.dumps({"employees": [EMPLOYEE], "time_entries": []}), encoding="utf-8")
+    requests = io.StringIO(
+        json.dumps({"id": 1, "entry_id": "missing", "output": str(tmp_path / "a.pdf")}) + "\n\nnot json\n"
+    )
+    responses = io.StringIO()
+
+    serve(StubRenderer(store_path, tmp_path / "setup.json"), requests, responses)
+
+    lines = [json.loads(line) for line in responses.getvalue().splitlines()]
+    assert lines[0] == {"id": 1, "error": "Paid time entry not found."}
+    assert lines[1]["id"] is None and "error" in lines[1]
+
+
+def test_batch_export_selects_a_run_and_writes_one_pdf_per_employee(tmp_path):
+    store_path = tmp_path / "store.json"
+    second = dict(EMPLOYEE, id="e2", name="Sam Roe")
+    entries = [
+        dict(_entry("a", "2024-01-05", 40), paid_at="2024-01-08T10:00:00Z"),
+        dict(_entry("b", "2024-01-05", 30, employee_id="e2"), paid_at="2024-01-08T10:00:00Z"),
+        _entry("c", "2024-01-12", 20),
+        dict(_entry("d", "2024-01-12", 20), status="open"),
+    ]
+    runs = [{"id": "run-1", "start_date": "2024-01-05", "end_date": "2024-01-05", "entry_ids": ["a", "b"]}]
+    store = {"employees": [EMPLOYEE, second], "time_entries": entries, "payroll_runs": runs}
+    store_path.write_text(json.dumps(store), encoding="utf-8")
+    renderer = StubRenderer(store_path, tmp_path / "setup.json")
+
+    assert renderer.select(run_id="run-1") == ["a", "b"]
+    assert renderer.select(pay_date="2024-01-12") == ["c"]
+    assert renderer.select(run_id="run-1", entry_ids=["c", "a"]) == ["a", "b", "c"]
+    with pytest.raises(ValueError):
+        renderer.select(run_id="missing")
+
+    assert renderer.render_batch(["a", "b", "c"], tmp_path / "stubs.zip", processes=2) == 3
+    with zipfile.ZipFile(tmp_path / "stubs.zip") as archive:
+        assert sorted(archive.namelist()) == ["pay-stubs-e1.pdf", "pay-stubs-e2.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+    renderer.render_batch(["a", "b", "c"], tmp_path / "stubs.pdf")
+    assert (tmp_path / "stubs.pdf").read_bytes().count(b"/Type /Page\n") == 3
+    with pytest.raises(ValueError):
+        renderer.render_batch(["d"], tmp_path / "open.pdf")